@@ -8,6 +8,7 @@ import numpy as np
 import proglog
 from tqdm import tqdm
 from moviepy.decorators import apply_to_audio, apply_to_mask, convert_to_seconds, outplace, requires_duration, use_clip_fps_by_default
+from moviepy.profiler import ACTIVE_PROFILERS
 
 class Clip:
     """
@@ -64,16 +65,19 @@ class Clip:
         Gets a numpy array representing the RGB picture of the clip at time t
         or (mono or stereo) value for a sound clip
         """
+        make_frame = self.make_frame
+        if ACTIVE_PROFILERS:
+            make_frame = ACTIVE_PROFILERS[-1].wrap(self, make_frame)
         if self.memoize:
             if t == self.memoized_t:
                 return self.memoized_frame
             else:
-                frame = self.make_frame(t)
+                frame = make_frame(t)
                 self.memoized_t = t
                 self.memoized_frame = frame
                 return frame
         else:
-            return self.make_frame(t)
+            return make_frame(t)
 
     def fl(self, fun, apply_to=None, keep_duration=True):
         """ General processing of a clip.
@@ -114,6 +118,7 @@ class Clip:
         """
         new_clip = self.copy()
         new_clip.make_frame = lambda t: fun(self.get_frame, t)
+        new_clip.make_frame.profile_of = fun
         
         if not keep_duration:
             new_clip.duration = None
@@ -164,7 +169,12 @@ class Clip:
         >>> newclip = clip.fl_time(lambda: 3-t)
 
         """
-        return self.fl(lambda gf, t: gf(t_func(t)), apply_to, keep_duration)
+        new_clip = self.fl(lambda gf, t: gf(t_func(t)), apply_to, keep_duration)
+        new_clip.make_frame.profile_of = t_func
+        if getattr(self.make_frame, 'region', None) is not None:
+            # video clips computing regions: the regions are those of the clip
+            new_clip.make_frame.region = lambda t, roi: self.get_region(t_func(t), roi)
+        return new_clip
 
     def fx(self, func, *args, **kwargs):
         """
@@ -212,11 +222,10 @@ class Clip:
         clips of the current clip, if they exist.
         """
         self.start = t
-        if self.duration is not None:
-            if change_end:
-                self.end = t + self.duration
-            else:
-                self.duration = self.end - self.start
+        if (self.duration is not None) and change_end:
+            self.end = t + self.duration
+        elif self.end is not None:
+            self.duration = self.end - self.start
 
     @apply_to_mask
     @apply_to_audio
@@ -230,7 +239,14 @@ class Clip:
         Also sets the duration of the mask and audio, if any,
         of the returned clip.
         """
-        pass
+        self.end = t
+        if self.end is None:
+            return
+        if self.start is None:
+            if self.duration is not None:
+                self.start = max(0, t - self.duration)
+        else:
+            self.duration = self.end - self.start
 
     @apply_to_mask
     @apply_to_audio
@@ -247,7 +263,15 @@ class Clip:
         be modified in function of the duration and the preset end
         of the clip.
         """
-        pass
+        self.duration = t
+
+        if change_end:
+            self.end = None if (t is None) else (self.start + t)
+        else:
+            if self.duration is None:
+                raise Exception("Cannot change clip start when new"
+                                "duration is None")
+            self.start = self.end - t
 
     @outplace
     def set_make_frame(self, make_frame):
@@ -255,23 +279,23 @@ class Clip:
         Sets a ``make_frame`` attribute for the clip. Useful for setting
         arbitrary/complicated videoclips.
         """
-        pass
+        self.make_frame = make_frame
 
     @outplace
     def set_fps(self, fps):
         """ Returns a copy of the clip with a new default fps for functions like
         write_videofile, iterframe, etc. """
-        pass
+        self.fps = fps
 
     @outplace
     def set_ismask(self, ismask):
         """ Says wheter the clip is a mask or not (ismask is a boolean)"""
-        pass
+        self.ismask = ismask
 
     @outplace
     def set_memoize(self, memoize):
         """ Sets wheter the clip should keep the last frame read in memory """
-        pass
+        self.memoize = memoize
 
     @convert_to_seconds(['t'])
     def is_playing(self, t):
@@ -284,7 +308,26 @@ class Clip:
         theclip, else returns a vector [b_1, b_2, b_3...] where b_i
         is true iff tti is in the clip.
         """
-        pass
+        if isinstance(t, np.ndarray):
+            # is the whole list of t outside the clip ?
+            tmin, tmax = t.min(), t.max()
+
+            if (self.end is not None) and (tmin >= self.end):
+                return False
+
+            if tmax < self.start:
+                return False
+
+            # If we arrive here, a part of t falls in the clip
+            result = 1 * (t >= self.start)
+            if self.end is not None:
+                result *= (t <= self.end)
+            return result
+
+        else:
+
+            return((t >= self.start) and
+                   ((self.end is None) or (t < self.end)))
 
     @convert_to_seconds(['t_start', 't_end'])
     @apply_to_mask
@@ -310,7 +353,39 @@ class Clip:
         subclips of ``mask`` and ``audio`` the original clip, if
         they exist.
         """
-        pass
+        if t_start < 0:
+            t_start = self.duration + t_start
+        if self.duration is not None and t_start > self.duration:
+            raise ValueError("t_start (%.02f) " % t_start +
+                             "should be smaller than the clip's " +
+                             "duration (%.02f)." % self.duration)
+        newclip = self.fl_time(lambda t: t + t_start, apply_to=[])
+        # Keep track of the file the frames come from, see
+        # ``moviepy.video.io.smart_render``.
+        file_source = getattr(self.make_frame, 'file_source', None)
+        if file_source is not None:
+            filename, offset = file_source
+            newclip.make_frame.file_source = (filename, offset + t_start)
+        if hasattr(self, 'get_samples'):
+            # audio clips: the samples of the subclip are those of the
+            # clip, shifted by a whole number of samples if possible
+            def samples(start, n, fps):
+                offset = t_start * fps
+                if abs(offset - round(offset)) > 1e-6:
+                    return None
+                return self.get_samples(start + int(round(offset)), n, fps)
+            newclip.make_frame.samples = samples
+        if t_end is None and self.duration is not None:
+            t_end = self.duration
+        elif t_end is not None and t_end < 0:
+            if self.duration is None:
+                raise ValueError("A negative t_end requires the clip "
+                                 "to have a duration.")
+            t_end = self.duration + t_end
+        if t_end is not None:
+            newclip.duration = t_end - t_start
+            newclip.end = newclip.start + newclip.duration
+        return newclip
 
     @apply_to_mask
     @apply_to_audio
@@ -328,7 +403,16 @@ class Clip:
         The resulting clip's ``audio`` and ``mask`` will also be cutout
         if they exist.
         """
-        pass
+        fl = lambda t: t + (t >= ta)*(tb - ta)
+        newclip = self.fl_time(fl)
+
+        if self.duration is not None:
+
+            return newclip.set_duration(self.duration - (tb - ta))
+
+        else:
+
+            return newclip
 
     @requires_duration
     @use_clip_fps_by_default
@@ -357,7 +441,15 @@ class Clip:
         >>> print ( [frame[0,:,0].max()
                      for frame in myclip.iter_frames()])
         """
-        pass
+        logger = proglog.default_bar_logger(logger)
+        for t in logger.iter_bar(t=np.arange(0, self.duration, 1.0/fps)):
+            frame = self.get_frame(t)
+            if (dtype is not None) and (frame.dtype != dtype):
+                frame = frame.astype(dtype)
+            if with_times:
+                yield t, frame
+            else:
+                yield frame
 
     def close(self):
         """ 
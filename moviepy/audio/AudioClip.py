@@ -3,10 +3,46 @@ import numpy as np
 import proglog
 from tqdm import tqdm
 from moviepy.audio.io.ffmpeg_audiowriter import ffmpeg_audiowrite
+from moviepy.audio.tools.loudness import measure_audio
+from moviepy.audio.tools.mixdown import StemRenderer
 from moviepy.Clip import Clip
+from moviepy.config import get_setting
 from moviepy.decorators import requires_duration
 from moviepy.tools import deprecated_version_of, extensions_dict
 
+def _sound_array(sound, n):
+    """ Returns the sound of ``n`` samples computed by a ``make_frame``
+    as an array of shape ``(n, nchannels)``. """
+    sound = np.asarray(sound)
+    if sound.ndim == 1:
+        return sound[:, None]
+    if sound.shape[0] != n:
+        # make_frame of the form t -> [f1_t, f2_t]
+        return sound.T
+    return sound
+
+def _chunk_buffer(buffers, name, shape, dtype):
+    """ Returns an array of the given shape kept in ``buffers[name]``,
+    which is only reallocated if it is too small. """
+    buffer = buffers.get(name)
+    if (buffer is None or buffer.dtype != dtype or buffer.shape[1:] != shape[1:]
+            or len(buffer) < shape[0]):
+        buffer = buffers[name] = np.empty(shape, dtype=dtype)
+    return buffer[:shape[0]]
+
+def _quantize(snd_array, nbytes, buffers):
+    """ Returns the sound as integers of ``nbytes`` bytes, computed in
+    arrays kept in ``buffers`` (see ``_chunk_buffer``). """
+    inttype = {1: 'int8', 2: 'int16', 4: 'int32'}[nbytes]
+    # float32 has enough precision for 8 and 16 bits samples
+    work = _chunk_buffer(buffers, 'work', snd_array.shape,
+                         'float32' if nbytes <= 2 else 'float64')
+    np.clip(snd_array, -0.99, 0.99, out=work)
+    work *= 2**(8*nbytes-1)
+    quantized = _chunk_buffer(buffers, 'quantized', snd_array.shape, inttype)
+    np.copyto(quantized, work, casting='unsafe')
+    return quantized
+
 class AudioClip(Clip):
     """ Base class for audio clips.
     
@@ -56,9 +92,71 @@ class AudioClip(Clip):
             self.duration = duration
             self.end = duration
 
+    def get_samples(self, start, n, fps=None):
+        """ Returns the samples ``start`` to ``start + n`` of the sound
+        at ``fps`` samples per second (by default ``self.fps``), as an
+        array of shape ``(n, nchannels)``. The sample ``i`` is the sound
+        at time ``i / fps``.
+
+        Clips which know their samples (files, arrays, compositions,
+        audio effects...) have a ``make_frame.samples`` function
+        ``(start, n, fps) -> samples`` computing them by slices of
+        arrays, which may return None for other sample rates. For the
+        other clips the samples are computed by ``get_frame`` at the
+        times of the samples.
+        """
+        if fps is None:
+            fps = self.fps
+        samples = getattr(self.make_frame, 'samples', None)
+        if samples is not None:
+            result = samples(start, n, fps)
+            if result is not None:
+                return result
+        tt = (1.0 / fps) * np.arange(start, start + n)
+        return _sound_array(self.get_frame(tt), n)
+
+    def fl_samples(self, fun, keep_duration=True):
+        """ Returns a clip whose sound is a transformation of the sound
+        of the current clip which only depends on the times of the
+        samples, like a volume change or a fade.
+
+        Parameters
+        -----------
+
+        fun
+          A function ``(sound, tt) -> new sound`` where ``sound`` is an
+          array of shape ``(n, nchannels)`` (which must not be modified
+          in place) of the sound at the times of the array ``tt``.
+
+        keep_duration
+          See ``Clip.fl``.
+
+        """
+        def transform(gf, t):
+            if isinstance(t, np.ndarray):
+                return fun(_sound_array(gf(t), len(t)), t)
+            return fun(np.atleast_1d(gf(t))[None], np.array([t]))[0]
+
+        def samples(start, n, fps):
+            tt = (1.0 / fps) * np.arange(start, start + n)
+            return fun(self.get_samples(start, n, fps), tt)
+
+        new_clip = self.fl(transform, keep_duration=keep_duration)
+        new_clip.make_frame.samples = samples
+        return new_clip
+
     @requires_duration
-    def iter_chunks(self, chunksize=None, chunk_duration=None, fps=None, quantize=False, nbytes=2, logger=None):
+    def iter_chunks(self, chunksize=None, chunk_duration=None, fps=None, quantize=False, nbytes=2, logger=None, reuse_buffers=False, threads=None):
         """ Iterator that returns the whole sound array of the clip by chunks
+
+        The chunks are computed with ``get_samples``. With
+        ``reuse_buffers=True``, the sound of all the chunks is computed
+        in the same arrays, so each chunk must be used (e.g. written)
+        before the next one is asked for.
+
+        With ``threads``, the clips of a ``CompositeAudioClip`` are
+        computed in parallel in that many threads, see
+        ``moviepy.audio.tools.mixdown``.
         """
         if fps is None:
             fps = self.fps
@@ -71,21 +169,34 @@ class AudioClip(Clip):
         if chunksize is None:
             chunksize = int(fps)
         
-        if logger is None:
-            logger = proglog.default_bar_logger("MoviePy - Iterating chunks")
+        logger = proglog.default_bar_logger(logger)
         
         total_size = int(self.duration * fps)
-        nchunks = total_size // chunksize + 1
-        
         pospos = list(range(0, total_size, chunksize)) + [total_size]
+        nchunks = len(pospos) - 1
         
-        for i in logger.iter_bar(chunk=list(range(nchunks))):
-            size = pospos[i+1] - pospos[i]
-            tt = (1.0 / fps) * np.arange(pospos[i], pospos[i+1])
-            yield self.to_soundarray(tt, nbytes=nbytes, quantize=quantize, fps=fps, buffersize=chunksize)
+        buffers = {} if reuse_buffers else None
+        renderer = None
+        if threads and isinstance(self, CompositeAudioClip):
+            renderer = StemRenderer(self, threads)
+        try:
+            for i in logger.iter_bar(chunk=list(range(nchunks))):
+                size = pospos[i+1] - pospos[i]
+                if renderer is None:
+                    snd_array = self.get_samples(pospos[i], size, fps)
+                else:
+                    out = None if buffers is None else _chunk_buffer(
+                        buffers, 'mix', (size, self.nchannels), get_setting('FLOAT_DTYPE'))
+                    snd_array = renderer.get_samples(pospos[i], size, fps, out=out)
+                if quantize:
+                    snd_array = _quantize(snd_array, nbytes, {} if buffers is None else buffers)
+                yield snd_array
+        finally:
+            if renderer is not None:
+                renderer.close()
 
     @requires_duration
-    def to_soundarray(self, tt=None, fps=None, quantize=False, nbytes=2, buffersize=50000):
+    def to_soundarray(self, tt=None, fps=None, quantize=False, nbytes=2, buffersize=50000, buffers=None):
         """
         Transforms the sound into an array that can be played by pygame
         or written in a wav file. See ``AudioClip.preview``.
@@ -100,6 +211,10 @@ class AudioClip(Clip):
         nbytes
           Number of bytes to encode the sound: 1 for 8bit sound,
           2 for 16bit, 4 for 32bit sound.
+
+        buffers
+          Optional dict of arrays reused for the quantization from one
+          call to the next (see ``iter_chunks``).
           
         """
         if fps is None:
@@ -108,19 +223,25 @@ class AudioClip(Clip):
             raise ValueError("No fps attribute specified")
         
         if tt is None:
-            tt = np.arange(0, self.duration, 1.0/fps)
-        
-        snd_array = self.get_frame(tt)
+            snd_array = self.get_samples(0, int(np.ceil(self.duration * fps)), fps)
+        else:
+            snd_array = _sound_array(self.get_frame(tt), len(tt))
         
         if quantize:
-            snd_array = np.maximum(-0.99, np.minimum(0.99, snd_array))
-            inttype = {1: 'int8', 2: 'int16', 4: 'int32'}[nbytes]
-            snd_array = (2**(8*nbytes-1)*snd_array).astype(inttype)
+            snd_array = _quantize(snd_array, nbytes, {} if buffers is None else buffers)
         
         return snd_array
 
     @requires_duration
-    def write_audiofile(self, filename, fps=None, nbytes=2, buffersize=2000, codec=None, bitrate=None, ffmpeg_params=None, write_logfile=False, verbose=True, logger='bar'):
+    def max_volume(self, stereo=False, chunksize=50000, logger=None):
+        """ Returns the maximum of the absolute value of the sound (of
+        each channel if ``stereo`` is True). The clip is read by chunks
+        and the result is cached, see ``moviepy.audio.tools.loudness``. """
+        peak = measure_audio(self, chunksize=chunksize, logger=logger)['peak']
+        return peak if stereo else peak.max()
+
+    @requires_duration
+    def write_audiofile(self, filename, fps=None, nbytes=2, buffersize=2000, codec=None, bitrate=None, ffmpeg_params=None, write_logfile=False, verbose=True, logger='bar', threads=None):
         """ Writes an audio file from the AudioClip.
 
 
@@ -162,6 +283,11 @@ class AudioClip(Clip):
         logger
           Either 'bar' or None or any Proglog logger
 
+        threads
+          Number of threads computing the clips of a CompositeAudioClip
+          in parallel (see ``moviepy.audio.tools.mixdown``). The file is
+          identical to the one written without threads.
+
         """
         if fps is None:
             fps = self.fps
@@ -179,7 +305,7 @@ class AudioClip(Clip):
                                  codec=codec, bitrate=bitrate,
                                  write_logfile=write_logfile, verbose=verbose,
                                  ffmpeg_params=ffmpeg_params,
-                                 logger=logger)
+                                 logger=logger, threads=threads)
 AudioClip.to_audiofile = deprecated_version_of(AudioClip.write_audiofile, 'to_audiofile')
 
 class AudioArrayClip(AudioClip):
@@ -205,22 +331,41 @@ class AudioArrayClip(AudioClip):
         self.array = array
         self.fps = fps
         self.duration = 1.0 * len(array) / fps
+        self.end = self.duration
+
+        def samples(start, n, fps):
+            if fps != self.fps:
+                return None
+            if 0 <= start and start + n <= len(self.array):
+                # a read-only view
+                result = self.array[start:start + n]
+                result.flags.writeable = False
+                return result
+            result = np.zeros((n,) + self.array.shape[1:], dtype=self.array.dtype)
+            a, b = max(start, 0), min(start + n, len(self.array))
+            if b > a:
+                result[a - start:b - start] = self.array[a:b]
+            return result
 
         def make_frame(t):
             """ complicated, but must be able to handle the case where t
             is a list of the form sin(t) """
             if isinstance(t, np.ndarray):
-                array_inds = (self.fps * t).astype(int)
-                in_array = (array_inds > 0) & (array_inds < len(self.array))
-                result = np.zeros((len(t), 2))
+                array_inds = (self.fps * t + 0.00001).astype(int)
+                if len(t) > 0 and (np.diff(array_inds) == 1).all():
+                    # consecutive samples, e.g. a chunk
+                    return samples(array_inds[0], len(t), self.fps)
+                in_array = (array_inds >= 0) & (array_inds < len(self.array))
+                result = np.zeros((len(t),) + self.array.shape[1:], dtype=self.array.dtype)
                 result[in_array] = self.array[array_inds[in_array]]
                 return result
             else:
-                i = int(self.fps * t)
+                i = int(self.fps * t + 0.00001)
                 if i < 0 or i >= len(self.array):
                     return 0 * self.array[0]
                 else:
                     return self.array[i]
+        make_frame.samples = samples
         self.make_frame = make_frame
         self.nchannels = len(list(self.get_frame(0)))
 
@@ -244,19 +389,60 @@ class CompositeAudioClip(AudioClip):
         self.clips = clips
         ends = [c.end for c in self.clips]
         self.nchannels = max([c.nchannels for c in self.clips])
+        self.starts = np.array([c.start for c in self.clips], dtype=float)
+        self.ends = np.array([np.inf if c.end is None else c.end for c in self.clips])
         if not any([e is None for e in ends]):
             self.duration = max(ends)
             self.end = max(ends)
 
         def make_frame(t):
-            played_parts = [c.is_playing(t) for c in self.clips]
-            sounds = [c.get_frame(t - c.start) * np.array([part]).T for c, part in zip(self.clips, played_parts) if part is not False]
-            if isinstance(t, np.ndarray):
-                zero = np.zeros((len(t), self.nchannels))
-            else:
-                zero = np.zeros(self.nchannels)
-            return zero + sum(sounds)
+            if not isinstance(t, np.ndarray):
+                result = np.zeros(self.nchannels)
+                for c in self.clips:
+                    if c.start <= t and (c.end is None or t < c.end):
+                        result += c.get_frame(t - c.start)
+                return result
+            # the sounds are added in place to one array, and for sorted
+            # times (chunks) each clip plays a slice of them
+            result = np.zeros((len(t), self.nchannels), dtype=get_setting('FLOAT_DTYPE'))
+            if len(t) < 2 or (t[1:] >= t[:-1]).all():
+                starts = np.searchsorted(t, self.starts)
+                ends = np.searchsorted(t, self.ends)
+                for i in np.nonzero(ends > starts)[0]:
+                    c, played = self.clips[i], slice(starts[i], ends[i])
+                    result[played] += _sound_array(c.get_frame(t[played] - c.start),
+                                                   ends[i] - starts[i])
+                return result
+            for c, start, end in zip(self.clips, self.starts, self.ends):
+                played = (t >= start) & (t < end)
+                n = played.sum()
+                if n > 0:
+                    result[played] += _sound_array(c.get_frame(t[played] - c.start), n)
+            return result
+        def samples(start, n, fps):
+            firsts, lasts = self.sample_bounds(fps)
+            a, b = np.maximum(firsts, start), np.minimum(lasts, start + n)
+            result = np.zeros((n, self.nchannels), dtype=get_setting('FLOAT_DTYPE'))
+            for i in np.nonzero(b > a)[0]:
+                result[a[i] - start:b[i] - start] += self.clips[i].get_samples(
+                    a[i] - firsts[i], b[i] - a[i], fps)
+            return result
+
+        make_frame.samples = samples
+        make_frame.timeline = ([c.start for c in self.clips], self.clips)
         self.make_frame = make_frame
+        self._sample_bounds = {}
+
+    def sample_bounds(self, fps):
+        """ Returns the arrays of the first and last (excluded) samples
+        played by each clip at ``fps`` samples per second. They are
+        rounded once, so that sounds placed at any times do not drift
+        from one chunk to the next. """
+        if fps not in self._sample_bounds:
+            self._sample_bounds[fps] = (
+                np.rint(self.starts * fps).astype(int),
+                np.rint(np.minimum(self.ends * fps, 2**62)).astype(int))
+        return self._sample_bounds[fps]
 
 def concatenate_audioclips(clips):
     """
@@ -268,17 +454,48 @@ def concatenate_audioclips(clips):
     
     max_fps = max(clip.fps for clip in clips if hasattr(clip, 'fps') and clip.fps is not None)
     
-    durations = [clip.duration for clip in clips]
-    total_duration = sum(durations)
+    tt = np.cumsum([0] + [clip.duration for clip in clips])
+    nchannels = max(clip.nchannels for clip in clips)
     
     def make_frame(t):
-        current_duration = 0
-        for clip, duration in zip(clips, durations):
-            if current_duration <= t < current_duration + duration:
-                return clip.get_frame(t - current_duration)
-            current_duration += duration
-        return 0  # Return silence if t is out of bounds
+        if not isinstance(t, np.ndarray):
+            i = np.searchsorted(tt, t, side='right') - 1
+            if 0 <= i < len(clips):
+                return clips[i].get_frame(t - tt[i])
+            return np.zeros(nchannels)  # Silence if t is out of bounds
+        # Sort the times so that each clip plays a contiguous slice
+        # of them, then fill the slices of one output buffer.
+        is_sorted = len(t) < 2 or (t[1:] >= t[:-1]).all()
+        order = None if is_sorted else np.argsort(t, kind='stable')
+        sorted_t = t if is_sorted else t[order]
+        bounds = np.searchsorted(sorted_t, tt)
+        result = np.zeros((len(t), nchannels), dtype=get_setting('FLOAT_DTYPE'))
+        for i in range(max(0, np.searchsorted(tt, sorted_t[0], side='right') - 1),
+                       len(clips)):
+            start, end = bounds[i], bounds[i + 1]
+            if start >= len(t):
+                break
+            if end > start:
+                frame = clips[i].get_frame(sorted_t[start:end] - tt[i])
+                result[start:end] = _sound_array(frame, end - start)
+        if order is not None:
+            result[order] = result.copy()
+        return result
+    def samples(start, n, fps):
+        bounds = np.rint(tt * fps).astype(int)
+        result = np.zeros((n, nchannels), dtype=get_setting('FLOAT_DTYPE'))
+        for i in range(max(0, np.searchsorted(bounds, start, side='right') - 1),
+                       len(clips)):
+            a, b = max(bounds[i], start), min(bounds[i + 1], start + n)
+            if a >= start + n:
+                break
+            if b > a:
+                result[a - start:b - start] = clips[i].get_samples(a - bounds[i], b - a, fps)
+        return result
+
+    make_frame.samples = samples
+    make_frame.timeline = (tt[:-1], clips)
     
-    new_clip = AudioClip(make_frame=make_frame, duration=total_duration)
+    new_clip = AudioClip(make_frame=make_frame, duration=tt[-1])
     new_clip.fps = max_fps
     return new_clip
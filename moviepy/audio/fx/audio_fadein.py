@@ -5,9 +5,9 @@ from moviepy.decorators import audio_video_fx
 def audio_fadein(clip, duration):
     """ Return an audio (or video) clip that is first mute, then the
         sound arrives progressively over ``duration`` seconds. """
-    def fader(get_frame, t):
-        if t < duration:
-            return get_frame(t) * (t / duration)
-        return get_frame(t)
+    def fader(sound, tt):
+        if len(tt) == 0 or tt.min() >= duration:
+            return sound
+        return sound * np.minimum(1.0, tt / duration)[:, None]
 
-    return clip.fl(fader)
+    return clip.fl_samples(fader)
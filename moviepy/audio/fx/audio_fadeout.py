@@ -6,17 +6,11 @@ from moviepy.decorators import audio_video_fx, requires_duration
 def audio_fadeout(clip, duration):
     """ Return a sound clip where the sound fades out progressively
         over ``duration`` seconds at the end of the clip. """
-    def faded_audio(get_frame, t):
-        # Original audio at time t
-        audio = get_frame(t)
-        
-        # Fade factor
-        if t >= clip.duration - duration:
-            factor = (clip.duration - t) / duration
-        else:
-            factor = 1.0
-        
-        # Apply fade
-        return audio * factor
+    def faded_audio(sound, tt):
+        if len(tt) == 0 or tt.max() < clip.duration - duration:
+            return sound
+        # Fade factor, 1 before the last ``duration`` seconds
+        factor = np.minimum(1.0, (clip.duration - tt) / duration)
+        return sound * factor[:, None]
 
-    return clip.fl(faded_audio, keep_duration=True)
+    return clip.fl_samples(faded_audio, keep_duration=True)
@@ -24,15 +24,17 @@ def audio_left_right(audioclip, left=1, right=1, merge=False):
     AudioClip
         A new AudioClip with adjusted left and right channels
     """
-    def adjust_channels(get_frame, t):
-        frame = get_frame(t)
-        if frame.ndim == 1:
+    def adjust_channels(sound, tt):
+        if sound.shape[1] < 2:
             raise ValueError("Input audio clip must be stereo (2 channels)")
         
-        adjusted = np.array([frame[:, 0] * left, frame[:, 1] * right]).T
+        adjusted = sound[:, :2] * np.array([left, right])
         
         if merge:
-            return np.mean(adjusted, axis=1)
+            return np.mean(adjusted, axis=1, keepdims=True)
         return adjusted
 
-    return audioclip.fl(adjust_channels)
+    new_clip = audioclip.fl_samples(adjust_channels)
+    if merge:
+        new_clip.nchannels = 1
+    return new_clip
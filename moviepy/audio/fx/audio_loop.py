@@ -1,12 +1,14 @@
-    
-    >>> from moviepy.editor import *
-    >>> videoclip = VideoFileClip('myvideo.mp4')
-    >>> music = AudioFileClip('music.ogg')
-    >>> audio = afx.audio_loop( music, duration=videoclip.duration)
-    >>> videoclip.set_audio(audio)
+from moviepy.audio.AudioClip import concatenate_audioclips
+from moviepy.decorators import audio_video_fx
 
-    """
-    pass
+@audio_video_fx
+def audio_loop(audioclip, nloops=None, duration=None):
+    """ Loops over an audio clip.
+
+    Returns an audio clip that plays the given clip either
+    `nloops` times, or during `duration` seconds.
+
+    Examples
     ========
     
     >>> from moviepy.editor import *
@@ -16,4 +18,7 @@
     >>> videoclip.set_audio(audio)
 
     """
-    pass
+    if duration is not None:
+        nloops = int(duration / audioclip.duration) + 1
+        return concatenate_audioclips(nloops * [audioclip]).subclip(0, duration)
+    return concatenate_audioclips(nloops * [audioclip])
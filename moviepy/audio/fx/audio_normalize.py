@@ -1,13 +1,38 @@
+from moviepy.audio.tools.loudness import measure_audio
+from moviepy.decorators import audio_video_fx
 
-    >>> from moviepy.editor import *
-    >>> videoclip = VideoFileClip('myvideo.mp4').fx(afx.audio_normalize)
+@audio_video_fx
+def audio_normalize(clip, loudness=None):
+    """ Return a clip whose volume is normalized to 0db.
 
-    """
-    pass
+    Return an audio (or video) clip whose audio volume is normalized
+    so that the maximum volume is at 0db, the maximum achievable volume.
+    With ``loudness`` (in LUFS, e.g. -23 for EBU R128 or -16 for
+    podcasts), the volume is instead set so that the integrated loudness
+    of the clip is ``loudness``.
+
+    The volume of the clip is measured by chunks when its first sound is
+    computed, usually at the start of the export, and the measurement is
+    cached (see ``moviepy.audio.tools.loudness``).
+
+    Examples
     ========
 
     >>> from moviepy.editor import *
     >>> videoclip = VideoFileClip('myvideo.mp4').fx(afx.audio_normalize)
 
     """
-    pass
+    state = {}
+
+    def gain():
+        if 'gain' not in state:
+            measure = measure_audio(clip, loudness=loudness is not None)
+            if loudness is not None:
+                level = measure['loudness']
+                state['gain'] = 1.0 if level == -float('inf') else 10 ** ((loudness - level) / 20.0)
+            else:
+                max_volume = measure['peak'].max()
+                state['gain'] = 1.0 if max_volume == 0 else 1.0 / max_volume
+        return state['gain']
+
+    return clip.fl_samples(lambda sound, tt: gain() * sound, keep_duration=True)
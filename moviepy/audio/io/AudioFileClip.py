@@ -1,6 +1,7 @@
 from __future__ import division
 from moviepy.audio.AudioClip import AudioClip
 from moviepy.audio.io.readers import FFMPEG_AudioReader
+from moviepy.audio.tools.mixdown import current_stem
 
 class AudioFileClip(AudioClip):
     """
@@ -67,9 +68,32 @@ class AudioFileClip(AudioClip):
         self.duration = self.reader.duration
         self.end = self.reader.duration
         self.buffersize = self.reader.buffersize
-        self.make_frame = lambda t: self.reader.get_frame(t)
+        self.make_frame = lambda t: self.current_reader().get_frame(t)
+        self.make_frame.samples = self._samples
+        # (identifies the sound played, see ``moviepy.audio.tools.loudness``)
+        self.make_frame.file_source = (filename, 0)
         self.nchannels = self.reader.nchannels
 
+    def current_reader(self):
+        """ Returns the reader of the file for the current thread: the
+        clip's own reader, or the reader of the stem being computed, see
+        ``moviepy.audio.tools.mixdown``. """
+        stem = current_stem()
+        if stem is None:
+            return self.reader
+        reader = stem.readers.get(self)
+        if reader is None:
+            reader = stem.readers[self] = FFMPEG_AudioReader(
+                self.filename, fps=self.reader.fps, nbytes=self.reader.nbytes,
+                buffersize=self.buffersize, infos=self.reader.infos)
+        return reader
+
+    def _samples(self, start, n, fps):
+        """ Samples read from the file, see ``AudioClip.get_samples``. """
+        if fps != self.reader.fps:
+            return None
+        return self.current_reader().read_samples(start, n)
+
     def coreader(self):
         """ Returns a copy of the AudioFileClip, i.e. a new entrance point
             to the audio file. Use copy when you have different clips
@@ -1,9 +1,9 @@
-import os
 import subprocess as sp
+import numpy as np
 import proglog
 from moviepy.compat import DEVNULL
-from moviepy.config import get_setting
 from moviepy.decorators import requires_duration
+from moviepy.video.io.ffmpeg_process import FFMPEG_PROCESSES, FFMPEG_Command
 
 class FFMPEG_AudioWriter:
     """
@@ -36,11 +36,52 @@ class FFMPEG_AudioWriter:
         self.codec = codec
         if logfile is None:
             logfile = sp.PIPE
-        cmd = [get_setting('FFMPEG_BINARY'), '-y', '-loglevel', 'error' if logfile == sp.PIPE else 'info', '-f', 's%dle' % (8 * nbytes), '-acodec', 'pcm_s%dle' % (8 * nbytes), '-ar', '%d' % fps_input, '-ac', '%d' % nchannels, '-i', '-'] + (['-vn'] if input_video is None else ['-i', input_video, '-vcodec', 'copy']) + ['-acodec', codec] + ['-ar', '%d' % fps_input] + ['-strict', '-2'] + (['-ab', bitrate] if bitrate is not None else []) + (ffmpeg_params if ffmpeg_params else []) + [filename]
-        popen_params = {'stdout': DEVNULL, 'stderr': logfile, 'stdin': sp.PIPE}
-        if os.name == 'nt':
-            popen_params['creationflags'] = 134217728
-        self.proc = sp.Popen(cmd, **popen_params)
+        cmd = (FFMPEG_Command(loglevel='error' if logfile == sp.PIPE else 'info',
+                              overwrite=True)
+               .add_input('-', f='s%dle' % (8 * nbytes),
+                          acodec='pcm_s%dle' % (8 * nbytes),
+                          ar='%d' % fps_input, ac='%d' % nchannels))
+        if input_video is not None:
+            cmd.add_input(input_video)
+        cmd.add_output(filename, extra_args=ffmpeg_params,
+                       vn=input_video is None,
+                       vcodec=None if input_video is None else 'copy',
+                       acodec=codec, ar='%d' % fps_input, strict='-2',
+                       ab=bitrate)
+        self.proc = FFMPEG_PROCESSES.popen(cmd, stdout=DEVNULL, stderr=logfile,
+                                           stdin=sp.PIPE)
+
+    def write_frames(self, frames_array):
+        """ Writes a chunk of sound, an array of shape (n, nchannels) of
+        the integer type of ``nbytes`` (given to ffmpeg without a copy if
+        it is contiguous). """
+        try:
+            self.proc.stdin.write(memoryview(np.ascontiguousarray(frames_array)).cast('B'))
+        except IOError as err:
+            ffmpeg_error = self.proc.stderr.read().decode() if self.proc.stderr else ''
+            error = (f"MoviePy error: FFMPEG encountered the following error while "
+                     f"writing file {self.filename}:\n\n {ffmpeg_error}")
+            if "Unknown encoder" in ffmpeg_error:
+                error += ("\n\nThe audio export failed because FFMPEG didn't find "
+                          "the specified codec for audio encoding (%s). Please "
+                          "install this codec or change the codec when calling "
+                          "write_videofile or write_audiofile. For instance for "
+                          "mp3:\n   >>> write_videofile('myvid.mp4', "
+                          "audio_codec='libmp3lame')") % self.codec
+            elif "incorrect codec parameters ?" in ffmpeg_error:
+                error += ("\n\nThe audio export failed, possibly because the "
+                          "codec specified for the video (%s) is not compatible "
+                          "with the given extension (%s). Please specify a valid "
+                          "'codec' argument in write_audiofile.") % (self.codec, self.filename)
+            raise IOError(error)
+
+    def close(self):
+        """ Closes the pipe and waits for ffmpeg to finish the file. """
+        if getattr(self, 'proc', None):
+            self.proc.stdin.close()
+            self.proc.wait()
+            FFMPEG_PROCESSES.release(self.proc)
+        self.proc = None
 
     def __del__(self):
         self.close()
@@ -52,7 +93,7 @@ class FFMPEG_AudioWriter:
         self.close()
 
 @requires_duration
-def ffmpeg_audiowrite(clip, filename, fps, nbytes, buffersize, codec='libvorbis', bitrate=None, write_logfile=False, verbose=True, ffmpeg_params=None, logger='bar'):
+def ffmpeg_audiowrite(clip, filename, fps, nbytes, buffersize, codec='libvorbis', bitrate=None, write_logfile=False, verbose=True, ffmpeg_params=None, logger='bar', threads=None):
     """
     A function that wraps the FFMPEG_AudioWriter to write an AudioClip
     to a file.
@@ -73,7 +114,9 @@ def ffmpeg_audiowrite(clip, filename, fps, nbytes, buffersize, codec='libvorbis'
                                       quantize=True,
                                       nbytes=nbytes,
                                       fps=fps,
-                                      logger=logger):
+                                      logger=logger,
+                                      reuse_buffers=True,
+                                      threads=threads):
             writer.write_frames(chunk)
 
     if write_logfile:
@@ -1,9 +1,11 @@
+import math
 import os
 import subprocess as sp
 import warnings
 import numpy as np
 from moviepy.compat import DEVNULL, PY3
 from moviepy.config import get_setting
+from moviepy.video.io.ffmpeg_process import FFMPEG_PROCESSES, FFMPEG_Command
 from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
 
 class FFMPEG_AudioReader:
@@ -34,58 +36,124 @@ class FFMPEG_AudioReader:
       Desired number of bytes (1,2,4) in the signal that will be
       received from ffmpeg
 
+    infos
+      The infos of the file given by ``ffmpeg_parse_infos``, if already
+      known (e.g. for a second reader of the same file).
+
     """
 
-    def __init__(self, filename, buffersize, print_infos=False, fps=44100, nbytes=2, nchannels=2):
+    def __init__(self, filename, buffersize, print_infos=False, fps=44100, nbytes=2, nchannels=2, infos=None):
         self.filename = filename
         self.nbytes = nbytes
         self.fps = fps
         self.f = 's%dle' % (8 * nbytes)
         self.acodec = 'pcm_s%dle' % (8 * nbytes)
         self.nchannels = nchannels
-        infos = ffmpeg_parse_infos(filename)
+        if infos is None:
+            infos = ffmpeg_parse_infos(filename)
         self.duration = infos['duration']
-        if 'video_duration' in infos:
+        if infos.get('video_duration') is not None:
             self.duration = infos['video_duration']
-        else:
-            self.duration = infos['duration']
         self.infos = infos
         self.proc = None
         self.nframes = int(self.fps * self.duration)
         self.buffersize = min(self.nframes + 1, buffersize)
-        self.buffer = None
-        self.buffer_startframe = 1
+        self.buffer = np.zeros((0, self.nchannels), dtype=get_setting('FLOAT_DTYPE'))
+        self.buffer_startframe = 0
         self.initialize()
-        self.buffer_around(1)
 
     def initialize(self, starttime=0):
         """ Opens the file, creates the pipe. """
         self.close_proc()  # close if process is already running
 
-        cmd = [get_setting("FFMPEG_BINARY"), "-ss", "%.03f" % starttime,
-               "-i", self.filename,
-               "-loglevel", "error",
-               "-f", self.f,
-               "-acodec", self.acodec,
-               "-ar", "%d" % self.fps,
-               "-ac", "%d" % self.nchannels, "-"]
-        
-        self.proc = sp.Popen(cmd, stdin=sp.PIPE,
-                             stdout=sp.PIPE, stderr=sp.PIPE)
-
-        self.pos = int(self.fps * starttime)
+        cmd = (FFMPEG_Command()
+               .add_input(self.filename, ss="%.03f" % starttime)
+               .add_output("-", f=self.f, acodec=self.acodec,
+                           ar="%d" % self.fps, ac="%d" % self.nchannels))
+
+        self.proc = FFMPEG_PROCESSES.popen(cmd, evict=self.close_proc,
+                                           stdin=sp.PIPE, stdout=sp.PIPE,
+                                           stderr=sp.PIPE)
+
+        self.pos = int(round(self.fps * float("%.03f" % starttime)))
+
+    def read_chunk(self, chunksize):
+        """ Reads the next ``chunksize`` samples from the pipe, as floats
+        between -1 and 1 (zeros after the end of the file). """
+        if self.proc is None:
+            # the process was stopped by FFMPEG_PROCESSES: restart it
+            self.seek(self.pos)
+        FFMPEG_PROCESSES.touch(self.proc)
+        s = self.proc.stdout.read(self.nchannels * self.nbytes * chunksize)
+        data = np.frombuffer(s, dtype='int%d' % (8 * self.nbytes))
+        data = data[:len(data) - len(data) % self.nchannels].reshape((-1, self.nchannels))
+        result = np.zeros((chunksize, self.nchannels), dtype=get_setting('FLOAT_DTYPE'))
+        np.multiply(data, 1.0 / 2 ** (8 * self.nbytes - 1), out=result[:len(data)],
+                    dtype=result.dtype)
+        self.pos += chunksize
+        return result
 
     def seek(self, pos):
         """
-        Reads a frame at time t. Note for coders: getting an arbitrary
-        frame in the video with ffmpeg can be painfully slow if some
-        decoding has to be done. This function tries to avoid fetching
-        arbitrary frames whenever possible, by moving between adjacent
-        frames.
+        Moves the pipe to the sample ``pos``. Note for coders: getting
+        an arbitrary sample with ffmpeg can be slow if some decoding has
+        to be done. Small jumps forward are made by reading and dropping
+        the samples in between, and ffmpeg is only restarted (at ``pos``)
+        to go backward or far forward.
+        """
+        if self.proc is None or pos < self.pos or pos > self.pos + self.buffersize:
+            # ffmpeg starts at a time given to the millisecond: at a
+            # sample whose time is a whole number of milliseconds, and a
+            # little before ``pos`` as the first samples decoded after a
+            # seek are not exact for some formats (e.g. mp3).
+            step = int(self.fps) // math.gcd(int(self.fps), 1000)
+            start = max(0, pos - int(self.fps) // 10) // step * step
+            self.initialize(1.0 * start / self.fps)
+        while self.pos < pos:
+            self.read_chunk(min(pos - self.pos, self.buffersize))
+
+    def read_samples(self, start, n):
+        """ Returns the samples ``start`` to ``start + n`` as an array of
+        shape ``(n, nchannels)`` of floats between -1 and 1 (zeros out of
+        the file).
+
+        The buffer keeps the samples read since ``start``, so reading the
+        file by consecutive chunks only reads the pipe, and reading again
+        the end of the last chunk costs nothing.
         """
-        if (pos < self.buffer_startframe) or (pos >= self.buffer_startframe + len(self.buffer)):
-            self.buffer_around(pos)
-        self.pos = pos
+        result = np.zeros((n, self.nchannels), dtype=self.buffer.dtype)
+        a, b = max(start, 0), min(start + n, self.nframes)
+        if b <= a:
+            return result
+        buffer_end = self.buffer_startframe + len(self.buffer)
+        if not (self.buffer_startframe <= a <= buffer_end == self.pos):
+            self.seek(a)
+            self.buffer = self.buffer[:0]
+            self.buffer_startframe = buffer_end = a
+        if b > buffer_end:
+            new = self.read_chunk(b - buffer_end)
+            kept = self.buffer[a - self.buffer_startframe:]
+            self.buffer = np.concatenate([kept, new]) if len(kept) else new
+            self.buffer_startframe = a
+        result[a - start:b - start] = self.buffer[a - self.buffer_startframe:
+                                                  b - self.buffer_startframe]
+        return result
+
+    def get_frame(self, tt):
+        """ Returns the sound at time ``tt`` (or at the times of the array
+        ``tt``), computed with ``read_samples``. """
+        if not isinstance(tt, np.ndarray):
+            return self.read_samples(int(round(self.fps * tt)), 1)[0]
+        # The np.round is important: the times of the samples given by
+        # i / fps must give back the samples i.
+        frames = np.round(self.fps * tt).astype(int)
+        if len(frames) == 0:
+            return np.zeros((0, self.nchannels), dtype=self.buffer.dtype)
+        low, high = frames.min(), frames.max() + 1
+        if high - low > 4 * len(frames) + self.buffersize:
+            # scattered times
+            return np.array([self.read_samples(i, 1)[0] for i in frames])
+        return self.read_samples(low, high - low)[frames - low]
 
     def buffer_around(self, framenumber):
         """
@@ -95,21 +163,12 @@ class FFMPEG_AudioReader:
         start = max(0, framenumber - self.buffersize // 2)
         if start + self.buffersize > self.nframes:
             start = max(0, self.nframes - self.buffersize)
-
-        if start != self.buffer_startframe:
-            self.initialize(1.0 * start / self.fps)
-            self.buffer_startframe = start
-            chunk = self.proc.stdout.read(self.nchannels * self.nbytes * self.buffersize)
-            self.buffer = np.frombuffer(chunk, dtype=f'int{self.nbytes*8}')
-            self.buffer = self.buffer.reshape((len(self.buffer) // self.nchannels, self.nchannels))
+        self.read_samples(start, self.buffersize)
 
     def close_proc(self):
         """ Closes the process. """
         if self.proc is not None:
-            self.proc.terminate()
-            self.proc.stdout.close()
-            self.proc.stderr.close()
-            self.proc.wait()
+            FFMPEG_PROCESSES.release(self.proc)
             self.proc = None
 
     def __del__(self):
@@ -0,0 +1,187 @@
+"""
+Measurement of the peak and loudness of audio clips, by chunks.
+
+``measure_audio`` reads the clip with ``iter_chunks`` and only keeps
+running statistics, so measuring a three hours soundtrack takes a few
+kilobytes of memory. The integrated loudness follows ITU-R BS.1770 /
+EBU R128: K-weighted mean square over 400ms blocks (every 100ms), gated
+at -70 LUFS and 10 LU below the mean. The K-weighting is applied in the
+frequency domain to each 100ms part, and the gating uses a histogram of
+the block loudnesses (0.01 LU bins) instead of the list of the blocks.
+
+The measurements are cached, keyed by what the clip plays: the files
+(``make_frame.file_source``) and the timelines of the compositions
+(``make_frame.timeline``) it is made of, or else its ``make_frame``.
+A clip normalized before an export is thus only measured once even if
+it is written several times, and opening the same file again does not
+measure it again.
+"""
+import os
+import weakref
+import numpy as np
+
+# Measurements of the clips with a key (see ``audio_graph_key``), and of
+# the other clips by make_frame.
+MEASUREMENTS = {}
+_MEASUREMENTS_BY_FUNCTION = weakref.WeakKeyDictionary()
+
+HISTOGRAM_MIN, HISTOGRAM_MAX, HISTOGRAM_STEP = -70.0, 10.0, 0.01
+
+def audio_graph_key(clip):
+    """ Returns a hashable key of what the audio clip plays, or None if
+    it is not made of files and compositions of files only. """
+    make_frame = getattr(clip, 'make_frame', None)
+    file_source = getattr(make_frame, 'file_source', None)
+    if file_source is not None:
+        filename, offset = file_source
+        stat = os.stat(filename)
+        return ('file', os.path.abspath(filename), stat.st_size,
+                stat.st_mtime_ns, offset, clip.duration)
+    timeline = getattr(make_frame, 'timeline', None)
+    if timeline is not None:
+        starts, clips = timeline
+        keys = tuple(audio_graph_key(c) for c in clips)
+        if None in keys:
+            return None
+        return ('timeline', tuple(float(s) for s in starts), keys, clip.duration)
+    return None
+
+def k_weighting(fps, n):
+    """ Squared gain of the K-weighting filter of BS.1770 (high shelf and
+    high pass biquads, designed for the given sample rate) at the
+    frequencies of ``np.fft.rfft`` of ``n`` samples. """
+    w = 2 * np.pi * np.arange(n // 2 + 1) / n
+    z = np.exp(-1j * w)
+    gain = np.ones(len(w))
+    for kind, G, Q, fc in [('shelf', 4.0, 1 / np.sqrt(2), 1500.0),
+                           ('pass', 0.0, 0.5, 38.0)]:
+        A = 10 ** (G / 40.0)
+        w0 = 2 * np.pi * fc / fps
+        alpha = np.sin(w0) / (2 * Q)
+        c = np.cos(w0)
+        if kind == 'shelf':
+            b = [A * ((A + 1) + (A - 1) * c + 2 * np.sqrt(A) * alpha),
+                 -2 * A * ((A - 1) + (A + 1) * c),
+                 A * ((A + 1) + (A - 1) * c - 2 * np.sqrt(A) * alpha)]
+            a = [(A + 1) - (A - 1) * c + 2 * np.sqrt(A) * alpha,
+                 2 * ((A - 1) - (A + 1) * c),
+                 (A + 1) - (A - 1) * c - 2 * np.sqrt(A) * alpha]
+        else:
+            b = [(1 + c) / 2, -(1 + c), (1 + c) / 2]
+            a = [1 + alpha, -2 * c, 1 - alpha]
+        response = (b[0] + b[1] * z + b[2] * z ** 2) / (a[0] + a[1] * z + a[2] * z ** 2)
+        gain *= np.abs(response) ** 2
+    return gain
+
+class LoudnessMeter:
+    """ Integrated loudness (LUFS) of a signal given by consecutive
+    chunks of samples, see the module's docstring. """
+
+    def __init__(self, fps, nchannels):
+        self.part = int(round(fps / 10.0))
+        self.weights = k_weighting(fps, self.part)
+        self.nchannels = nchannels
+        self.leftover = np.zeros((0, nchannels))
+        self.parts = []
+        nbins = int(round((HISTOGRAM_MAX - HISTOGRAM_MIN) / HISTOGRAM_STEP)) + 1
+        self.counts = np.zeros(nbins, dtype='int64')
+        self.energies = np.zeros(nbins)
+
+    def add(self, chunk):
+        """ Adds the next samples (array of shape (n, nchannels)). """
+        chunk = np.concatenate([self.leftover, chunk])
+        nparts = len(chunk) // self.part
+        self.leftover = chunk[nparts * self.part:]
+        if nparts == 0:
+            return
+        parts = chunk[:nparts * self.part].reshape((nparts, self.part, -1))
+        spectrum = np.abs(np.fft.rfft(parts, axis=1)) ** 2
+        # Parseval (the rfft only has half of the spectrum)
+        spectrum[:, 1:(self.part + 1) // 2] *= 2
+        energy = (spectrum * self.weights[None, :, None]).sum(axis=(1, 2))
+        energy /= self.part ** 2
+        parts = np.concatenate([self.parts, energy])
+        # blocks of 4 parts, moving by one part
+        blocks = np.convolve(parts, np.ones(4) / 4, 'valid')
+        self.parts = parts[len(parts) - 3:] if len(parts) >= 3 else parts
+        with np.errstate(divide='ignore'):
+            loudness = -0.691 + 10 * np.log10(blocks)
+        gated = loudness > HISTOGRAM_MIN
+        bins = np.clip(np.rint((loudness[gated] - HISTOGRAM_MIN) / HISTOGRAM_STEP),
+                       0, len(self.counts) - 1).astype(int)
+        np.add.at(self.counts, bins, 1)
+        np.add.at(self.energies, bins, blocks[gated])
+
+    def loudness(self):
+        """ Integrated loudness of the samples added, in LUFS (-inf for
+        silence). """
+        if self.counts.sum() == 0:
+            return -np.inf
+        mean = self.energies.sum() / self.counts.sum()
+        threshold = -0.691 + 10 * np.log10(mean) - 10
+        first = int(np.ceil((threshold - HISTOGRAM_MIN) / HISTOGRAM_STEP))
+        first = min(max(first, 0), len(self.counts) - 1)
+        count = self.counts[first:].sum()
+        if count == 0:
+            return -np.inf
+        return -0.691 + 10 * np.log10(self.energies[first:].sum() / count)
+
+def measure_audio(clip, loudness=False, fps=None, chunksize=None, logger=None):
+    """ Returns a dict with the ``'peak'`` (maximum of the absolute
+    value of each channel) and, if ``loudness`` is True, the
+    ``'loudness'`` (integrated, in LUFS) of the audio clip. The clip is
+    read by chunks, and the result is cached (see the module's docstring).
+
+    Parameters
+    -----------
+
+    loudness
+      If True, the integrated loudness is measured too.
+
+    fps
+      Sample rate of the measure, by default that of the clip (or 44100).
+
+    chunksize
+      Number of samples read at once, one second by default.
+
+    logger
+      Either 'bar' or None or any Proglog logger.
+
+    """
+    if fps is None:
+        fps = getattr(clip, 'fps', None) or 44100
+    key = audio_graph_key(clip)
+    if key is None:
+        key = (clip.duration,)
+        try:
+            cache = _MEASUREMENTS_BY_FUNCTION.setdefault(clip.make_frame, {})
+        except TypeError:
+            # make_frame cannot be weakly referenced
+            cache = {}
+    else:
+        cache = MEASUREMENTS
+    for measure_loudness in [True, loudness]:
+        if (key, fps, measure_loudness) in cache:
+            return cache[(key, fps, measure_loudness)]
+
+    peak = None
+    meter = None
+    for chunk in clip.iter_chunks(chunksize=chunksize or int(fps), fps=fps,
+                                  logger=logger):
+        chunk = np.asarray(chunk, dtype='float64')
+        if chunk.ndim == 1:
+            chunk = chunk[:, None]
+        elif chunk.shape[1] != clip.nchannels:
+            # make_frame of the form t -> [f1_t, f2_t]
+            chunk = chunk.T
+        chunk_peak = np.abs(chunk).max(axis=0)
+        peak = chunk_peak if peak is None else np.maximum(peak, chunk_peak)
+        if loudness:
+            if meter is None:
+                meter = LoudnessMeter(fps, chunk.shape[1])
+            meter.add(chunk)
+    result = {'peak': np.zeros(clip.nchannels) if peak is None else peak}
+    if loudness:
+        result['loudness'] = -np.inf if meter is None else meter.loudness()
+    cache[(key, fps, loudness)] = result
+    return result
@@ -0,0 +1,105 @@
+"""
+Parallel rendering of the sound of compositions.
+
+The clips of a ``CompositeAudioClip`` (its stems: music, voices, sound
+effects, often files read through ``volumex``, fades or ``audio_loop``)
+are independent. A ``StemRenderer`` computes the samples of the stems
+playing in each block in a pool of threads, and adds them in the order
+of the clips into one buffer, so the result is identical to the samples
+computed serially. Threads are enough: the files are decoded by the
+ffmpeg processes, and numpy releases the GIL in the array operations.
+
+While a stem is computed, ``current_stem()`` returns it, and the
+``AudioFileClip``s read by the stem give their samples (with
+``get_samples``, or ``get_frame`` after ``fl_time`` for instance) from
+readers of the stem (``Stem.readers``) instead of their own reader. Two
+stems playing the same file at different times (or in different threads)
+thus never share, nor keep seeking, the same ffmpeg process. The readers
+of the stems are closed with the renderer.
+
+>>> mix = CompositeAudioClip([music, voice.set_start(2), jingle.set_start(30)])
+>>> mix.write_audiofile("mix.wav", threads=4)
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from moviepy.config import get_setting
+
+_CURRENT = threading.local()
+
+def current_stem():
+    """ Returns the ``Stem`` computed in the current thread, or None. """
+    return getattr(_CURRENT, 'stem', None)
+
+class Stem:
+    """ A clip of a composition, with the readers of the files it plays
+    (a dict ``clip -> reader``, filled by the clips themselves). """
+
+    def __init__(self, clip):
+        self.clip = clip
+        self.readers = {}
+
+    def get_samples(self, start, n, fps):
+        """ Samples of the clip, computed with the readers of the stem. """
+        previous, _CURRENT.stem = current_stem(), self
+        try:
+            return self.clip.get_samples(start, n, fps)
+        finally:
+            _CURRENT.stem = previous
+
+    def close(self):
+        """ Closes the readers of the stem. """
+        for reader in self.readers.values():
+            reader.close_proc()
+        self.readers = {}
+
+class StemRenderer:
+    """ Computes the samples of a ``CompositeAudioClip`` with its clips
+    evaluated in parallel. See the module's docstring.
+
+    Parameters
+    -----------
+
+    clip
+      A ``CompositeAudioClip``.
+
+    threads
+      Number of threads, by default as many as ``concurrent.futures``
+      decides.
+
+    """
+
+    def __init__(self, clip, threads=None):
+        self.clip = clip
+        self.stems = [Stem(c) for c in clip.clips]
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+
+    def get_samples(self, start, n, fps, out=None):
+        """ Returns the samples ``start`` to ``start + n`` of the clip at
+        ``fps`` samples per second, computed in ``out`` (an array of
+        shape ``(n, nchannels)``) if provided. """
+        if out is None:
+            out = np.empty((n, self.clip.nchannels), dtype=get_setting('FLOAT_DTYPE'))
+        out[:] = 0
+        firsts, lasts = self.clip.sample_bounds(fps)
+        a, b = np.maximum(firsts, start), np.minimum(lasts, start + n)
+        playing = np.nonzero(b > a)[0]
+        futures = [self.executor.submit(self.stems[i].get_samples,
+                                        a[i] - firsts[i], b[i] - a[i], fps)
+                   for i in playing]
+        # added in the order of the clips, like ``CompositeAudioClip``
+        for i, future in zip(playing, futures):
+            out[a[i] - start:b[i] - start] += future.result()
+        return out
+
+    def close(self):
+        """ Stops the threads and closes the readers of the stems. """
+        self.executor.shutdown()
+        for stem in self.stems:
+            stem.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
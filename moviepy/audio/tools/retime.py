@@ -0,0 +1,369 @@
+"""
+Retiming of audio clips, used by ``speedx`` on audio.
+
+Playing the sound of a clip ``factor`` times faster by evaluating it at
+times ``factor * t`` picks scattered samples of the source (which aliases
+when speeding up), and a file reader must then move its buffer around.
+``retime_audio`` instead streams the source: the samples of the new clip
+are computed block after block by an ``AudioRetimer``, which reads the
+source forward by consecutive blocks.
+
+- ``SampleRetimer`` (the default) plays the source faster or slower,
+  changing the pitch like a tape. Each output sample is the source sample
+  at its position, as when evaluating the clip at ``factor * t``: this is
+  exact for integer factors on band-limited sounds, and costs little more
+  than reading the source, but aliases the frequencies above the Nyquist
+  frequency of the output when speeding up.
+- ``PolyphaseResampler`` (``filtered=True``) does the same with a
+  windowed-sinc interpolation of the source, low-passed when speeding up.
+  For simple factors (2, 1.5, 0.75...) the output samples of each phase
+  are computed with strided views of the source, otherwise the sinc
+  filter is tabulated for 512 fractional positions. It is several times
+  slower than ``SampleRetimer``.
+- ``WSOLAStretcher`` changes the speed but keeps the pitch (Waveform
+  Similarity Overlap-Add): frames of the source are overlap-added at a
+  fixed hop, each frame being taken near its nominal position where it
+  best continues the previous one.
+
+The samples are read sequentially by ``iter_chunks`` (and so by the
+writers). Other reads restart the computation from the requested sample,
+like the video readers do.
+"""
+from fractions import Fraction
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+class AudioRetimer:
+    """ Computes the samples of ``clip`` played ``factor`` times faster,
+    at ``fps`` samples per second, by blocks. Subclasses implement
+    ``seek`` and ``next_block``.
+
+    Parameters
+    -----------
+
+    clip
+      The source audio clip. Must have a duration.
+
+    factor
+      Speed factor: the output sample ``n`` plays the source around time
+      ``factor * n / fps``.
+
+    fps
+      Sample rate of the output. The source is read at its own ``fps``
+      (or at this one if the clip has none).
+
+    blocksize
+      Approximative number of output samples computed at once.
+
+    """
+
+    def __init__(self, clip, factor, fps, blocksize=None):
+        self.clip = clip
+        self.factor = factor
+        self.fps = fps
+        self.source_fps = getattr(clip, 'fps', None) or fps
+        self.nchannels = clip.nchannels
+        self.nsamples = int(clip.duration / factor * fps)
+        self.source_nsamples = int(clip.duration * self.source_fps)
+        self.blocksize = blocksize or int(fps)
+        self.source = np.zeros((0, self.nchannels), dtype='float32')
+        self.source_start = 0
+        self.buffer = np.zeros((0, self.nchannels), dtype='float32')
+        self.buffer_start = 0
+        self.seek(0)
+
+    def source_samples(self, start, end):
+        """ Returns the source samples ``start`` to ``end`` (zeros out of
+        the source). The samples before ``start`` are forgotten, so the
+        source must be read forward. """
+        source_end = self.source_start + len(self.source)
+        if start < self.source_start or start > source_end:
+            self.source = self.source[:0]
+            self.source_start = source_end = start
+        else:
+            self.source = self.source[start - self.source_start:]
+            self.source_start = start
+        if end > source_end:
+            new = np.zeros((end - source_end, self.nchannels), dtype='float32')
+            a = max(source_end, 0)
+            b = min(end, self.source_nsamples)
+            if b > a:
+                new[a - source_end:b - source_end] = self.clip.get_samples(
+                    a, b - a, self.source_fps)
+            self.source = np.concatenate([self.source, new])
+        return self.source[:end - start]
+
+    def seek(self, pos):
+        """ Restarts the computation so that ``next_block`` returns output
+        samples from ``pos`` (or a little before). Sets ``self.pos``. """
+        raise NotImplementedError
+
+    def next_block(self):
+        """ Returns the next output samples, from ``self.pos``, and moves
+        ``self.pos`` after them. """
+        raise NotImplementedError
+
+    def read(self, start, n):
+        """ Returns the output samples ``start`` to ``start + n`` (zeros
+        out of the clip), as a float32 array of shape ``(n, nchannels)``. """
+        result = np.zeros((n, self.nchannels), dtype='float32')
+        a, b = max(start, 0), min(start + n, self.nsamples)
+        if b <= a:
+            return result
+        buffer_end = self.buffer_start + len(self.buffer)
+        if a < self.buffer_start or a > buffer_end + self.blocksize:
+            self.seek(a)
+            self.buffer = self.buffer[:0]
+            self.buffer_start = buffer_end = self.pos
+        blocks = [self.buffer]
+        while buffer_end < b:
+            block = self.next_block()
+            blocks.append(block)
+            buffer_end += len(block)
+        buffer = np.concatenate(blocks) if len(blocks) > 1 else blocks[0]
+        self.buffer = buffer[a - self.buffer_start:]
+        self.buffer_start = a
+        result[a - start:b - start] = self.buffer[:b - a]
+        return result
+
+class SampleRetimer(AudioRetimer):
+    """ Plays the source faster (or slower) by taking, for each output
+    sample, the source sample at its position, without filtering. See
+    ``AudioRetimer`` for the parameters. """
+
+    def __init__(self, clip, factor, fps, blocksize=None):
+        self.ratio = factor * (getattr(clip, 'fps', None) or fps) / fps
+        # positions computed exactly for simple factors (2, 1.5, 0.75...)
+        self.fraction = Fraction(self.ratio).limit_denominator(64)
+        if abs(float(self.fraction) - self.ratio) > 1e-9:
+            self.fraction = None
+        AudioRetimer.__init__(self, clip, factor, fps, blocksize)
+
+    def seek(self, pos):
+        self.pos = pos
+
+    def next_block(self):
+        n = np.arange(self.pos, self.pos + self.blocksize)
+        if self.fraction is not None:
+            index = n * self.fraction.numerator // self.fraction.denominator
+        else:
+            index = np.floor(n * self.ratio + 1e-6).astype(int)
+        source = self.source_samples(index[0], index[-1] + 1)
+        self.pos += self.blocksize
+        return source[index - index[0]]
+
+class PolyphaseResampler(AudioRetimer):
+    """ Plays the source faster (or slower) by resampling it, which also
+    changes the pitch. See ``AudioRetimer`` for the parameters.
+
+    zero_crossings
+      Half-length of the interpolation filter, in zero crossings of the
+      sinc. Longer filters have a sharper cutoff.
+
+    """
+
+    phases = 512
+
+    def __init__(self, clip, factor, fps, blocksize=None, zero_crossings=10):
+        ratio = factor * (getattr(clip, 'fps', None) or fps) / fps
+        self.ratio = ratio
+        # low-pass at the Nyquist frequency of the output, with a margin
+        self.cutoff = 0.95 * min(1.0, 1.0 / ratio)
+        self.half = int(np.ceil(zero_crossings / self.cutoff))
+        fraction = Fraction(ratio).limit_denominator(64)
+        if abs(float(fraction) - ratio) < 1e-9:
+            # output sample q * L + p is at source position
+            # q * up + (p * up) / L, so there are L phases
+            self.up, self.L = fraction.numerator, fraction.denominator
+            p = np.arange(self.L)
+            self.offsets = p * self.up // self.L
+            self.table = self.filters((p * self.up % self.L) / self.L)
+        else:
+            self.up = self.L = None
+            self.table = self.filters(np.arange(self.phases + 1) / self.phases)
+        AudioRetimer.__init__(self, clip, factor, fps, blocksize)
+        if self.L is not None:
+            self.blocksize = max(1, self.blocksize // self.L) * self.L
+
+    def filters(self, fracs):
+        """ Filters (one line per fraction) giving the sample at source
+        position ``i + frac`` from the source samples ``i - half + 1`` to
+        ``i + half``. """
+        d = (np.arange(2 * self.half) - self.half + 1)[None, :] - fracs[:, None]
+        x = np.clip(d / self.half, -1, 1)
+        window = np.i0(8.0 * np.sqrt(1 - x ** 2)) / np.i0(8.0)
+        h = np.sinc(self.cutoff * d) * window
+        return (h / h.sum(axis=1, keepdims=True)).astype('float32')
+
+    def seek(self, pos):
+        if self.L is not None:
+            pos -= pos % self.L
+        self.pos = pos
+
+    def next_block(self):
+        n0, n = self.pos, self.blocksize
+        taps = 2 * self.half
+        if self.L is not None:
+            start = n0 // self.L * self.up - self.half + 1
+            end = (n0 + n) // self.L * self.up + self.half + self.up
+            windows = sliding_window_view(self.source_samples(start, end), taps, axis=0)
+            result = np.empty((n, self.nchannels), dtype='float32')
+            count = n // self.L
+            for p in range(self.L):
+                phase_windows = windows[self.offsets[p]::self.up][:count]
+                result[p::self.L] = phase_windows @ self.table[p]
+        else:
+            positions = np.arange(n0, n0 + n) * self.ratio
+            index = np.floor(positions).astype(int)
+            phase = np.rint((positions - index) * self.phases).astype(int)
+            start = index[0] - self.half + 1
+            source = self.source_samples(start, index[-1] + self.half + 2)
+            windows = sliding_window_view(source, taps, axis=0)
+            result = np.matmul(windows[index - index[0]],
+                               self.table[phase][:, :, None])[:, :, 0]
+        self.pos += n
+        return result
+
+class WSOLAStretcher(AudioRetimer):
+    """ Plays the source faster (or slower) while keeping the pitch, by
+    Waveform Similarity Overlap-Add. See ``AudioRetimer`` for the
+    parameters, ``fps`` must be the sample rate of the source.
+
+    frame_duration
+      Duration of the overlap-added frames, in seconds. The frames are
+      added every ``frame_duration / 2``.
+
+    tolerance
+      Maximal shift of a frame from its nominal position in the source,
+      in seconds.
+
+    """
+
+    def __init__(self, clip, factor, fps, blocksize=None, frame_duration=0.04,
+                 tolerance=0.01):
+        if getattr(clip, 'fps', None) not in (None, fps):
+            raise ValueError("WSOLAStretcher cannot change the sample rate.")
+        self.hop = int(frame_duration * fps) // 2
+        self.frame_size = 2 * self.hop
+        self.tolerance = int(tolerance * fps)
+        # the similarity is first searched on a decimated mono signal
+        self.decimation = max(1, int(fps) // 5500)
+        n = np.arange(self.frame_size)
+        self.window = (0.5 - 0.5 * np.cos(2 * np.pi * n / self.frame_size)).astype('float32')
+        AudioRetimer.__init__(self, clip, factor, fps, blocksize)
+        self.blocksize = max(1, self.blocksize // self.hop) * self.hop
+
+    def nominal(self, m):
+        """ Nominal position in the source of the output frame ``m``. """
+        return int(round(m * self.hop * self.factor))
+
+    def seek(self, pos):
+        self.frame = pos // self.hop
+        self.pos = self.frame * self.hop
+        # (the frame before the first one is taken so that the first
+        # frame is at its nominal position)
+        self.previous = self.nominal(self.frame) - self.hop
+
+    def search(self, mono, coarse, origin, natural, nominal):
+        """ Position near ``nominal`` where the source best continues the
+        source from ``natural``. """
+        D, tol, size = self.decimation, self.tolerance, self.frame_size
+        low, high = max(nominal - tol, 0), nominal + tol
+        # coarse search, then refinement around the best coarse position
+        t0, c0 = (natural - origin) // D, (low - origin) // D
+        template = coarse[t0:t0 + size // D]
+        region = coarse[c0:(high - origin + size) // D]
+        if len(region) < len(template):
+            return nominal
+        shift = int(np.argmax(np.correlate(region, template, 'valid')))
+        best = natural + D * (c0 + shift - t0)
+        low, high = max(best - 2 * D, low), min(best + 2 * D, high)
+        template = mono[natural - origin:natural - origin + size]
+        region = mono[low - origin:high - origin + size]
+        return low + int(np.argmax(np.correlate(region, template, 'valid')))
+
+    def next_block(self):
+        nframes = self.blocksize // self.hop
+        m0 = self.frame
+        size, hop, tol = self.frame_size, self.hop, self.tolerance
+        start = min(self.previous, self.nominal(m0)) - tol - self.decimation
+        end = max(self.previous + hop, self.nominal(m0 + nframes)) + tol + size + hop
+        source = self.source_samples(start, end)
+        mono = source.mean(axis=1)
+        D = self.decimation
+        coarse = mono[:len(mono) // D * D].reshape((-1, D)).mean(axis=1)
+        positions = [self.previous]
+        previous = self.previous
+        for m in range(m0, m0 + nframes):
+            previous = self.search(mono, coarse, start, previous + hop,
+                                   self.nominal(m))
+            positions.append(previous)
+        positions = np.array(positions) - start
+        # output samples of frame m come from the second half of frame
+        # m - 1 and the first half of frame m
+        n = np.arange(hop)
+        tail = source[positions[:-1, None] + hop + n]
+        head = source[positions[1:, None] + n]
+        result = (tail * self.window[hop:, None] + head * self.window[:hop, None])
+        self.previous = previous
+        self.frame += nframes
+        self.pos += nframes * hop
+        return result.reshape((-1, self.nchannels))
+
+def retime_audio(clip, factor, preserve_pitch=False, fps=None,
+                 filtered=False, **kwargs):
+    """ Returns the audio clip played ``factor`` times faster, computed
+    by a ``SampleRetimer`` (a ``PolyphaseResampler`` if ``filtered`` is
+    True, a ``WSOLAStretcher`` if ``preserve_pitch`` is True). See the
+    module's docstring.
+
+    Parameters
+    -----------
+
+    factor
+      Speed factor (2 for twice faster).
+
+    preserve_pitch
+      If True, the speed changes but not the pitch.
+
+    fps
+      Sample rate of the new clip, by default that of the clip (or 44100).
+
+    filtered
+      If True, the source is interpolated and low-passed instead of
+      sampled, which avoids aliasing when speeding up but is slower.
+
+    kwargs
+      Parameters of the retimer, e.g. ``frame_duration``.
+
+    """
+    source_fps = getattr(clip, 'fps', None)
+    if fps is None:
+        fps = source_fps or 44100
+    if preserve_pitch and source_fps not in (None, fps):
+        stretched = retime_audio(clip, factor, preserve_pitch=True, **kwargs)
+        return retime_audio(stretched, 1, fps=fps, filtered=filtered)
+    if preserve_pitch:
+        retimer_class = WSOLAStretcher
+    else:
+        retimer_class = PolyphaseResampler if filtered else SampleRetimer
+    retimer = retimer_class(clip, factor, fps, **kwargs)
+
+    def make_frame(gf, t):
+        if not isinstance(t, np.ndarray):
+            return retimer.read(int(round(fps * t)), 1)[0]
+        index = np.rint(fps * t).astype(int)
+        low, high = index.min(), index.max() + 1
+        if high - low > 4 * len(index) + fps:
+            # scattered times, e.g. a preview of a few samples
+            return np.array([retimer.read(i, 1)[0] for i in index])
+        return retimer.read(low, high - low)[index - low]
+
+    new_clip = clip.fl(make_frame, keep_duration=True)
+    new_clip.make_frame.profile_of = lambda t: factor * t
+    new_clip.make_frame.samples = lambda start, n, f: (
+        retimer.read(start, n) if f == fps else None)
+    new_clip.fps = fps
+    new_clip.duration = clip.duration / factor
+    new_clip.end = new_clip.start + new_clip.duration
+    return new_clip
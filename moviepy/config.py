@@ -1,12 +1,33 @@
 import os
 import subprocess as sp
 from .compat import DEVNULL
-from .config_defaults import FFMPEG_BINARY, IMAGEMAGICK_BINARY
+from .config_defaults import FFMPEG_BINARY, FLOAT_DTYPE, IMAGEMAGICK_BINARY
 if os.name == 'nt':
     try:
         import winreg as wr
     except ImportError:
         import _winreg as wr
+# Results of ``try_cmd``, so that each binary is only probed once.
+_TRY_CMD_RESULTS = {}
+
+def try_cmd(cmd):
+    """ Runs the command ``cmd`` (a list of arguments) to check that it
+    exists. Returns ``(True, None)`` on success and ``(False, error)``
+    otherwise. The results are cached. """
+    key = tuple(cmd)
+    if key not in _TRY_CMD_RESULTS:
+        popen_params = {"stdout": sp.PIPE, "stderr": sp.PIPE, "stdin": DEVNULL}
+        if os.name == "nt":
+            popen_params["creationflags"] = 0x08000000
+        try:
+            proc = sp.Popen(cmd, **popen_params)
+            proc.communicate()
+        except Exception as err:
+            _TRY_CMD_RESULTS[key] = (False, err)
+        else:
+            _TRY_CMD_RESULTS[key] = (True, None)
+    return _TRY_CMD_RESULTS[key]
+
 if FFMPEG_BINARY == 'ffmpeg-imageio':
     from imageio.plugins.ffmpeg import get_exe
     FFMPEG_BINARY = get_exe()
@@ -48,12 +69,14 @@ def get_setting(varname):
         return FFMPEG_BINARY
     elif varname == 'IMAGEMAGICK_BINARY':
         return IMAGEMAGICK_BINARY
+    elif varname == 'FLOAT_DTYPE':
+        return FLOAT_DTYPE
     else:
         raise ValueError(f"Unknown configuration variable: {varname}")
 
 def change_settings(new_settings=None, filename=None):
     """ Changes the value of configuration variables."""
-    global FFMPEG_BINARY, IMAGEMAGICK_BINARY
+    global FFMPEG_BINARY, IMAGEMAGICK_BINARY, FLOAT_DTYPE
 
     if new_settings is not None:
         for key, value in new_settings.items():
@@ -61,6 +84,8 @@ def change_settings(new_settings=None, filename=None):
                 FFMPEG_BINARY = value
             elif key == 'IMAGEMAGICK_BINARY':
                 IMAGEMAGICK_BINARY = value
+            elif key == 'FLOAT_DTYPE':
+                FLOAT_DTYPE = value
             else:
                 raise ValueError(f"Unknown configuration variable: {key}")
 
@@ -69,6 +94,7 @@ def change_settings(new_settings=None, filename=None):
         with open(filename, 'w') as f:
             f.write(f"FFMPEG_BINARY = '{FFMPEG_BINARY}'\n")
             f.write(f"IMAGEMAGICK_BINARY = '{IMAGEMAGICK_BINARY}'\n")
+            f.write(f"FLOAT_DTYPE = '{FLOAT_DTYPE}'\n")
 if __name__ == '__main__':
     if try_cmd([FFMPEG_BINARY])[0]:
         print('MoviePy : ffmpeg successfully found.')
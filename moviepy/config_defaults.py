@@ -46,7 +46,15 @@ IMAGEMAGICK_BINARY
 
     IMAGEMAGICK_BINARY = r"C:\\Program Files\\ImageMagick-6.8.8-Q16\\magick.exe"
 
+
+FLOAT_DTYPE
+    Numpy dtype of the masks and of the intermediate computations on
+    frames (blending, fades, compositing). RGB frames are uint8. The
+    default 'float32' halves the memory traffic compared to 'float64',
+    which can be set back for maximal precision.
+
 """
 import os
 FFMPEG_BINARY = os.getenv('FFMPEG_BINARY', 'ffmpeg-imageio')
-IMAGEMAGICK_BINARY = os.getenv('IMAGEMAGICK_BINARY', 'auto-detect')
\ No newline at end of file
+IMAGEMAGICK_BINARY = os.getenv('IMAGEMAGICK_BINARY', 'auto-detect')
+FLOAT_DTYPE = os.getenv('FLOAT_DTYPE', 'float32')
@@ -23,7 +23,7 @@ def apply_to_mask(f, clip, *a, **k):
     """ This decorator will apply the same function f to the mask of
         the clip created with f """
     new_clip = f(clip, *a, **k)
-    if clip.mask is not None:
+    if getattr(clip, 'mask', None) is not None:
         new_clip.mask = f(clip.mask, *a, **k)
     return new_clip
 
@@ -83,6 +83,17 @@ def add_mask_if_none(f, clip, *a, **k):
 @decorator.decorator
 def use_clip_fps_by_default(f, clip, *a, **k):
     """ Will use clip.fps if no fps=... is provided in **k """
-    if 'fps' not in k and hasattr(clip, 'fps') and clip.fps is not None:
-        k['fps'] = clip.fps
-    return f(clip, *a, **k)
+    def fun(fps):
+        if fps is not None:
+            return fps
+        elif getattr(clip, 'fps', None):
+            return clip.fps
+        raise AttributeError("No 'fps' (frames per second) attribute specified"
+                " for function %s and the clip has no 'fps' attribute. Either"
+                " provide e.g. fps=24 in the arguments of the function, or define"
+                " the clip's fps with `clip.fps=24`" % f.__name__)
+
+    names = f.__code__.co_varnames[1:]
+    new_a = [fun(arg) if name == 'fps' else arg for (arg, name) in zip(a, names)]
+    new_kw = {k: fun(v) if k == 'fps' else v for (k, v) in k.items()}
+    return f(clip, *new_a, **new_kw)
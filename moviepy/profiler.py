@@ -0,0 +1,198 @@
+"""
+Profiling of the rendering of clips.
+
+A clip is a graph of clips (effects, compositions, subclips...) whose
+frames are computed by calling the ``get_frame`` of the clips they are
+made of. While a ``RenderProfiler`` is active, every call to
+``get_frame`` is timed and attributed to a node of a tree whose branches
+are the chains of clips being rendered. Each node is labelled by the
+effect (or method) which created the clip, for instance ``resize``,
+``Clip.subclip`` or ``colorx``, or by the class of the clip for the
+leaves of the graph (``VideoFileClip``, ``ColorClip``...). The time
+spent by the leaves reading files is the decoding time, the time spent
+by a ``CompositeVideoClip`` itself is the time of the blits.
+
+>>> from moviepy.profiler import RenderProfiler
+>>> with RenderProfiler() as profiler:
+...     clip.write_videofile("result.mp4")
+>>> print(profiler.report())
+>>> profiler.to_json("profile.json")
+>>> profiler.to_stacks("profile.folded")  # for flamegraph.pl, speedscope...
+
+For each node, the profile gives the number of calls, the cumulated
+time (including the time spent in its children), the self time, and the
+number of bytes of the new frames returned by the node.
+
+The profiler is meant for single-threaded rendering: only the calls made
+by the thread which entered the profiler are recorded (not, for instance,
+the audio computed by the thread of ``ffmpeg_write_video(stream_audio=True)``).
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+# Profilers currently recording, see ``Clip.get_frame``
+ACTIVE_PROFILERS = []
+
+def clip_label(clip):
+    """ Returns the name of the effect which made ``clip``, or the name
+    of its class. Masks are labelled with a ``(mask)`` suffix. """
+    func = getattr(clip.make_frame, 'profile_of', None)
+    if func is None:
+        label = type(clip).__name__
+    else:
+        label = getattr(func, '__qualname__', type(func).__name__)
+        label = label.split('.<locals>')[0]
+    if getattr(clip, 'ismask', False):
+        label += ' (mask)'
+    return label
+
+@contextmanager
+def profile_section(label):
+    """ Times a block of code as a node named ``label`` of the active
+    profiler, if any. Used for the parts of a render which are not clips
+    (writing frames to ffmpeg for instance). """
+    if not ACTIVE_PROFILERS:
+        yield
+        return
+    profiler = ACTIVE_PROFILERS[-1]
+    profiler.push(label)
+    try:
+        yield
+    finally:
+        profiler.pop()
+
+class ProfileNode:
+    """ Timings of one node of the tree of a ``RenderProfiler``. """
+
+    def __init__(self, label):
+        self.label = label
+        self.children = dict()
+        self.calls = 0
+        self.total_time = 0.0
+        self.self_time = 0.0
+        self.nbytes = 0
+
+    def child(self, label):
+        """ Returns the child node with the given label (created if
+        needed). """
+        if label not in self.children:
+            self.children[label] = ProfileNode(label)
+        return self.children[label]
+
+    def to_dict(self):
+        return {'label': self.label, 'calls': self.calls,
+                'total_time': self.total_time, 'self_time': self.self_time,
+                'nbytes': self.nbytes,
+                'children': [c.to_dict() for c in self.children.values()]}
+
+    def iter_nodes(self, stack=()):
+        """ Yields ``(stack, node)`` for this node and all its descendants,
+        where ``stack`` is the tuple of the labels from the root. """
+        stack = stack + (self.label,)
+        yield stack, self
+        for child in self.children.values():
+            for item in child.iter_nodes(stack):
+                yield item
+
+class RenderProfiler:
+    """ Context manager recording where the time of a render goes. See
+    the module's docstring. """
+
+    def __init__(self):
+        self.root = ProfileNode('render')
+        self._stack = [(self.root, 0.0, 0.0)]
+        self._last_frame = None
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.get_ident()
+        ACTIVE_PROFILERS.append(self)
+        self._stack = [(self.root, time.perf_counter(), 0.0)]
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        ACTIVE_PROFILERS.remove(self)
+        self.pop()
+        self._last_frame = None
+
+    def push(self, label):
+        """ Starts timing a call of the node ``label``, child of the node
+        currently timed. """
+        node = self._stack[-1][0].child(label)
+        self._stack.append((node, time.perf_counter(), 0.0))
+        return node
+
+    def pop(self):
+        """ Stops timing the current call and returns its node. """
+        node, start, children_time = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        node.calls += 1
+        node.total_time += elapsed
+        node.self_time += elapsed - children_time
+        if self._stack:
+            parent, parent_start, parent_children_time = self._stack[-1]
+            self._stack[-1] = (parent, parent_start, parent_children_time + elapsed)
+        return node
+
+    def wrap(self, clip, make_frame):
+        """ Returns a version of ``make_frame`` (the frame function of
+        ``clip``) whose calls are recorded. """
+        if threading.get_ident() != self._thread:
+            return make_frame
+        label = clip_label(clip)
+
+        def profiled_make_frame(t):
+            self.push(label)
+            try:
+                frame = make_frame(t)
+            finally:
+                node = self.pop()
+            # Frames passed through unchanged, or views, allocate nothing.
+            if (isinstance(frame, np.ndarray) and frame.flags.owndata
+                    and frame is not self._last_frame):
+                node.nbytes += frame.nbytes
+            self._last_frame = frame
+            return frame
+        return profiled_make_frame
+
+    def report(self, min_fraction=0.0):
+        """ Returns the profile as a text table, one line per node,
+        indented as the tree. Nodes whose cumulated time is less than
+        ``min_fraction`` of the total are omitted. """
+        total = self.root.total_time or 1.0
+        lines = ['%-50s %10s %10s %8s %10s' % ('node', 'total (s)', 'self (s)',
+                                              'calls', 'MB')]
+        for stack, node in self.root.iter_nodes():
+            if node.total_time < min_fraction * total:
+                continue
+            label = '  ' * (len(stack) - 1) + node.label
+            lines.append('%-50s %10.3f %10.3f %8d %10.1f' % (
+                label, node.total_time, node.self_time, node.calls,
+                node.nbytes / 1e6))
+        return '\n'.join(lines)
+
+    def to_json(self, filename=None):
+        """ Returns the profile tree as a JSON string, also written to
+        ``filename`` if provided. """
+        result = json.dumps(self.root.to_dict(), indent=1)
+        if filename is not None:
+            with open(filename, 'w') as f:
+                f.write(result)
+        return result
+
+    def to_stacks(self, filename=None):
+        """ Returns the profile in the "folded stacks" format of the
+        flamegraph tools (one ``label1;label2;label3 microseconds`` line
+        per node, with the self time of the node), also written to
+        ``filename`` if provided. """
+        lines = ['%s %d' % (';'.join(stack), int(round(1e6 * node.self_time)))
+                 for stack, node in self.root.iter_nodes()]
+        result = '\n'.join(lines) + '\n'
+        if filename is not None:
+            with open(filename, 'w') as f:
+                f.write(result)
+        return result
@@ -1,8 +1,6 @@
 """
 Misc. useful functions that can be used at many places in the program.
 """
-import os
-import subprocess as sp
 import sys
 import warnings
 import proglog
@@ -19,25 +17,26 @@ def verbose_print(verbose, s):
         sys_write_flush(s)
 
 def subprocess_call(cmd, logger='bar', errorprint=True):
-    """ Executes the given subprocess command.
+    """ Executes the given subprocess command (a list of arguments or a
+    ``FFMPEG_Command``), through ``FFMPEG_PROCESSES`` (see
+    ``moviepy.video.io.ffmpeg_process``).
     
     Set logger to None or a custom Proglog logger to avoid printings.
     """
-    if logger == 'bar':
-        logger = proglog.default_bar_logger('Moviepy')
-    
-    try:
-        proc = sp.Popen(cmd, shell=True, stdout=DEVNULL, stderr=sp.PIPE)
-        out, err = proc.communicate()
-        
-        if proc.returncode:
-            if errorprint:
-                logger.error(err.decode('utf8'))
-            raise IOError(err.decode('utf8'))
-    except Exception as e:
+    from moviepy.video.io.ffmpeg_process import FFMPEG_PROCESSES, FFMPEG_Command
+    if isinstance(cmd, FFMPEG_Command):
+        cmd = cmd.args()
+    logger = proglog.default_bar_logger(logger)
+    logger(message='Moviepy - Running:\n>>> ' + " ".join(cmd))
+
+    returncode, out, err = FFMPEG_PROCESSES.run(cmd, stdout=DEVNULL)
+
+    if returncode:
         if errorprint:
-            logger.error(str(e))
-        raise IOError(str(e))
+            logger(message='Moviepy - Command returned an error')
+        raise IOError(err.decode('utf8'))
+    else:
+        logger(message='Moviepy - Command successful')
 
 def is_string(obj):
     """ Returns true if s is string or string-like object,
@@ -70,37 +69,25 @@ def cvsecs(time):
     >>> cvsecs('33.5')      # only secs
     33.5
     """
-    if isinstance(time, (int, float)):
-        return time
+    factors = (1, 60, 3600)
+    
+    if is_string(time):     
+        time = [float(f.replace(',', '.')) for f in time.split(':')]
 
-    if isinstance(time, tuple):
-        if len(time) == 2:
-            return time[0] * 60 + time[1]
-        elif len(time) == 3:
-            return time[0] * 3600 + time[1] * 60 + time[2]
+    if not isinstance(time, (tuple, list)):
+        return time
 
-    if isinstance(time, str):
-        time = time.replace(',', '.')
-        if ':' not in time:
-            return float(time)
-        
-        parts = time.split(':')
-        parts = [float(part) for part in parts]
-        
-        if len(parts) == 2:
-            return parts[0] * 60 + parts[1]
-        elif len(parts) == 3:
-            return parts[0] * 3600 + parts[1] * 60 + parts[2]
+    return sum(mult * part for mult, part in zip(factors, reversed(time)))
 
-    return time
 
+def deprecated_version_of(f, oldname, newname=None):
+    """ Indicates that a function is deprecated and has a new name.
 
-    f_deprecated
-      A function that does the same thing as f, but with a docstring
-      and a printed message on call which say that the function is
-      deprecated and that you should use f instead.
+    `f` is the new function, `oldname` the name of the deprecated
+    function, `newname` the name of `f`, which can be automatically
+    found.
 
-    Examples
+    Returns
     ========
 
     f_deprecated
@@ -118,7 +105,53 @@ def cvsecs(time):
     >>>
     >>> Clip.to_file = deprecated_version_of(Clip.write_file, 'to_file')
     """
-    pass
-extensions_dict = {'mp4': {'type': 'video', 'codec': ['libx264', 'libmpeg4', 'aac']}, 'ogv': {'type': 'video', 'codec': ['libtheora']}, 'webm': {'type': 'video', 'codec': ['libvpx']}, 'avi': {'type': 'video'}, 'mov': {'type': 'video'}, 'ogg': {'type': 'audio', 'codec': ['libvorbis']}, 'mp3': {'type': 'audio', 'codec': ['libmp3lame']}, 'wav': {'type': 'audio', 'codec': ['pcm_s16le', 'pcm_s24le', 'pcm_s32le']}, 'm4a': {'type': 'audio', 'codec': ['libfdk_aac']}}
-for ext in ['jpg', 'jpeg', 'png', 'bmp', 'tiff']:
-    extensions_dict[ext] = {'type': 'image'}
+
+    if newname is None: newname = f.__name__
+
+    warning= ("The function ``%s`` is deprecated and is kept temporarily "
+              "for backwards compatibility.\nPlease use the new name, "
+              "``%s``, instead.")%(oldname, newname)
+
+    def fdepr(*a, **kw):
+        warnings.warn("MoviePy: " + warning, PendingDeprecationWarning)
+        return f(*a, **kw)
+    fdepr.__doc__ = warning
+
+    return fdepr
+
+
+# non-exhaustive dictionnary to store default informations.
+# any addition is most welcome.
+# Note that 'gif' is complicated to place. From a VideoFileClip point of view,
+# it is a video, but from a HTML5 point of view, it is an image.
+
+extensions_dict = { "mp4":  {'type':'video', 'codec':['libx264','libmpeg4', 'aac']},
+                    'ogv':  {'type':'video', 'codec':['libtheora']},
+                    'webm': {'type':'video', 'codec':['libvpx']},
+                    'avi':  {'type':'video'},
+                    'mov':  {'type':'video'},
+
+                    'ogg':  {'type':'audio', 'codec':['libvorbis']},
+                    'mp3':  {'type':'audio', 'codec':['libmp3lame']},
+                    'wav':  {'type':'audio', 'codec':['pcm_s16le', 'pcm_s24le', 'pcm_s32le']},
+                    'm4a':  {'type':'audio', 'codec':['libfdk_aac']}
+                  }
+
+for ext in ["jpg", "jpeg", "png", "bmp", "tiff"]:
+    extensions_dict[ext] = {'type':'image'}
+
+
+def find_extension(codec):
+    if codec in extensions_dict:
+        # codec is already the extension
+        return codec
+
+    for ext,infos in extensions_dict.items():
+        if codec in infos.get('codec', []):
+            return ext
+    raise ValueError(
+        "The audio_codec you chose is unknown by MoviePy. "
+        "You should report this. In the meantime, you can "
+        "specify a temp_audiofile with the right extension "
+        "in write_videofile."
+    )
@@ -15,10 +15,17 @@ from ..Clip import Clip
 from ..compat import DEVNULL, string_types
 from ..config import get_setting
 from ..decorators import add_mask_if_none, apply_to_mask, convert_masks_to_RGB, convert_to_seconds, outplace, requires_duration, use_clip_fps_by_default
+from ..profiler import ACTIVE_PROFILERS
 from ..tools import deprecated_version_of, extensions_dict, find_extension, is_string, subprocess_call
 from .io.ffmpeg_writer import ffmpeg_write_video
 from .io.gif_writers import write_gif, write_gif_with_image_io, write_gif_with_tempfiles
-from .tools.drawing import blit
+from .tools.drawing import blit, is_uniform
+from .tools.tiling import shared_frame
+
+def _to_mask_values(pic):
+    """ Converts a uint8 picture (0-255) into mask values (0-1) of the
+    dtype given by the FLOAT_DTYPE setting. """
+    return np.multiply(pic, 1.0 / 255, dtype=get_setting('FLOAT_DTYPE'))
 
 class VideoClip(Clip):
     """Base class for video clips.
@@ -65,6 +72,13 @@ class VideoClip(Clip):
     relative_pos
       See variable ``pos``.
 
+    constant
+      Boolean set to `True` if all the frames of the clip are one same
+      read-only array (see ``ImageClip`` and ``ColorClip``). Compositing
+      functions and effects use it to compute things once, or to avoid
+      copying frames they don't modify. Transforming the frames of the
+      clip with ``fl`` gives a non-constant clip.
+
     """
 
     def __init__(self, make_frame=None, ismask=False, duration=None, has_constant_size=True):
@@ -78,10 +92,19 @@ class VideoClip(Clip):
             self.size = self.get_frame(0).shape[:2][::-1]
         self.ismask = ismask
         self.has_constant_size = has_constant_size
+        self.constant = False
         if duration is not None:
             self.duration = duration
             self.end = duration
 
+    @property
+    def w(self):
+        return self.size[0]
+
+    @property
+    def h(self):
+        return self.size[1]
+
     @convert_to_seconds(['t'])
     @convert_masks_to_RGB
     def save_frame(self, filename, t=0, withmask=True):
@@ -108,14 +131,132 @@ class VideoClip(Clip):
         
         ffmpeg_write_image(filename, frame)
 
+    @requires_duration
+    @use_clip_fps_by_default
+    @convert_masks_to_RGB
+    def write_videofile(self, filename, fps=None, codec=None,
+                        bitrate=None, audio=True, audio_fps=44100,
+                        preset="medium",
+                        audio_nbytes=4, audio_codec=None,
+                        audio_bitrate=None, audio_bufsize=2000,
+                        temp_audiofile=None,
+                        rewrite_audio=True, remove_temp=True,
+                        write_logfile=False, verbose=True,
+                        threads=None, ffmpeg_params=None,
+                        logger='bar', telemetry_file=None,
+                        telemetry_interval=1.0, stream_audio=False):
+        """Write the clip to a videofile.
 
-        >>> from moviepy.editor import VideoFileClip
-        >>> clip = VideoFileClip("myvideo.mp4").subclip(100,120)
-        >>> clip.write_videofile("my_new_video.mp4")
-        >>> clip.close()
+        Parameters
+        -----------
 
-        """
-        pass
+        filename
+          Name of the video file to write in.
+          The extension must correspond to the "codec" used (see below),
+          or simply be '.avi' (which will work with any codec).
+
+        fps
+          Number of frames per second in the resulting video file. If None is
+          provided, and the clip has an fps attribute, this fps will be used.
+
+        codec
+          Codec to use for image encoding. Can be any codec supported
+          by ffmpeg. If the filename is has extension '.mp4', '.ogv', '.webm',
+          the codec will be set accordingly, but you can still set it if you
+          don't like the default. For other extensions, the output filename
+          must be set accordingly.
+
+          Some examples of codecs are:
+
+          ``'libx264'`` (default codec for file extension ``.mp4``)
+          makes well-compressed videos (quality tunable using 'bitrate').
+
+
+          ``'mpeg4'`` (other codec for extension ``.mp4``) can be an alternative
+          to ``'libx264'``, and produces higher quality videos by default.
+
+
+          ``'rawvideo'`` (use file extension ``.avi``) will produce
+          a video of perfect quality, of possibly very huge size.
+
+
+          ``png`` (use file extension ``.avi``) will produce a video
+          of perfect quality, of smaller size than with ``rawvideo``.
+
+
+          ``'libvorbis'`` (use file extension ``.ogv``) is a nice video
+          format, which is completely free/ open source. However not
+          everyone has the codecs installed by default on their machine.
+
+
+          ``'libvpx'`` (use file extension ``.webm``) is tiny a video
+          format well indicated for web videos (with HTML5). Open source.
+
+
+        audio
+          Either ``True``, ``False``, or a file name.
+          If ``True`` and the clip has an audio clip attached, this
+          audio clip will be incorporated as a soundtrack in the movie.
+          If ``audio`` is the name of an audio file, this audio file
+          will be incorporated as a soundtrack in the movie.
+
+        audiofps
+          frame rate to use when generating the sound.
+
+        temp_audiofile
+          the name of the temporary audiofile to be generated and
+          incorporated in the the movie, if any.
+
+        audio_codec
+          Which audio codec should be used. Examples are 'libmp3lame'
+          for '.mp3', 'libvorbis' for 'ogg', 'libfdk_aac':'m4a',
+          'pcm_s16le' for 16-bit wav and 'pcm_s32le' for 32-bit wav.
+          Default is 'libmp3lame', unless the video extension is 'ogv'
+          or 'webm', at which case the default is 'libvorbis'.
+
+        audio_bitrate
+          Audio bitrate, given as a string like '50k', '500k', '3000k'.
+          Will determine the size/quality of audio in the output file.
+          Note that it mainly an indicative goal, the bitrate won't
+          necessarily be the this in the final file.
+
+        preset
+          Sets the time that FFMPEG will spend optimizing the compression.
+          Choices are: ultrafast, superfast, veryfast, faster, fast, medium,
+          slow, slower, veryslow, placebo. Note that this does not impact
+          the quality of the video, only the size of the video file. So
+          choose ultrafast when you are in a hurry and file size does not
+          matter.
+
+        threads
+          Number of threads to use for ffmpeg. Can speed up the writing of
+          the video on multicore computers.
+
+        ffmpeg_params
+          Any additional ffmpeg parameters you would like to pass, as a list
+          of terms, like ['-option1', 'value1', '-option2', 'value2'].
+
+        write_logfile
+          If true, will write log files for the audio and the video.
+          These will be files ending with '.log' with the name of the
+          output file in them.
+
+        logger
+          Either "bar" for progress bar or None or any Proglog logger.
+
+        verbose (deprecated, kept for compatibility)
+          Formerly used for toggling messages on/off. Use logger=None now.
+
+        telemetry_file, telemetry_interval
+          Throughput statistics of the export, see
+          ``moviepy.video.io.telemetry``.
+
+        stream_audio
+          If True, the audio of the clip is computed while the frames are
+          written and streamed to ffmpeg, without a temporary audio file
+          (see ``ffmpeg_write_video``).
+
+        Examples
         ========
 
         >>> from moviepy.editor import VideoFileClip
@@ -124,7 +265,69 @@ class VideoClip(Clip):
         >>> clip.close()
 
         """
-        pass
+        name, ext = os.path.splitext(os.path.basename(filename))
+        ext = ext[1:].lower()
+        logger = proglog.default_bar_logger(logger)
+
+        if codec is None:
+
+            try:
+                codec = extensions_dict[ext]['codec'][0]
+            except KeyError:
+                raise ValueError("MoviePy couldn't find the codec associated "
+                                 "with the filename. Provide the 'codec' "
+                                 "parameter in write_videofile.")
+
+        if audio_codec is None:
+            if ext in ['ogv', 'webm']:
+                audio_codec = 'libvorbis'
+            else:
+                audio_codec = 'libmp3lame'
+        elif audio_codec == 'raw16':
+            audio_codec = 'pcm_s16le'
+        elif audio_codec == 'raw32':
+            audio_codec = 'pcm_s32le'
+
+        audiofile = audio if is_string(audio) else None
+        make_audio = ((audiofile is None) and (audio == True) and
+                      (self.audio is not None) and not stream_audio)
+
+        if make_audio and temp_audiofile:
+            # The audio will be the clip's audio
+            audiofile = temp_audiofile
+        elif make_audio:
+            audio_ext = find_extension(audio_codec)
+            audiofile = (name + Clip._TEMP_FILES_PREFIX + "wvf_snd.%s" % audio_ext)
+
+        # enough cpu for multiprocessing ? USELESS RIGHT NOW, WILL COME AGAIN
+        # enough_cpu = (multiprocessing.cpu_count() > 1)
+        logger(message="Moviepy - Building video %s." % filename)
+        if make_audio:
+            self.audio.write_audiofile(audiofile, audio_fps,
+                                       audio_nbytes, audio_bufsize,
+                                       audio_codec, bitrate=audio_bitrate,
+                                       write_logfile=write_logfile,
+                                       verbose=verbose,
+                                       logger=logger)
+
+        ffmpeg_write_video(self, filename, fps, codec,
+                           bitrate=bitrate,
+                           preset=preset,
+                           write_logfile=write_logfile,
+                           audiofile=audiofile,
+                           verbose=verbose, threads=threads,
+                           ffmpeg_params=ffmpeg_params,
+                           logger=logger, telemetry_file=telemetry_file,
+                           telemetry_interval=telemetry_interval,
+                           stream_audio=stream_audio and audio == True,
+                           audio_fps=audio_fps, audio_nbytes=audio_nbytes,
+                           audio_codec=audio_codec,
+                           audio_bitrate=audio_bitrate)
+
+        if remove_temp and make_audio:
+            if os.path.exists(audiofile):
+                os.remove(audiofile)
+        logger(message="Moviepy - video ready %s" % filename)
 
     @requires_duration
     @use_clip_fps_by_default
@@ -179,30 +382,127 @@ class VideoClip(Clip):
         clips = [c for c in [left, center, right] if c is not None]
         return concatenate_videoclips(clips)
 
+    def fl(self, fun, apply_to=None, keep_duration=True):
+        """ General processing of a clip, see ``Clip.fl``. The new clip
+        is not constant anymore, even if the current clip is. """
+        new_clip = Clip.fl(self, fun, apply_to=apply_to, keep_duration=keep_duration)
+        new_clip.constant = False
+        return new_clip
+
     def fl_image(self, image_func, apply_to=None):
         """
         Modifies the images of a clip by replacing the frame
         `get_frame(t)` by another frame,  `image_func(get_frame(t))`
         """
-        return self.fl(lambda gf, t: image_func(gf(t)), apply_to)
+        new_clip = self.fl(lambda gf, t: image_func(gf(t)), apply_to)
+        new_clip.make_frame.profile_of = image_func
+        return new_clip
 
-    def blit_on(self, picture, t):
+    def get_region(self, t, roi):
+        """ Returns the region ``roi=(x1, y1, x2, y2)`` of the frame at
+        time ``t``, that is ``get_frame(t)[y1:y2, x1:x2]``.
+
+        Clips which can compute a region of their frames alone (crops,
+        resizes, rotations, margins, color effects, compositions...)
+        have a ``make_frame.region`` function ``(t, roi) -> region``,
+        which may return None. For the other clips the frame is computed
+        and sliced (see ``tiling.shared_frame``): the region may be a
+        view, not to be modified.
+        """
+        x1, y1, x2, y2 = [int(v) for v in roi]
+        region = getattr(self.make_frame, 'region', None)
+        if region is not None:
+            make_region = lambda t: region(t, (x1, y1, x2, y2))
+            if ACTIVE_PROFILERS:
+                make_region = ACTIVE_PROFILERS[-1].wrap(self, make_region)
+            result = make_region(t)
+            if result is not None:
+                return result
+        return shared_frame(self.get_frame, t)[y1:y2, x1:x2]
+
+    def blit_on(self, picture, t, offset=(0, 0), size=None):
         """
         Returns the result of the blit of the clip's frame at time `t`
         on the given `picture`, the position of the clip being given
         by the clip's ``pos`` attribute. Meant for compositing.
+
+        ``picture`` can be the region of the composition whose top-left
+        corner is at ``offset``, ``size`` being the size of the whole
+        composition (by default the size of ``picture``): only the
+        visible part of the frame is computed (see ``get_region``).
         """
+        from moviepy.video.tools.affine import blit_clip
         from moviepy.video.tools.drawing import blit
-        
-        frame = self.get_frame(t)
+
+        frame = None
+        if self.constant or (self.has_constant_size and
+                             getattr(self.make_frame, 'region', None) is not None):
+            # the clips which compute regions keep their size up to date
+            w, h = self.size
+        else:
+            # the size of the other clips (made with ``fl_image``...) may
+            # not be the size of their frames
+            frame = shared_frame(self.get_frame, t)
+            h, w = frame.shape[:2]
+
+        x, y = self._blit_position(t, (w, h), size or picture.shape[1::-1])
+        x, y = x - offset[0], y - offset[1]
+        if x >= picture.shape[1] or y >= picture.shape[0] or x + w <= 0 or y + h <= 0:
+            # not visible on the picture: nothing is computed
+            return picture
+
+        if frame is None and not self.ismask:
+            # rotations, margins... and sub-pixel positions are drawn
+            # directly on the picture, see moviepy.video.tools.affine
+            result = blit_clip(self, picture, t, (x, y))
+            if result is not None:
+                return result
+
+        x, y = int(x), int(y)
+        # part of the frame on the picture
+        roi = (max(0, -x), max(0, -y),
+               min(w, picture.shape[1] - x), min(h, picture.shape[0] - y))
+        if frame is None:
+            region = self.get_region(t, roi)
+            if region.shape[:2] != (roi[3] - roi[1], roi[2] - roi[0]):
+                # the size of the clip is not that of its frames
+                frame = shared_frame(self.get_frame, t)
+                h, w = frame.shape[:2]
+                roi = (max(0, -x), max(0, -y),
+                       min(w, picture.shape[1] - x), min(h, picture.shape[0] - y))
+                if roi[2] <= roi[0] or roi[3] <= roi[1]:
+                    return picture
+        if frame is not None:
+            region = frame[roi[1]:roi[3], roi[0]:roi[2]]
         if self.mask is None:
             mask = None
         else:
-            mask = self.mask.get_frame(t)
-        
+            mask = self.mask.get_region(t, roi)
+
+        return blit(region, picture, (x + roi[0], y + roi[1]), mask=mask, ismask=self.ismask)
+
+    def _blit_position(self, t, clip_size, size):
+        """ Position in pixels, in a composition of size ``size``, of the
+        top-left corner of the frame (of size ``clip_size``) at time
+        ``t``: positions like ``'center'`` or ``('left', 'bottom')`` and
+        relative positions are converted. """
         pos = self.pos(t) if callable(self.pos) else self.pos
-        
-        return blit(frame, picture, pos, mask=mask, ismask=self.ismask)
+        if isinstance(pos, str):
+            pos = {'center': ['center', 'center'], 'left': ['left', 'center'],
+                   'right': ['right', 'center'], 'top': ['center', 'top'],
+                   'bottom': ['center', 'bottom']}[pos]
+        else:
+            pos = list(pos)
+        if self.relative_pos:
+            for i, dim in enumerate(size):
+                if not isinstance(pos[i], str):
+                    pos[i] = dim * pos[i]
+        (wi, hi), (wf, hf) = clip_size, size
+        if isinstance(pos[0], str):
+            pos[0] = {'left': 0, 'center': int((wf - wi) / 2), 'right': wf - wi}[pos[0]]
+        if isinstance(pos[1], str):
+            pos[1] = {'top': 0, 'center': int((hf - hi) / 2), 'bottom': hf - hi}[pos[1]]
+        return pos
 
     def add_mask(self):
         """Add a mask VideoClip to the VideoClip.
@@ -219,35 +519,23 @@ class VideoClip(Clip):
             return self.set_mask(mask.set_duration(self.duration))
         else:
             mask = VideoClip(ismask=True).set_get_frame(
-                lambda t: np.ones(self.get_frame(t).shape[:2], dtype=float))
+                lambda t: np.ones(self.get_frame(t).shape[:2], dtype=get_setting('FLOAT_DTYPE')))
             return self.set_mask(mask.set_duration(self.duration))
 
     def on_color(self, size=None, color=(0, 0, 0), pos=None, col_opacity=None):
-        """Place the clip on a colored background."""
-        from moviepy.video.compositing.CompositeVideoClip import CompositeVideoClip
+        """Place the clip on a colored background.
 
-        if size is None:
-            size = self.size
-        if pos is None:
-            pos = 'center'
-        colorclip = ColorClip(size, color)
-
-        if col_opacity is not None:
-            colorclip = colorclip.set_opacity(col_opacity)
-
-        if self.mask is None:
-            return CompositeVideoClip([colorclip, self.set_position(pos)])
-        else:
-            return CompositeVideoClip([
-                colorclip,
-                self.set_position(pos),
-                self.mask.set_position(pos)
-            ])
+        See ``moviepy.video.compositing.on_color`` for the parameters.
+        """
+        from moviepy.video.compositing.on_color import on_color
+        return on_color(self, size=size, color=color, pos=pos,
+                        col_opacity=col_opacity)
 
     @outplace
     def set_make_frame(self, mf):
         """Change the clip's ``get_frame``."""
         self.make_frame = mf
+        self.constant = False
 
     @outplace
     def set_audio(self, audioclip):
@@ -289,7 +577,7 @@ class VideoClip(Clip):
         if self.ismask:
             return self
         else:
-            newclip = self.fl_image(lambda pic: 1.0 * pic[:, :, canal] / 255)
+            newclip = self.fl_image(lambda pic: _to_mask_values(pic[:, :, canal]))
             newclip.ismask = True
             return newclip
 
@@ -312,3 +600,361 @@ class VideoClip(Clip):
     def afx(self, fun, *a, **k):
         """Transform the clip's audio."""
         self.audio = self.audio.fx(fun, *a, **k) if self.audio else None
+
+class ImageClip(VideoClip):
+    """Class for non-moving VideoClips.
+
+    A video clip originating from a picture. This clip will simply
+    display the given picture at all times.
+
+    Examples
+    ---------
+
+    >>> clip = ImageClip("myHouse.jpeg")
+    >>> clip = ImageClip( someArray ) # a Numpy array represent
+
+    Parameters
+    -----------
+
+    img
+      Any picture file (png, tiff, jpeg, etc.) or any array representing
+      an RGB image (for instance a frame from a VideoClip).
+
+    ismask
+      Set this parameter to `True` if the clip is a mask.
+
+    transparent
+      Set this parameter to `True` (default) if you want the alpha layer
+      of the picture (if it exists) to be used as a mask.
+
+    fromalpha
+      Set this parameter to `True` if the clip is a mask made from the
+      alpha layer of the picture.
+
+    Attributes
+    -----------
+
+    img
+      Array representing the image of the clip. It is returned by all
+      the frames of the clip (and of its copies) and is read-only: use
+      ``img.copy()`` to get a modifiable picture.
+
+    """
+
+    def __init__(self, img, ismask=False, transparent=True, fromalpha=False, duration=None):
+        VideoClip.__init__(self, ismask=ismask, duration=duration)
+        if isinstance(img, string_types):
+            img = imread(img)
+        if len(img.shape) == 3:
+            if img.shape[2] == 4:
+                if fromalpha:
+                    img = _to_mask_values(img[:, :, 3])
+                elif ismask:
+                    img = _to_mask_values(img[:, :, 0])
+                elif transparent:
+                    self.mask = ImageClip(_to_mask_values(img[:, :, 3]), ismask=True)
+                    img = img[:, :, :3]
+            elif ismask:
+                img = _to_mask_values(img[:, :, 0])
+        self._set_img(img)
+
+    def _set_img(self, img):
+        """ Makes a read-only view of ``img`` the frame of the clip. """
+        img = img.view()
+        img.flags.writeable = False
+        self.img = img
+        self.make_frame = lambda t: img
+        self.size = img.shape[:2][::-1]
+        self.constant = True
+
+    def fl(self, fun, apply_to=None, keep_duration=True):
+        """ See ``VideoClip.fl``. The frames of the new clip are not
+        ``img`` anymore: its ``img`` is None. """
+        new_clip = VideoClip.fl(self, fun, apply_to=apply_to, keep_duration=keep_duration)
+        new_clip.img = None
+        return new_clip
+
+    def fl_image(self, image_func, apply_to=None):
+        """ Image-transformation filter.
+
+        Does the same as VideoClip.fl_image, but for ImageClip the
+        tranformed clip is computed once and for all at the beginning,
+        and not for each 'frame'.
+        """
+        if not self.constant:
+            # the frames were transformed by ``fl``: ``img`` is not the frame
+            return VideoClip.fl_image(self, image_func, apply_to)
+        return self._fl_img(image_func, apply_to)
+
+    @outplace
+    def _fl_img(self, image_func, apply_to=None):
+        self._set_img(image_func(self.img))
+        if apply_to is None:
+            apply_to = []
+        elif isinstance(apply_to, str):
+            apply_to = [apply_to]
+        for attr in apply_to:
+            a = getattr(self, attr, None)
+            if a is not None:
+                setattr(self, attr, a.fl_image(image_func))
+
+class ColorClip(ImageClip):
+    """An ImageClip showing just one color.
+
+    The frames of a ColorClip are a read-only view of ``color`` broadcast
+    to the size of the clip, so they take no memory whatever the size.
+
+    Parameters
+    -----------
+
+    size
+      Size (width, height) in pixels of the clip.
+
+    color
+      If argument ``ismask`` is False, ``color`` indicates
+      the color in RGB of the clip (default is black). If `ismask``
+      is True, ``color`` must be  a float between 0 and 1 (default is 1)
+
+    ismask
+      Set to true if the clip will be used as a mask.
+
+    """
+
+    def __init__(self, size, color=None, ismask=False, duration=None):
+        w, h = size
+        if color is None:
+            color = 0 if ismask else (0, 0, 0)
+        shape = (h, w) if np.isscalar(color) else (h, w, len(color))
+        dtype = get_setting('FLOAT_DTYPE') if ismask else 'uint8'
+        img = np.broadcast_to(np.array(color, dtype=dtype), shape)
+        ImageClip.__init__(self, img, ismask=ismask, duration=duration)
+        self.color = color
+
+    def _set_img(self, img):
+        """ Also updates ``color``: the color of the new frames if they
+        are still uniform, else None. """
+        ImageClip._set_img(self, img)
+        if not is_uniform(img):
+            self.color = None
+        elif img.ndim == 3:
+            self.color = tuple(img[0, 0].tolist())
+        else:
+            self.color = img.flat[0].item()
+
+    def fl(self, fun, apply_to=None, keep_duration=True):
+        """ See ``ImageClip.fl``: ``color`` is None too. """
+        new_clip = ImageClip.fl(self, fun, apply_to=apply_to, keep_duration=keep_duration)
+        new_clip.color = None
+        return new_clip
+
+class TextClip(ImageClip):
+    """Class for autogenerated text clips.
+
+    Creates an ImageClip originating from a script-generated text image.
+    The text is rendered in-process with Pillow by default, or with
+    ImageMagick if ``renderer='imagemagick'``.
+
+    Parameters
+    -----------
+
+    txt
+      A string of the text to write. Can be replaced by argument
+      ``filename``.
+
+    filename
+      The name of a file in which there is the text to write.
+      Can be provided instead of argument ``txt``
+
+    size
+      Size of the picture in pixels. Can be auto-set if
+      method='label', but mandatory if method='caption'.
+      the height can be None, it will then be auto-determined.
+
+    bg_color
+      Color of the background. See ``TextClip.list('color')``
+      for a list of acceptable names.
+
+    color
+      Color of the text. See ``TextClip.list('color')`` for a
+      list of acceptable names.
+
+    font
+      Name of the font to use. With the Pillow renderer, the path to a
+      TrueType/OpenType file or a font file name that FreeType can find
+      (Pillow's default font if None). With ImageMagick, see
+      ``TextClip.list('font')`` for the list of fonts you can use on
+      your computer ('Courier' if None).
+
+    fontsize
+      Font size (in pixels with Pillow, 24 if None).
+
+    stroke_color
+      Color of the stroke (=contour line) of the text. If ``None``,
+      there will be no stroke.
+
+    stroke_width
+      Width of the stroke, in pixels. Can be a float, like 1.5.
+
+    method
+      Either 'label' (default, the picture will be autosized so as to fit
+      exactly the size) or 'caption' (the text will be drawn in a picture
+      with fixed size provided with the ``size`` argument). If `caption`,
+      the text will be wrapped automagically (sometimes it is buggy, not
+      my fault, complain to the ImageMagick crew) and can be aligned or
+      centered (see parameter ``align``).
+
+    kerning
+      Changes the default spacing between letters. For
+      instance ``kerning=-1`` will make the letters 1 pixel nearer from
+      ach other compared to the default spacing. Only with ImageMagick.
+
+    align
+      center | East | West | South | North . Will only work if ``method``
+      is set to ``caption``
+
+    transparent
+      ``True`` (default) if you want to take into account the
+      transparency in the image.
+
+    renderer
+      'pillow' (default) to render the text in-process (see
+      ``moviepy.video.tools.text``), or 'imagemagick'.
+
+    """
+
+    def __init__(self, txt=None, filename=None, size=None, color='black',
+                 bg_color='transparent', fontsize=None, font=None,
+                 stroke_color=None, stroke_width=1, method='label',
+                 kerning=None, align='center', interline=None,
+                 tempfilename=None, temptxt=None,
+                 transparent=True, remove_temp=True,
+                 print_cmd=False, renderer='pillow'):
+
+        if renderer == 'pillow':
+            from .tools.text import render_text_picture
+            if txt is None:
+                with open(filename, encoding='utf8') as f:
+                    txt = f.read()
+            picture = render_text_picture(
+                txt, size=size, method=method, font=font,
+                fontsize=24 if fontsize is None else fontsize, color=color,
+                stroke_color=stroke_color, stroke_width=stroke_width,
+                bg_color=None if bg_color == 'transparent' else bg_color,
+                align=align, interline=4 if interline is None else interline)
+            ImageClip.__init__(self, picture, transparent=transparent)
+            self.txt = txt
+            self.color = color
+            self.stroke_color = stroke_color
+            return
+        elif renderer != 'imagemagick':
+            raise ValueError("renderer must be 'pillow' or 'imagemagick'")
+
+        if font is None:
+            font = 'Courier'
+
+        if txt is not None:
+            if temptxt is None:
+                temptxt_fd, temptxt = tempfile.mkstemp(suffix='.txt')
+                try:  # only in Python3 will this work
+                    os.write(temptxt_fd, bytes(txt, 'UTF8'))
+                except TypeError:  # oops, fall back to Python2
+                    os.write(temptxt_fd, txt)
+                os.close(temptxt_fd)
+            txt = '@' + temptxt
+        else:
+            # use a file instead of a text.
+            txt = "@%" + filename
+
+        if size is not None:
+            size = ('' if size[0] is None else str(size[0]),
+                    '' if size[1] is None else str(size[1]))
+
+        cmd = ([get_setting("IMAGEMAGICK_BINARY"),
+               "-background", bg_color,
+                "-fill", color,
+                "-font", font])
+
+        if fontsize is not None:
+            cmd += ["-pointsize", "%d" % fontsize]
+        if kerning is not None:
+            cmd += ["-kerning", "%0.1f" % kerning]
+        if stroke_color is not None:
+            cmd += ["-stroke", stroke_color, "-strokewidth",
+                    "%.01f" % stroke_width]
+        if size is not None:
+            cmd += ["-size", "%sx%s" % (size[0], size[1])]
+        if align is not None:
+            cmd += ["-gravity", align]
+        if interline is not None:
+            cmd += ["-interline-spacing", "%d" % interline]
+
+        if tempfilename is None:
+            tempfile_fd, tempfilename = tempfile.mkstemp(suffix='.png')
+            os.close(tempfile_fd)
+
+        cmd += ["%s:%s" % (method, txt),
+                "-type", "truecolormatte", "PNG32:%s" % tempfilename]
+
+        if print_cmd:
+            print(" ".join(cmd))
+
+        try:
+            subprocess_call(cmd, logger=None)
+        except (IOError, OSError) as err:
+            error = ("MoviePy Error: creation of %s failed because of the "
+                     "following error:\n\n%s.\n\n." % (filename, str(err))
+                     + ("This error can be due to the fact that ImageMagick "
+                        "is not installed on your computer, or (for Windows "
+                        "users) that you didn't specify the path to the "
+                        "ImageMagick binary in file conf.py, or that the path "
+                        "you specified is incorrect"))
+            raise IOError(error)
+
+        ImageClip.__init__(self, tempfilename, transparent=transparent)
+        self.txt = txt
+        self.color = color
+        self.stroke_color = stroke_color
+
+        if remove_temp:
+            if os.path.exists(tempfilename):
+                os.remove(tempfilename)
+            if os.path.exists(temptxt):
+                os.remove(temptxt)
+
+    @staticmethod
+    def list(arg):
+        """Returns the list of all valid entries for the argument of
+        ``TextClip`` given (can be ``font``, ``color``, etc...) """
+
+        popen_params = {"stdout": sp.PIPE,
+                        "stderr": DEVNULL,
+                        "stdin": DEVNULL}
+
+        if os.name == "nt":
+            popen_params["creationflags"] = 0x08000000
+
+        process = sp.Popen([get_setting("IMAGEMAGICK_BINARY"),
+                            '-list', arg], **popen_params)
+        result = process.communicate()[0]
+        lines = result.splitlines()
+
+        if arg == 'font':
+            return [l.decode('UTF-8')[8:] for l in lines if l.startswith(b"  Font:")]
+        elif arg == 'color':
+            return [l.split(b" ")[0] for l in lines[2:]]
+        else:
+            raise Exception("Moviepy:Error! Argument must equal "
+                            "'font' or 'color'")
+
+    @staticmethod
+    def search(string, arg):
+        """Returns the of all valid entries which contain ``string`` for the
+           argument ``arg`` of ``TextClip``, for instance
+
+           >>> # Find all the available fonts which contain "Courier"
+           >>> print ( TextClip.search('Courier', 'font') )
+
+        """
+        string = string.lower()
+        names_list = TextClip.list(arg)
+        return [name for name in names_list if string in name.lower()]
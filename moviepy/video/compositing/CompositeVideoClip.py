@@ -63,8 +63,15 @@ class CompositeVideoClip(VideoClip):
             self.created_bg = False
         else:
             self.clips = clips
-            self.bg = ColorClip(size, color=self.bg_color)
+            self.bg = ColorClip(size, color=self.bg_color, ismask=ismask)
             self.created_bg = True
+        self.starts = np.array([c.start for c in self.clips], dtype=float)
+        self.ends = np.array([np.inf if c.end is None else c.end for c in self.clips])
+        # interval index: the clips sorted by start time, and the latest
+        # end of the clips starting before each of them
+        self.start_order = np.argsort(self.starts, kind='stable')
+        self.sorted_starts = self.starts[self.start_order]
+        self.latest_ends = np.maximum.accumulate(self.ends[self.start_order])
         ends = [c.end for c in self.clips]
         if None not in ends:
             duration = max(ends)
@@ -76,20 +83,40 @@ class CompositeVideoClip(VideoClip):
         if transparent:
             maskclips = [(c.mask if c.mask is not None else c.add_mask().mask).set_position(c.pos).set_end(c.end).set_start(c.start, change_end=False) for c in self.clips]
             self.mask = CompositeVideoClip(maskclips, self.size, ismask=True, bg_color=0.0)
-
-        def make_frame(t):
-            """ The clips playing at time `t` are blitted over one
-                another. """
-            f = self.bg.get_frame(t)
-            for c in self.playing_clips(t):
-                f = c.blit_on(f, t)
-            return f
+        make_frame = lambda t: self.compose_frame(t)
+        make_frame.region = self.compose_region
         self.make_frame = make_frame
 
+    def compose_frame(self, t):
+        """ The clips playing at time `t` are blitted over one
+            another. """
+        return self.compose_region(t, (0, 0) + tuple(self.size))
+
+    def compose_region(self, t, roi):
+        """ The region ``roi=(x1, y1, x2, y2)`` of the frame at time `t`:
+            only the parts of the clips visible in the region are
+            computed and blitted over one another. """
+        f = self.bg.get_region(t, roi)
+        playing_clips = self.playing_clips(t)
+        if playing_clips:
+            # blit works in place, and the region of the background may
+            # be a view of a shared frame: copy it on write only.
+            f = np.array(f)
+        for c in playing_clips:
+            f = c.blit_on(f, t, offset=roi[:2], size=self.size)
+        return f
+
     def playing_clips(self, t=0):
         """ Returns a list of the clips in the composite clips that are
-            actually playing at the given time `t`. """
-        return [c for c in self.clips if c.start <= t < c.end]
+            actually playing at the given time `t`. Only the clips
+            starting before `t` and after all the clips ending before `t`
+            are looked at, which for long sequences of clips (like
+            concatenations) is a few clips instead of all of them. """
+        first = np.searchsorted(self.latest_ends, t, side='right')
+        last = np.searchsorted(self.sorted_starts, t, side='right')
+        indices = np.sort(self.start_order[first:last])
+        return [self.clips[i] for i in indices
+                if self.starts[i] <= t < self.ends[i]]
 
 def clips_array(array, rows_widths=None, cols_widths=None, bg_color=None):
     """
@@ -111,11 +138,11 @@ def clips_array(array, rows_widths=None, cols_widths=None, bg_color=None):
 
     # Calculate rows_widths if not provided
     if rows_widths is None:
-        rows_widths = [max(row, key=lambda c: c.w).w for row in array]
+        rows_widths = [max(c.h for c in row) for row in array]
 
     # Calculate cols_widths if not provided
     if cols_widths is None:
-        cols_widths = [max(array[:, i], key=lambda c: c.h).h for i in range(cols)]
+        cols_widths = [max(c.w for c in array[:, i]) for i in range(cols)]
 
     # Calculate total size
     total_width = sum(cols_widths)
@@ -79,53 +79,39 @@ def _concatenate_chain(clips, transition, ismask):
     tt = np.cumsum([0] + durations)  # start times, and end time
     
     def make_frame(t):
-        i = max([i for i, e in enumerate(tt) if e <= t])
+        i = max(0, min(np.searchsorted(tt, t, side='right') - 1, len(clips) - 1))
         return clips[i].get_frame(t - tt[i])
     
+    # Lets ``moviepy.video.io.smart_render`` see the concatenated clips.
+    make_frame.timeline = (tt, clips)
     result = VideoClip(make_frame, duration=tt[-1])
     
     if any(clip.mask for clip in clips):
-        masks = [c.mask if (c.mask is not None) else ColorClip(c.size, 1.0, ismask=True)
+        masks = [c.mask.set_duration(c.duration) if (c.mask is not None) else
+                 ColorClip(c.size, 1.0, ismask=True, duration=c.duration)
                  for c in clips]
         result.mask = concatenate_videoclips(masks, method="chain", ismask=True)
     
-    result.fps = max([clip.fps for clip in clips if hasattr(clip, 'fps') and clip.fps is not None])
+    fpss = [clip.fps for clip in clips if getattr(clip, 'fps', None) is not None]
+    result.fps = max(fpss) if fpss else None
     return result
 
 def _concatenate_compose(clips, transition, bg_color, ismask, padding):
     """Helper function for concatenate_videoclips using compose method"""
+    if transition is not None:
+        clips = reduce(lambda x, y: x + [transition, y], [[c] for c in clips])
     w = max(clip.w for clip in clips)
     h = max(clip.h for clip in clips)
-    
+
     tt = np.cumsum([0] + [clip.duration for clip in clips])
-    
-    # Handle padding
-    if padding < 0:
-        tt = tt[:-1] + [t + padding for t in tt[1:]]
-    elif padding > 0:
-        tt = [t + padding * i for i, t in enumerate(tt)]
-    
-    def make_frame(t):
-        i = max([i for i, e in enumerate(tt) if e <= t])
-        clip = clips[i]
-        t1 = t - tt[i]
-        frame = clip.get_frame(t1)
-        if clip.w != w or clip.h != h:
-            frame = np.pad(frame, ((0, h - clip.h), (0, w - clip.w), (0, 0)), 
-                           mode='constant', constant_values=bg_color or 0)
-        return frame
-    
-    result = VideoClip(make_frame, duration=tt[-1])
-    
-    if ismask:
-        result = result.to_mask()
-    
-    if transition is not None:
-        result = CompositeVideoClip([result] + [
-            transition.set_start(t).set_position((0, 0))
-            for t in tt[1:-1]
-        ])
-    
-    result.fps = max([clip.fps for clip in clips if hasattr(clip, 'fps') and clip.fps is not None])
+    tt = np.maximum(0, tt + padding * np.arange(len(tt)))
+
+    result = CompositeVideoClip([c.set_start(t).set_position('center')
+                                 for (c, t) in zip(clips, tt)],
+                                size=(w, h), bg_color=bg_color, ismask=ismask)
+    result.duration = result.end = tt[-1]
+
+    fpss = [clip.fps for clip in clips if getattr(clip, 'fps', None) is not None]
+    result.fps = max(fpss) if fpss else None
     return result
 concatenate = deprecated_version_of(concatenate_videoclips, oldname='concatenate')
@@ -19,9 +19,12 @@ def on_color(clip, size=None, color=(0, 0, 0), pos=None, col_opacity=None):
     if pos is None:
         pos = 'center'
 
-    color_clip = ColorClip(size, color)
+    if col_opacity is None:
+        # The background of the composite is a constant ColorClip,
+        # which is only copied when the clip is blitted on it.
+        return CompositeVideoClip([clip.set_position(pos)], size=size,
+                                  bg_color=color)
 
-    if col_opacity is not None:
-        color_clip = color_clip.set_opacity(col_opacity)
+    color_clip = ColorClip(size, color).set_opacity(col_opacity)
 
     return CompositeVideoClip([color_clip, clip.set_position(pos)], size=size)
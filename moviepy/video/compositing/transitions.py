@@ -3,6 +3,8 @@ Here is the current catalogue. These are meant
 to be used with clip.fx. There are available as transfx.crossfadein etc.
 if you load them with ``from moviepy.editor import *``
 """
+import numpy as np
+from moviepy.config import get_setting
 from moviepy.decorators import add_mask_if_none, requires_duration
 from moviepy.video.fx.fadein import fadein
 from moviepy.video.fx.fadeout import fadeout
@@ -14,21 +16,8 @@ def crossfadein(clip, duration):
     """ Makes the clip appear progressively, over ``duration`` seconds.
     Only works when the clip is included in a CompositeVideoClip.
     """
-    def make_frame(t):
-        if t >= duration:
-            return clip.get_frame(t)
-        else:
-            fading = clip.get_frame(t)
-            mask = np.array([(t / duration)] * 3).reshape(1, 1, 3)
-            return fading * mask
-
-    new_clip = clip.set_make_frame(make_frame)
-    new_clip.duration = clip.duration
-    new_clip.end = clip.end
-
-    if clip.mask is not None:
-        new_clip.mask = clip.mask.fx(crossfadein, duration)
-
+    new_clip = clip.copy()
+    new_clip.mask = clip.mask.fx(fadein, duration)
     return new_clip
 
 @requires_duration
@@ -37,35 +26,17 @@ def crossfadeout(clip, duration):
     """ Makes the clip disappear progressively, over ``duration`` seconds.
     Only works when the clip is included in a CompositeVideoClip.
     """
-    def make_frame(t):
-        if t <= clip.duration - duration:
-            return clip.get_frame(t)
-        else:
-            fading = clip.get_frame(t)
-            mask = np.array([(clip.duration - t) / duration] * 3).reshape(1, 1, 3)
-            return fading * mask
-
-    new_clip = clip.set_make_frame(make_frame)
-    new_clip.duration = clip.duration
-    new_clip.end = clip.end
-
-    if clip.mask is not None:
-        new_clip.mask = clip.mask.fx(crossfadeout, duration)
-
+    new_clip = clip.copy()
+    new_clip.mask = clip.mask.set_duration(clip.duration).fx(fadeout, duration)
     return new_clip
 
+def slide_in(clip, duration, side):
+    """ Makes the clip arrive from one side of the screen.
 
-    clip
-      A video clip.
-
-    duration
-      Time taken for the clip to be fully visible
-
-    side
-      Side of the screen where the clip comes from. One of
-      'top' | 'bottom' | 'left' | 'right'
+    Only works when the clip is included in a CompositeVideoClip,
+    and if the clip has the same size as the whole composition.
 
-    Examples
+    Parameters
     ===========
 
     clip
@@ -89,20 +60,23 @@ def crossfadeout(clip, duration):
     >>> final_clip = concatenate( slided_clips, padding=-1)
 
     """
-    pass
+    w, h = clip.size
+    pos_dict = {'left': lambda t: (min(0, w*(t/duration-1)), 0),
+                'right': lambda t: (max(0, w*(1-t/duration)), 0),
+                'top': lambda t: (0, min(0, h*(t/duration-1))),
+                'bottom': lambda t: (0, max(0, h*(1-t/duration)))}
 
+    return clip.set_position(pos_dict[side])
 
-    clip
-      A video clip.
 
-    duration
-      Time taken for the clip to fully disappear.
+@requires_duration
+def slide_out(clip, duration, side):
+    """ Makes the clip go away by one side of the screen.
 
-    side
-      Side of the screen where the clip goes. One of
-      'top' | 'bottom' | 'left' | 'right'
+    Only works when the clip is included in a CompositeVideoClip,
+    and if the clip has the same size as the whole composition.
 
-    Examples
+    Parameters
     ===========
 
     clip
@@ -126,7 +100,14 @@ def crossfadeout(clip, duration):
     >>> final_clip = concatenate( slided_clips, padding=-1)
 
     """
-    pass
+    w, h = clip.size
+    ts = clip.duration - duration # start time of the effect.
+    pos_dict = {'left': lambda t: (min(0, w*(-(t-ts)/duration)), 0),
+                'right': lambda t: (max(0, w*((t-ts)/duration)), 0),
+                'top': lambda t: (0, min(0, h*(-(t-ts)/duration))),
+                'bottom': lambda t: (0, max(0, h*((t-ts)/duration)))}
+
+    return clip.set_position(pos_dict[side])
 
 @requires_duration
 def make_loopable(clip, cross_duration):
@@ -141,6 +122,9 @@ def make_loopable(clip, cross_duration):
             fade_in_frame = clip.get_frame(t - d + cross_duration)
             fade_out_frame = clip.get_frame(t)
             blend_factor = (t - (d - cross_duration)) / cross_duration
-            return fade_out_frame * (1 - blend_factor) + fade_in_frame * blend_factor
+            dtype = get_setting('FLOAT_DTYPE')
+            result = np.multiply(fade_out_frame, 1 - blend_factor, dtype=dtype)
+            result += np.multiply(fade_in_frame, blend_factor, dtype=dtype)
+            return result
 
     return clip.set_make_frame(make_frame)
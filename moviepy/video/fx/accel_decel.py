@@ -1,3 +1,6 @@
+import numpy as np
+from moviepy.video.tools.retime import retime
+
 def f_accel_decel(t, old_d, new_d, abruptness=1, soonness=1.0):
     """
     abruptness
@@ -20,7 +23,7 @@ def f_accel_decel(t, old_d, new_d, abruptness=1, soonness=1.0):
         abruptness = max(abruptness, -1)  # Ensure abruptness > -1
         return new_d * (t + abruptness * t * (1 - t)) / (1 + abruptness * (t - 1))
 
-def accel_decel(clip, new_duration=None, abruptness=1.0, soonness=1.0):
+def accel_decel(clip, new_duration=None, abruptness=1.0, soonness=1.0, blend=False):
     """
 
     new_duration
@@ -34,6 +37,10 @@ def accel_decel(clip, new_duration=None, abruptness=1.0, soonness=1.0):
     soonness
       for positive abruptness, determines how soon the
       speedup occurs (0<soonness < inf)
+
+    blend
+      If True, the slowed down parts show blends of consecutive frames
+      instead of repeated frames.
     """
     if new_duration is None:
         new_duration = clip.duration
@@ -41,6 +48,12 @@ def accel_decel(clip, new_duration=None, abruptness=1.0, soonness=1.0):
     old_duration = clip.duration
     
     def time_transform(t):
-        return f_accel_decel(t, old_duration, new_duration, abruptness, soonness)
+        # maps the times of the new clip to the times of the clip
+        return f_accel_decel(t, new_duration, old_duration, abruptness, soonness)
     
-    return clip.fl_time(time_transform, apply_to=['mask', 'audio'])
+    new_clip = retime(clip, time_transform, new_duration, blend=blend)
+    if clip.mask is not None:
+        new_clip.mask = retime(clip.mask, time_transform, new_duration, blend=blend)
+    if clip.audio is not None:
+        new_clip.audio = retime(clip.audio, time_transform, new_duration)
+    return new_clip
@@ -1,4 +1,5 @@
 import numpy as np
+from moviepy.video.tools.color_pipeline import color_fx
 
 def blackwhite(clip, RGB=None, preserve_luminosity=True):
     """ Desaturates the picture, makes it black and white.
@@ -15,7 +16,4 @@ def blackwhite(clip, RGB=None, preserve_luminosity=True):
     if preserve_luminosity:
         RGB = np.array(RGB) / sum(RGB)
     
-    def make_black_and_white(image):
-        return np.dot(image[..., :3], RGB).astype('uint8')
-    
-    return clip.image_transform(make_black_and_white)
+    return color_fx(clip, matrix=3 * [RGB])
@@ -26,7 +26,9 @@ def crop(clip, x1=None, y1=None, x2=None, y2=None, width=None, height=None, x_ce
     centered in x=300, with explicit y-boundaries:
     
     >>> crop(x_center=300, width=400, y1=100, y2=600)
-    
+
+    Only the cropped region of the frames of ``clip`` is computed when
+    possible (see ``VideoClip.get_region``).
     """
     w, h = clip.w, clip.h
 
@@ -71,4 +73,11 @@ def crop(clip, x1=None, y1=None, x2=None, y2=None, width=None, height=None, x_ce
     y2 = max(0, min(y2, h))
 
     # Create the cropped clip
-    return clip.fl_image(lambda img: img[int(y1):int(y2), int(x1):int(x2)])
+    x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
+    new_clip = clip.fl_image(lambda img: img[y1:y2, x1:x2])
+    if not new_clip.constant:
+        new_clip.size = (x2 - x1, y2 - y1)
+        # only the cropped part of the frames is computed
+        new_clip.make_frame.region = lambda t, roi: clip.get_region(
+            t, (x1 + roi[0], y1 + roi[1], x1 + roi[2], y1 + roi[3]))
+    return new_clip
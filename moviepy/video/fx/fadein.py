@@ -1,4 +1,6 @@
 import numpy as np
+from moviepy.config import get_setting
+from moviepy.video.tools.color_pipeline import color_fx
 
 def fadein(clip, duration, initial_color=None):
     """
@@ -10,21 +12,16 @@ def fadein(clip, duration, initial_color=None):
     """
     if initial_color is None:
         initial_color = 0 if clip.ismask else [0, 0, 0]
-    
-    def fade(t):
+
+    initial_color = np.array(initial_color, dtype=float)
+
+    def fade(x, t):
         if t >= duration:
-            return 1.0
-        else:
-            return 1.0 * t / duration
-    
-    def make_frame(t):
-        fade_factor = fade(t)
-        if clip.ismask:
-            return np.interp(fade_factor, [0, 1], [initial_color, clip.get_frame(t)])
-        else:
-            return np.array(
-                [i * fade_factor + (1 - fade_factor) * initial_color[j] 
-                 for j, i in enumerate(clip.get_frame(t))]
-            ).astype('uint8')
-    
-    return clip.fl(make_frame, apply_to=['mask', 'audio'])
+            return None
+        # computes in the dtype of float frames (masks), so that
+        # float32 masks stay float32
+        dtype = x.dtype if x.dtype.kind == 'f' else get_setting('FLOAT_DTYPE')
+        fading = np.asarray(1.0 * t / duration, dtype=dtype)
+        return fading * x + (1 - fading) * initial_color.astype(dtype)
+
+    return color_fx(clip, fade, time_dependent=True)
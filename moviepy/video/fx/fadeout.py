@@ -1,5 +1,7 @@
 import numpy as np
+from moviepy.config import get_setting
 from moviepy.decorators import requires_duration
+from moviepy.video.tools.color_pipeline import color_fx
 
 @requires_duration
 def fadeout(clip, duration, final_color=None):
@@ -13,13 +15,15 @@ def fadeout(clip, duration, final_color=None):
     if final_color is None:
         final_color = 0 if clip.ismask else (0, 0, 0)
 
-    def make_frame(t):
-        original = clip.get_frame(t)
-        
-        if t >= clip.duration - duration:
-            factor = (t - (clip.duration - duration)) / duration
-            return np.multiply(1.0 - factor, original) + np.multiply(factor, final_color)
-        else:
-            return original
+    final_color = np.array(final_color, dtype=float)
 
-    return clip.set_make_frame(make_frame)
+    def fade(x, t):
+        if t < clip.duration - duration:
+            return None
+        # computes in the dtype of float frames (masks), so that
+        # float32 masks stay float32
+        dtype = x.dtype if x.dtype.kind == 'f' else get_setting('FLOAT_DTYPE')
+        fading = np.asarray(1.0 * (clip.duration - t) / duration, dtype=dtype)
+        return fading * x + (1 - fading) * final_color.astype(dtype)
+
+    return color_fx(clip, fade, time_dependent=True)
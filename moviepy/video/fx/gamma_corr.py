@@ -1,4 +1,4 @@
-import numpy as np
+from moviepy.video.tools.color_pipeline import color_fx
 
 def gamma_corr(clip, gamma):
     """ Gamma-correction of a video clip 
@@ -7,8 +7,4 @@ def gamma_corr(clip, gamma):
     :param gamma: Float, the gamma correction factor
     :return: A new VideoClip with gamma correction applied
     """
-    def apply_gamma(get_frame, t):
-        frame = get_frame(t)
-        return np.power(frame / 255.0, gamma) * 255.0
-
-    return clip.fl(apply_gamma)
+    return color_fx(clip, lambda x, t: 255 * (x / 255.0) ** gamma)
@@ -1,7 +1,10 @@
+from moviepy.video.tools.color_pipeline import color_fx
+
 def invert_colors(clip):
     """ Returns the color-inversed clip.
 
     The values of all pixels are replaced with (255-v) or (1-v) for masks 
     Black becomes white, green becomes purple, etc.
     """
-    return clip.image_transform(lambda frame: 255 - frame)
+    maxi = 1.0 if clip.ismask else 255
+    return color_fx(clip, lambda x, t: maxi - x)
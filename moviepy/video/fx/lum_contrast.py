@@ -1,19 +1,14 @@
+import numpy as np
+from moviepy.video.tools.color_pipeline import color_fx
+
 def lum_contrast(clip, lum=0, contrast=0, contrast_thr=127):
     """ luminosity-contrast correction of a clip """
-    
-    def modify_frame(get_frame, t):
-        frame = get_frame(t)
-        
-        # Apply luminosity adjustment
-        frame = frame.astype(float)
-        frame += lum
-        
-        # Apply contrast adjustment
+    factor = (259 * (contrast + 255)) / (255 * (259 - contrast))
+
+    def correct(x, t):
+        x = x + lum
         if contrast != 0:
-            factor = (259 * (contrast + 255)) / (255 * (259 - contrast))
-            frame = factor * (frame - contrast_thr) + contrast_thr
-        
-        # Clip values to valid range [0, 255]
-        return np.clip(frame, 0, 255).astype('uint8')
-    
-    return clip.fl(modify_frame)
+            x = factor * (x - contrast_thr) + contrast_thr
+        return np.clip(x, 0, 255)
+
+    return color_fx(clip, correct)
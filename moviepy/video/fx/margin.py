@@ -1,6 +1,5 @@
-import numpy as np
 from moviepy.decorators import apply_to_mask
-from moviepy.video.VideoClip import ImageClip
+from moviepy.video.tools.affine import affine_fx, translation
 
 @apply_to_mask
 def margin(clip, mar=None, left=0, right=0, top=0, bottom=0, color=(0, 0, 0), opacity=1.0):
@@ -17,27 +16,22 @@ def margin(clip, mar=None, left=0, right=0, top=0, bottom=0, color=(0, 0, 0), op
     
     :param opacity: opacity of the margin.
     
+    The margin is an affine transformation (a translation of the frames
+    in bigger frames), fused with the other ones like ``rotate``, see
+    ``moviepy.video.tools.affine``.
     """
     if mar is not None:
         left = right = top = bottom = mar
+
+    if clip.ismask:
+        color = opacity
+    size = lambda t, frame_size: (frame_size[0] + left + right,
+                                  frame_size[1] + top + bottom)
+    if clip.has_constant_size:
+        size = size(0, clip.size)
+    new_clip = affine_fx(clip, translation(left, top), size, bg_color=color)
     
-    def make_bg(get_frame, t):
-        frame = get_frame(t)
-        h, w = frame.shape[:2]
-        new_w = w + left + right
-        new_h = h + top + bottom
-        shape = (new_h, new_w) if frame.ndim == 2 else (new_h, new_w, frame.shape[2])
-        bg = np.zeros(shape, dtype=frame.dtype)
-        if isinstance(color, (int, float)):
-            bg.fill(color)
-        else:
-            bg[:, :] = color
-        bg[top:top+h, left:left+w] = frame
-        return bg
-    
-    new_clip = clip.fl(make_bg)
-    
-    if opacity != 1:
+    if opacity != 1 and not clip.ismask:
         new_clip = new_clip.set_opacity(opacity)
     
     return new_clip
@@ -1,79 +1,61 @@
-resize_possible = True
-try:
-    import cv2
-    import numpy as np
-    resizer.origin = 'cv2'
-except ImportError:
-    try:
-        from PIL import Image
-        import numpy as np
-        resizer.origin = 'PIL'
-    except ImportError:
-        try:
-            from scipy.misc import imresize
-            resizer = lambda pic, newsize: imresize(pic, map(int, newsize[::-1]))
-            resizer.origin = 'Scipy'
-        except ImportError:
-            resize_possible = False
-from moviepy.decorators import apply_to_mask
-
-def resize(clip, newsize=None, height=None, width=None, apply_to_mask=True):
-    """ 
+from moviepy.video.tools.resampling import resample, resample_region, source_region
+
+
+def _as_size(newsize, w, h):
+    """ ``(width, height)`` in pixels from a scaling factor or a size. """
+    if isinstance(newsize, (int, float)):
+        return int(w * newsize), int(h * newsize)
+    return tuple(map(int, newsize))
+
+
+def resize(clip, newsize=None, height=None, width=None, apply_to_mask=True,
+           method=None):
+    """
     Returns a video clip that is a resized version of the clip.
-    
+
     Parameters
     ------------
-    
+
     newsize:
-      Can be either 
+      Can be either
         - ``(width,height)`` in pixels or a float representing
         - A scaling factor, like 0.5
         - A function of time returning one of these.
-            
+
     width:
       width of the new clip in pixel. The height is then computed so
-      that the width/height ratio is conserved. 
-            
+      that the width/height ratio is conserved.
+
     height:
       height of the new clip in pixel. The width is then computed so
       that the width/height ratio is conserved.
-    
+
+    method:
+      One of 'nearest', 'bilinear', 'bicubic', 'lanczos', 'area' (see
+      ``moviepy.video.tools.resampling``). By default 'area' for the
+      reductions by a factor 2 or more, else 'bilinear'. The frames are
+      resized by MoviePy, the result does not depend on the libraries
+      installed.
+
+    A region of the new frames (see ``VideoClip.get_region``) is
+    computed from the pixels of the frames of ``clip`` in that region.
+
     Examples
     ----------
-             
+
     >>> myClip.resize( (460,720) ) # New resolution: (460,720)
     >>> myClip.resize(0.6) # width and heigth multiplied by 0.6
     >>> myClip.resize(width=800) # height computed automatically.
     >>> myClip.resize(lambda t : 1+0.02*t) # slow swelling of the clip
-    
-    """
-    if not resize_possible:
-        raise ImportError("Neither OpenCV nor PIL nor Scipy are installed. Resizing is not possible.")
 
+    """
     w, h = clip.size
 
     if newsize is not None:
         if callable(newsize):
-            def new_func(get_frame, t):
-                new_size = newsize(t)
-                if isinstance(new_size, (int, float)):
-                    ratio = new_size
-                    new_w, new_h = int(w * ratio), int(h * ratio)
-                else:
-                    new_w, new_h = new_size
-                frame = get_frame(t)
-                return resizer(frame, (new_w, new_h))
-
-            new_clip = clip.fl(new_func)
-            if apply_to_mask and clip.mask is not None:
-                new_clip.mask = resize(clip.mask, newsize, apply_to_mask=False)
-            return new_clip
-
-        elif isinstance(newsize, (int, float)):
-            ratio = newsize
-            newsize = (int(w * ratio), int(h * ratio))
+            size_func = lambda t: _as_size(newsize(t), w, h)
         else:
-            newsize = tuple(map(int, newsize))
+            newsize = _as_size(newsize, w, h)
     elif height is not None:
         ratio = height / h
         newsize = (int(w * ratio), height)
@@ -83,15 +65,28 @@ def resize(clip, newsize=None, height=None, width=None, apply_to_mask=True):
     else:
         raise ValueError("Either newsize, width, or height must be specified")
 
-    def resize_frame(frame):
-        return resizer(frame, newsize)
+    if callable(newsize):
+        new_clip = clip.fl(lambda gf, t: resample(gf(t), size_func(t), method))
+        new_clip.size = size_func(0)
+        new_clip.has_constant_size = False
+    else:
+        new_clip = clip.fl_image(lambda pic: resample(pic, newsize, method))
+        new_clip.size = newsize
+
+    def region(t, roi):
+        # computed from the pixels of the clip in the region only
+        if not clip.has_constant_size:
+            return None
+        size = size_func(t) if callable(newsize) else newsize
+        source = source_region(clip.size, size, roi, method)
+        return resample_region(clip.get_region(t, source), source[:2],
+                               clip.size, size, roi, method)
 
-    new_clip = clip.fl_image(resize_frame)
+    if not new_clip.constant:
+        new_clip.make_frame.region = region
 
+    # the mask is resized with the same (cached) weights
     if apply_to_mask and clip.mask is not None:
-        new_clip.mask = resize(clip.mask, newsize=newsize, apply_to_mask=False)
+        new_clip.mask = resize(clip.mask, newsize, apply_to_mask=False, method=method)
 
     return new_clip
-if not resize_possible:
-    doc = resize.__doc__
-    resize.__doc__ = doc
@@ -1,12 +1,20 @@
 import numpy as np
 from moviepy.decorators import apply_to_mask
-try:
-    from PIL import Image
-    PIL_FOUND = True
-except ImportError:
-    PIL_FOUND = False
+from moviepy.video.tools.affine import affine_fx, rotation, translation
 
 
+@apply_to_mask
+def rotate(clip, angle, unit='deg', resample='bilinear', expand=True, bg_color=None):
+    """
+    Change unit to 'rad' to define angles as radians.
+    If the angle is not one of 90, 180, -90, -180 (degrees) there will be
+    black borders. You can make them transparent with
+
+    >>> newclip = clip.add_mask().rotate(72)
+
+    Parameters
+    ===========
+
     clip
       A video clip
 
@@ -17,27 +25,52 @@ except ImportError:
       Unit of parameter `angle` (either `deg` for degrees or `rad` for radians)
 
     resample
-      One of "nearest", "bilinear", or "bicubic".
+      One of "nearest" or "bilinear" ("bicubic" is rendered as "bilinear").
 
     expand
-      Only applIf False, the clip will maintain the same True, the clip will be resized so that the whole
+      If False, the clip will maintain the same size, with the corners of
+      the rotated frames cut. If True, the clip will be resized so that the
+      whole rotated frames are visible.
+
+    bg_color
+      Color of the borders, black by default (transparent in the mask).
+
+    The rotation is an affine transformation, fused with the effects like
+    ``margin`` applied before or after it, and drawn directly in
+    compositions (see ``moviepy.video.tools.affine``).
     """
-    pass
-    ===========
+    method = 'nearest' if resample == 'nearest' else 'bilinear'
+    if clip.ismask:
+        bg_color = None
+    if unit == 'rad':
+        to_degrees = np.degrees
+    else:
+        to_degrees = lambda a: a
 
-    clip
-      A video clip
+    if not callable(angle) and expand and to_degrees(angle) % 90 == 0:
+        k = int(to_degrees(angle) // 90) % 4
+        new_clip = clip.fl_image(lambda pic: np.rot90(pic, k))
+        new_clip.size = tuple(clip.size[::-1]) if k % 2 else tuple(clip.size)
+        return new_clip
 
-    angle
-      Either a value or a function angle(t) representing the angle of rotation
+    angle_func = angle if callable(angle) else (lambda t: angle)
 
-    unit
-      Unit of parameter `angle` (either `deg` for degrees or `rad` for radians)
+    def size(t, frame_size):
+        w, h = frame_size
+        if not expand:
+            return (w, h)
+        a = np.radians(to_degrees(angle_func(t)))
+        c, s = abs(np.cos(a)), abs(np.sin(a))
+        # ignores the rounding errors of the sine and cosine
+        return (int(np.ceil(w * c + h * s - 1e-6)), int(np.ceil(w * s + h * c - 1e-6)))
 
-    resample
-      One of "nearest", "bilinear", or "bicubic".
+    def matrix(t, frame_size):
+        w, h = frame_size
+        new_w, new_h = size(t, frame_size)
+        return (translation(new_w / 2, new_h / 2)
+                .dot(rotation(to_degrees(angle_func(t))))
+                .dot(translation(-w / 2, -h / 2)))
 
-    expand
-      Only applIf False, the clip will maintain the same True, the clip will be resized so that the whole
-    """
-    pass
+    if not callable(angle) and clip.has_constant_size:
+        matrix, size = matrix(0, clip.size), size(0, clip.size)
+    return affine_fx(clip, matrix, size, method=method, bg_color=bg_color)
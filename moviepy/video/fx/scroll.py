@@ -1,6 +1,9 @@
+import numpy as np
+
 def scroll(clip, h=None, w=None, x_speed=0, y_speed=0, x_start=0, y_start=0, apply_to='mask'):
     """ Scrolls horizontally or vertically a clip, e.g. to make end
-        credits """
+        credits. The frames wrap around: the window of size ``(w, h)``
+        is a slice of the frame (no copy) while it fits in the frame. """
     def scroll_func(get_frame, t):
         x = x_start + x_speed * t
         y = y_start + y_speed * t
@@ -10,17 +13,21 @@ def scroll(clip, h=None, w=None, x_speed=0, y_speed=0, x_start=0, y_start=0, app
         if h is None and w is None:
             return frame
         
-        h_f = h or clip.h
-        w_f = w or clip.w
+        h_f = h or clip.size[1]
+        w_f = w or clip.size[0]
         
         x = int(x % w_f) if w_f else 0
         y = int(y % h_f) if h_f else 0
         
-        if w_f:
-            frame = np.hstack([frame[:, x:], frame[:, :x]])
-        if h_f:
-            frame = np.vstack([frame[y:], frame[:y]])
+        for axis, start, length in [(1, x, w_f), (0, y, h_f)]:
+            size = frame.shape[axis]
+            length = min(length, size)
+            if start + length <= size:
+                index = slice(start, start + length)
+                frame = frame[:, index] if axis else frame[index]
+            else:
+                frame = np.take(frame, np.arange(start, start + length) % size, axis=axis)
         
-        return frame[:h_f, :w_f] if h_f and w_f else frame
+        return frame
 
     return clip.fl(scroll_func, apply_to=apply_to)
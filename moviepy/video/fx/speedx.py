@@ -1,14 +1,27 @@
+from moviepy.audio.AudioClip import AudioClip
+from moviepy.audio.tools.retime import retime_audio
 from moviepy.decorators import apply_to_audio, apply_to_mask
+from moviepy.video.tools.retime import retime
 
 @apply_to_mask
 @apply_to_audio
-def speedx(clip, factor=None, final_duration=None):
+def speedx(clip, factor=None, final_duration=None, blend=False, preserve_pitch=False):
     """
     Returns a clip playing the current clip but at a speed multiplied
     by ``factor``. Instead of factor one can indicate the desired
     ``final_duration`` of the clip, and the factor will be automatically
     computed.
     The same effect is applied to the clip's audio and mask if any.
+
+    For video files sped up by an integer factor, the skipped frames are
+    dropped by ffmpeg before being sent to MoviePy. With ``blend=True``,
+    slowed down clips show blends of consecutive frames instead of
+    repeated frames (see ``moviepy.video.tools.retime``).
+
+    The audio is resampled, which changes its pitch like a tape played
+    faster, or time-stretched at constant pitch if ``preserve_pitch`` is
+    True (see ``moviepy.audio.tools.retime``, whose ``retime_audio`` can
+    also low-pass the audio to avoid aliasing when speeding up).
     """
     if final_duration:
         factor = clip.duration / final_duration
@@ -16,17 +29,11 @@ def speedx(clip, factor=None, final_duration=None):
     if factor is None:
         raise ValueError("You must provide either 'factor' or 'final_duration'")
 
-    new_clip = clip.copy()
-    
-    new_clip.duration = clip.duration / factor
-    new_clip.end = new_clip.start + new_clip.duration
-    
+    if isinstance(clip, AudioClip) and clip.duration is not None:
+        return retime_audio(clip, factor, preserve_pitch=preserve_pitch)
+
     def time_func(t):
         return factor * t
 
-    new_clip.fl_time = lambda t: clip.fl_time(time_func(t))
-
-    if clip.duration is not None:
-        new_clip.duration = clip.duration / factor
-
-    return new_clip
+    duration = None if clip.duration is None else clip.duration / factor
+    return retime(clip, time_func, duration, blend=blend)
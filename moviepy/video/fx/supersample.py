@@ -1,10 +1,17 @@
 import numpy as np
+from moviepy.config import get_setting
 
 def supersample(clip, d, nframes):
     """ Replaces each frame at time t by the mean of `nframes` equally spaced frames
     taken in the interval [t-d, t+d]. This results in motion blur."""
-    def make_frame(t):
+    def fl(gf, t):
         tt = np.linspace(t-d, t+d, nframes)
-        return np.mean([clip.get_frame(t) for t in tt], axis=0)
+        frames = (gf(t_) for t_ in tt)
+        # Accumulate in one buffer instead of stacking all the frames.
+        result = np.array(next(frames), dtype=get_setting('FLOAT_DTYPE'))
+        for frame in frames:
+            result += frame
+        result /= nframes
+        return result
     
-    return clip.fl(make_frame)
+    return clip.fl(fl)
@@ -1,10 +1,9 @@
-from moviepy.decorators import apply_to_audio, apply_to_mask, requires_duration
+from moviepy.audio.AudioClip import concatenate_audioclips
+from moviepy.decorators import requires_duration
 from moviepy.video.compositing.concatenate import concatenate_videoclips
 from .time_mirror import time_mirror
 
 @requires_duration
-@apply_to_mask
-@apply_to_audio
 def time_symmetrize(clip):
     """
     Returns a clip that plays the current clip once forwards and
@@ -13,4 +12,9 @@ def time_symmetrize(clip):
     This effect is automatically applied to the clip's mask and audio
     if they exist.
     """
-    return concatenate_videoclips([clip, time_mirror(clip)])
+    mirrored = time_mirror(clip)
+    # the concatenation chains the masks (mirrored by time_mirror)
+    result = concatenate_videoclips([clip, mirrored])
+    if clip.audio is not None:
+        result.audio = concatenate_audioclips([clip.audio, mirrored.audio])
+    return result
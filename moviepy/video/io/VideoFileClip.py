@@ -1,7 +1,11 @@
 import os
+import numpy as np
 from moviepy.audio.io.AudioFileClip import AudioFileClip
 from moviepy.Clip import Clip
+from moviepy.config import get_setting
 from moviepy.video.io.ffmpeg_reader import FFMPEG_VideoReader
+from moviepy.video.io.frame_store import FrameStoreReader, build_frame_store
+from moviepy.video.io.proxy import PROXY_HEIGHT, build_proxy, proxies_enabled
 from moviepy.video.VideoClip import VideoClip
 
 class VideoFileClip(VideoClip):
@@ -49,6 +53,21 @@ class VideoFileClip(VideoClip):
       can be set to 'fps', which may be helpful if importing slow-motion videos
       that get messed up otherwise.
 
+    proxy:
+      Set to True (or to a height in pixels, default 360) to build, in the
+      background, a low-resolution all-intra proxy of the file, from which
+      the frames are read during previews (see ``moviepy.video.io.proxy``).
+      Exports always read the original file. Ignored if ``has_mask``.
+
+    proxy_dir:
+      Folder where the proxy is stored. By default it is next to the file.
+
+    frame_store:
+      Set to True (or to a file name) to decode the file once into a
+      memory-mapped frame store from which frames are read in constant
+      time, whatever the order of the reads. Useful for long-GOP files
+      read backwards or in random order (see ``moviepy.video.io.frame_store``).
+
 
     Attributes
     -----------
@@ -72,10 +91,17 @@ class VideoFileClip(VideoClip):
 
     """
 
-    def __init__(self, filename, has_mask=False, audio=True, audio_buffersize=200000, target_resolution=None, resize_algorithm='bicubic', audio_fps=44100, audio_nbytes=2, verbose=False, fps_source='tbr'):
+    def __init__(self, filename, has_mask=False, audio=True, audio_buffersize=200000, target_resolution=None, resize_algorithm='bicubic', audio_fps=44100, audio_nbytes=2, verbose=False, fps_source='tbr', proxy=False, proxy_dir=None, frame_store=False):
         VideoClip.__init__(self)
         pix_fmt = 'rgba' if has_mask else 'rgb24'
-        self.reader = FFMPEG_VideoReader(filename, pix_fmt=pix_fmt, target_resolution=target_resolution, resize_algo=resize_algorithm, fps_source=fps_source)
+        if frame_store:
+            store_filename = build_frame_store(
+                filename, None if frame_store is True else frame_store,
+                target_resolution=target_resolution, pix_fmt=pix_fmt,
+                resize_algo=resize_algorithm)
+            self.reader = FrameStoreReader(store_filename)
+        else:
+            self.reader = FFMPEG_VideoReader(filename, pix_fmt=pix_fmt, target_resolution=target_resolution, resize_algo=resize_algorithm, fps_source=fps_source)
         self.duration = self.reader.duration
         self.end = self.reader.duration
         self.fps = self.reader.fps
@@ -84,19 +110,42 @@ class VideoFileClip(VideoClip):
         self.filename = self.reader.filename
         if has_mask:
             self.make_frame = lambda t: self.reader.get_frame(t)[:, :, :3]
-            mask_mf = lambda t: self.reader.get_frame(t)[:, :, 3] / 255.0
+            dtype = get_setting('FLOAT_DTYPE')
+            mask_mf = lambda t: np.multiply(self.reader.get_frame(t)[:, :, 3], 1.0 / 255, dtype=dtype)
             self.mask = VideoClip(ismask=True, make_frame=mask_mf).set_duration(self.duration)
             self.mask.fps = self.fps
         else:
-            self.make_frame = lambda t: self.reader.get_frame(t)
+            self.make_frame = lambda t: self.current_reader().get_frame(t)
+            self.make_frame.file_source = (self.filename, 0)
+        self.proxy_filename = None
+        self.proxy_reader = None
+        if proxy and not has_mask:
+            height = PROXY_HEIGHT if proxy is True else proxy
+            self.proxy_filename = build_proxy(filename, height, proxy_dir)
         if audio and self.reader.infos['audio_found']:
             self.audio = AudioFileClip(filename, buffersize=audio_buffersize, fps=audio_fps, nbytes=audio_nbytes)
 
+    def current_reader(self):
+        """ Returns the reader of the proxy if proxies are enabled and the
+        proxy is ready, else the reader of the file. """
+        if (self.proxy_filename is not None and proxies_enabled() and
+                os.path.exists(self.proxy_filename)):
+            if self.proxy_reader is None:
+                w, h = self.size
+                self.proxy_reader = FFMPEG_VideoReader(self.proxy_filename,
+                                                       target_resolution=(h, w),
+                                                       resize_algo='fast_bilinear')
+            return self.proxy_reader
+        return self.reader
+
     def close(self):
-        """ Close the internal reader and audio clip if present. """
+        """ Close the internal readers and audio clip if present. """
         if hasattr(self, 'reader') and self.reader:
             self.reader.close()
             self.reader = None
+        if getattr(self, 'proxy_reader', None):
+            self.proxy_reader.close()
+            self.proxy_reader = None
         if hasattr(self, 'audio') and self.audio:
             self.audio.close()
             self.audio = None
@@ -0,0 +1,294 @@
+"""
+Launching of the ffmpeg processes.
+
+All the ffmpeg processes of MoviePy (video and audio readers and
+writers, ``ffmpeg_parse_infos``, ``ffmpeg_write_image``, the commands run
+by ``moviepy.tools.subprocess_call`` like those of ``ffmpeg_tools``...)
+are started through ``FFMPEG_PROCESSES``, a process manager which:
+
+- caps the number of ffmpeg processes running at the same time, with
+  ``FFMPEG_PROCESSES.max_processes`` (unlimited by default). When the
+  cap is reached, a new launch first stops the least recently used
+  process of a reader opened by the same thread (readers restart their
+  process when they need it again), and otherwise waits for a running
+  process to finish.
+- reaps the finished processes, terminates the processes which are
+  released while still running, closes their pipes, and terminates the
+  remaining processes at exit.
+- records the launch latency and the exit codes of the processes, see
+  ``FFMPEG_PROCESSES.stats()``.
+
+A service opening hundreds of clips in one process can bound its
+resource use with:
+
+>>> from moviepy.video.io.ffmpeg_process import FFMPEG_PROCESSES
+>>> FFMPEG_PROCESSES.max_processes = 16
+
+Commands are lists of arguments, or can be built with ``FFMPEG_Command``:
+
+>>> cmd = (FFMPEG_Command()
+...        .add_input('video.mp4', ss=10)
+...        .add_output('-', f='image2pipe', pix_fmt='rgb24', vcodec='rawvideo'))
+>>> proc = FFMPEG_PROCESSES.popen(cmd, stdout=sp.PIPE)
+>>> ...
+>>> FFMPEG_PROCESSES.release(proc)
+"""
+import atexit
+import os
+import subprocess as sp
+import threading
+import time
+import weakref
+from types import MethodType
+from moviepy.config import get_setting
+
+class FFMPEG_Command:
+    """ Specification of an ffmpeg command line: global options, then
+    inputs and outputs with their options.
+
+    Options are given as keyword arguments: ``name=value`` gives
+    ``-name value`` and ``name=True`` the flag ``-name``, options set to
+    ``None`` or ``False`` are omitted. Names which are not valid Python
+    identifiers are passed with a dict: ``**{'c:v': 'libx264'}``. Options
+    which must be repeated, or raw arguments, go in ``extra_args``.
+
+    Parameters
+    -----------
+
+    loglevel
+      Level of the messages written by ffmpeg on its stderr.
+
+    overwrite
+      If True, the outputs are overwritten without asking (``-y``).
+
+    binary
+      The ffmpeg binary, by default the ``FFMPEG_BINARY`` setting.
+
+    """
+
+    def __init__(self, loglevel='error', overwrite=False, binary=None):
+        self.binary = binary
+        self.global_args = ['-loglevel', loglevel] + (['-y'] if overwrite else [])
+        self.inputs = []
+        self.outputs = []
+
+    @staticmethod
+    def options_args(options):
+        """ Converts a dict of options into command line arguments. """
+        args = []
+        for name, value in options.items():
+            if value is None or value is False:
+                continue
+            args.append('-' + name)
+            if value is not True:
+                args.append(str(value))
+        return args
+
+    def add_input(self, source, extra_args=None, **options):
+        """ Adds an input (a file name, ``'-'`` for stdin or ``'pipe:N'``)
+        read with the given options. Returns the command. """
+        self.inputs.append(self.options_args(options) + list(extra_args or [])
+                           + ['-i', source])
+        return self
+
+    def add_output(self, target, extra_args=None, **options):
+        """ Adds an output (a file name, ``'-'`` for stdout) written with
+        the given options. Returns the command. """
+        self.outputs.append(self.options_args(options) + list(extra_args or [])
+                            + [target])
+        return self
+
+    def args(self):
+        """ Returns the command as a list of arguments for ``Popen``. """
+        args = [self.binary or get_setting('FFMPEG_BINARY')] + self.global_args
+        for part in self.inputs + self.outputs:
+            args += part
+        return args
+
+class FFMPEG_ProcessManager:
+    """ Starts, counts and cleans up ffmpeg processes. See the module's
+    docstring.
+
+    Parameters
+    -----------
+
+    max_processes
+      Maximal number of ffmpeg processes running at the same time, or
+      None for no limit.
+
+    timeout
+      Maximal time in seconds a launch waits for a free slot before
+      raising an IOError (None to wait indefinitely).
+
+    """
+
+    def __init__(self, max_processes=None, timeout=None):
+        self.max_processes = max_processes
+        self.timeout = timeout
+        self.condition = threading.Condition()
+        self.processes = {}
+        self.pending = 0
+        self.launches = 0
+        self.launch_time = 0.0
+        self.max_launch_time = 0.0
+        self.peak_running = 0
+        self.waits = 0
+        self.evictions = 0
+        self.exit_codes = {}
+
+    def running(self):
+        """ Returns the number of registered processes still running (the
+        finished ones are reaped on the way). """
+        return sum(1 for proc in list(self.processes) if proc.poll() is None)
+
+    def _eviction(self):
+        """ Returns a function stopping the least recently used process of
+        a reader of the current thread, or None if there is none. Called
+        with the condition held. """
+        thread = threading.get_ident()
+        candidates = [(record['last_used'], record['evict'], proc)
+                      for proc, record in self.processes.items()
+                      if record['evict'] is not None
+                      and record['thread'] == thread and proc.poll() is None]
+        if not candidates:
+            return None
+        _, evict_ref, proc = min(candidates, key=lambda c: c[0])
+        self.evictions += 1
+        evict = evict_ref()
+        if evict is None:
+            # the owner of the process was garbage-collected
+            return lambda: self.release(proc)
+        return evict
+
+    def _acquire(self):
+        """ Waits until a process can be launched, and reserves its slot. """
+        deadline = None if self.timeout is None else time.perf_counter() + self.timeout
+        while True:
+            with self.condition:
+                if (self.max_processes is None or
+                        self.running() + self.pending < self.max_processes):
+                    self.pending += 1
+                    return
+                evict = self._eviction()
+                if evict is None:
+                    self.waits += 1
+                    if deadline is not None and time.perf_counter() > deadline:
+                        raise IOError("MoviePy error: no ffmpeg process could be "
+                                      "started: %d processes are already running "
+                                      "(FFMPEG_PROCESSES.max_processes)."
+                                      % self.max_processes)
+                    # finished processes are only noticed by polling
+                    self.condition.wait(timeout=0.05)
+                    continue
+            # stopping the process may take a while: the other threads
+            # can launch and release processes meanwhile
+            evict()
+
+    def popen(self, cmd, evict=None, **popen_params):
+        """ Starts an ffmpeg process and returns its ``Popen`` object, to
+        be given back with ``release`` when it is not needed anymore.
+
+        ``cmd`` is a list of arguments or a ``FFMPEG_Command``.
+        ``evict`` is an optional function, stopping the process (and
+        releasing it), which the manager may call when too many processes
+        are running: the owner of the process must then be able to start
+        a new one when needed, like the readers do. The other keyword
+        arguments are passed to ``Popen``.
+        """
+        if isinstance(cmd, FFMPEG_Command):
+            cmd = cmd.args()
+        if os.name == 'nt':
+            popen_params.setdefault('creationflags', 0x08000000)
+        self._acquire()
+        start = time.perf_counter()
+        try:
+            proc = sp.Popen(cmd, **popen_params)
+        finally:
+            with self.condition:
+                self.pending -= 1
+                self.condition.notify()
+        elapsed = time.perf_counter() - start
+        if isinstance(evict, MethodType):
+            # no reference to the owner, so that it can still be collected
+            evict = weakref.WeakMethod(evict)
+        elif evict is not None:
+            evict = (lambda func: lambda: func)(evict)
+        with self.condition:
+            self.processes[proc] = {'evict': evict, 'thread': threading.get_ident(),
+                                    'last_used': time.perf_counter()}
+            self.launches += 1
+            self.launch_time += elapsed
+            self.max_launch_time = max(self.max_launch_time, elapsed)
+            self.peak_running = max(self.peak_running, len(self.processes))
+        return proc
+
+    def touch(self, proc):
+        """ Marks the process as recently used (the least recently used
+        processes are stopped first). """
+        record = self.processes.get(proc)
+        if record is not None:
+            record['last_used'] = time.perf_counter()
+
+    def release(self, proc, timeout=5):
+        """ Terminates the process if it is still running, closes its
+        pipes and waits for it (killing it if it does not terminate within
+        ``timeout`` seconds). Returns its exit code. """
+        with self.condition:
+            registered = self.processes.pop(proc, None) is not None
+        if proc.poll() is None:
+            proc.terminate()
+        for pipe in [proc.stdin, proc.stdout, proc.stderr]:
+            if pipe is not None:
+                try:
+                    pipe.close()
+                except (OSError, ValueError):
+                    pass
+        try:
+            proc.wait(timeout=timeout)
+        except sp.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+        if registered:
+            with self.condition:
+                code = proc.returncode
+                self.exit_codes[code] = self.exit_codes.get(code, 0) + 1
+                self.condition.notify()
+        return proc.returncode
+
+    def run(self, cmd, stdout=sp.PIPE, stderr=sp.PIPE, **popen_params):
+        """ Runs an ffmpeg command until it finishes. Returns its exit code
+        and what it wrote on stdout and stderr (None if not piped). """
+        proc = self.popen(cmd, stdout=stdout, stderr=stderr,
+                          stdin=popen_params.pop('stdin', sp.DEVNULL), **popen_params)
+        try:
+            output, error = proc.communicate()
+        finally:
+            self.release(proc)
+        return proc.returncode, output, error
+
+    def stats(self):
+        """ Returns a dict of statistics on the processes launched:
+        ``launches``, ``running``, ``peak_running`` (processes registered
+        at the same time), ``mean_launch_time`` and ``max_launch_time``
+        (seconds taken by ``Popen``), ``waits`` (times a launch waited
+        for a slot), ``evictions`` (reader processes stopped to free a
+        slot) and ``exit_codes`` (number of released processes by exit
+        code, negative for processes terminated by a signal). """
+        with self.condition:
+            return {'launches': self.launches,
+                    'running': self.running(),
+                    'peak_running': self.peak_running,
+                    'mean_launch_time': (self.launch_time / self.launches
+                                         if self.launches else None),
+                    'max_launch_time': self.max_launch_time,
+                    'waits': self.waits,
+                    'evictions': self.evictions,
+                    'exit_codes': dict(self.exit_codes)}
+
+    def close_all(self):
+        """ Terminates and releases all the registered processes. """
+        for proc in list(self.processes):
+            self.release(proc)
+
+FFMPEG_PROCESSES = FFMPEG_ProcessManager()
+atexit.register(FFMPEG_PROCESSES.close_all)
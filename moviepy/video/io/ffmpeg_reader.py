@@ -7,20 +7,43 @@ import logging
 import os
 import re
 import subprocess as sp
+import threading
+import time
 import warnings
 import numpy as np
 from moviepy.compat import DEVNULL, PY3
-from moviepy.config import get_setting
 from moviepy.tools import cvsecs
+from moviepy.video.io.ffmpeg_process import FFMPEG_PROCESSES, FFMPEG_Command
 logging.captureWarnings(True)
 
+# Decoding statistics of all the readers since the start of the current
+# export, used for its telemetry (see ``moviepy.video.io.telemetry``).
+READER_STATS = {}
+
+def reset_reader_stats():
+    """ Sets the decoding statistics of the readers to zero. Called at the
+    start of each export. """
+    READER_STATS.update(decode_time=0.0, frames_decoded=0, cache_hits=0)
+
+reset_reader_stats()
+
+# Maximal size (in bytes) of the frames decoded at once by a reader to
+# read a video backwards, see ``FFMPEG_VideoReader.read_block_backwards``.
+REVERSE_BLOCK_BYTES = 256 * 2**20
+
 class FFMPEG_VideoReader:
 
-    def __init__(self, filename, print_infos=False, bufsize=None, pix_fmt='rgb24', check_duration=True, target_resolution=None, resize_algo='bicubic', fps_source='tbr'):
+    def __init__(self, filename, print_infos=False, bufsize=None, pix_fmt='rgb24', check_duration=True, target_resolution=None, resize_algo='bicubic', fps_source='tbr', reverse_block=None, frame_step=1, infos=None):
         self.filename = filename
         self.proc = None
-        infos = ffmpeg_parse_infos(filename, print_infos, check_duration, fps_source)
-        self.fps = infos['video_fps']
+        if infos is None:
+            infos = ffmpeg_parse_infos(filename, print_infos, check_duration, fps_source)
+        # With ``frame_step=k``, ffmpeg only outputs one frame out of k
+        # (before converting it to RGB), and the reader sees a video of
+        # frame rate fps/k.
+        self.frame_step = frame_step
+        self.source_fps = infos['video_fps']
+        self.fps = self.source_fps / frame_step
         self.size = infos['video_size']
         self.rotation = infos['video_rotation']
         if target_resolution:
@@ -36,7 +59,7 @@ class FFMPEG_VideoReader:
         self.resize_algo = resize_algo
         self.duration = infos['video_duration']
         self.ffmpeg_duration = infos['duration']
-        self.nframes = infos['video_nframes']
+        self.nframes = (infos['video_nframes'] + frame_step - 1) // frame_step
         self.infos = infos
         self.pix_fmt = pix_fmt
         self.depth = 4 if pix_fmt == 'rgba' else 3
@@ -44,6 +67,17 @@ class FFMPEG_VideoReader:
             w, h = self.size
             bufsize = self.depth * w * h + 100
         self.bufsize = bufsize
+        # Frames read backwards are decoded forward by blocks, see
+        # ``read_block_backwards``.
+        if reverse_block is None:
+            reverse_block = int(round(self.fps))
+        frame_bytes = self.depth * self.size[0] * self.size[1]
+        self.reverse_block = max(1, min(reverse_block,
+                                        REVERSE_BLOCK_BYTES // frame_bytes))
+        self.reverse_buffer = {}
+        # The frames are read one at a time, even by several threads
+        # (like the tiles of ``moviepy.video.tools.tiling``).
+        self.lock = threading.Lock()
         self.initialize()
         self.pos = 1
         self.lastread = self.read_frame()
@@ -52,27 +86,34 @@ class FFMPEG_VideoReader:
         """Opens the file, creates the pipe. """
         self.close()  # if any
 
-        if starttime != 0:
+        cmd = FFMPEG_Command()
+        output_options = {}
+        if starttime != 0 and self.frame_step > 1:
+            # the frames are selected from the first frame after the seek
+            cmd.add_input(self.filename, ss="%.06f" % starttime)
+        elif starttime != 0:
             offset = min(1, starttime)
-            i_arg = ['-ss', "%.06f" % (starttime - offset),
-                     '-i', self.filename,
-                     '-ss', "%.06f" % offset]
+            cmd.add_input(self.filename, ss="%.06f" % (starttime - offset))
+            output_options['ss'] = "%.06f" % offset
         else:
-            i_arg = ['-i', self.filename]
-
-        cmd = ([get_setting("FFMPEG_BINARY")] + i_arg +
-               ['-loglevel', 'error',
-                '-f', 'image2pipe',
-                '-pix_fmt', self.pix_fmt,
-                '-vcodec', 'rawvideo', '-'])
+            cmd.add_input(self.filename)
 
+        output_options['f'] = 'image2pipe'
         if self.size != self.infos['video_size']:
-            cmd += ['-s', '%dx%d' % (self.size[0], self.size[1]),
-                    '-sws_flags', self.resize_algo]
-
-        self.proc = sp.Popen(cmd, bufsize=self.bufsize,
-                             stdout=sp.PIPE,
-                             stderr=sp.PIPE)
+            output_options.update(s='%dx%d' % (self.size[0], self.size[1]),
+                                  sws_flags=self.resize_algo)
+        if self.frame_step > 1:
+            output_options.update(vf='select=not(mod(n\\,%d))' % self.frame_step,
+                                  vsync='0')
+        cmd.add_output('-', pix_fmt=self.pix_fmt, vcodec='rawvideo',
+                       **output_options)
+
+        # The process may be stopped by FFMPEG_PROCESSES when too many
+        # are running, ``get_frame`` then starts a new one.
+        self.proc = FFMPEG_PROCESSES.popen(cmd, evict=self.close_proc,
+                                           bufsize=self.bufsize,
+                                           stdout=sp.PIPE,
+                                           stderr=sp.PIPE)
 
         self.pos = int(self.fps * starttime)
 
@@ -83,6 +124,28 @@ class FFMPEG_VideoReader:
             self.proc.stdout.read(self.depth * w * h)
             self.pos += 1
 
+    def read_frame(self):
+        """ Reads the next frame from the pipe. """
+        w, h = self.size
+        nbytes = self.depth * w * h
+        FFMPEG_PROCESSES.touch(self.proc)
+        s = self.proc.stdout.read(nbytes)
+        if len(s) != nbytes:
+            warnings.warn(("Warning: in file %s, " % self.filename) +
+                          ("%d bytes wanted but %d bytes read, " % (nbytes, len(s))) +
+                          ("at frame %d/%d. " % (self.pos, self.nframes)) +
+                          "Using the last valid frame instead.", UserWarning)
+            if not hasattr(self, 'lastread'):
+                raise IOError(("MoviePy error: failed to read the first frame of "
+                               "video file %s. That might mean that the file is "
+                               "corrupted. That may also mean that you are using "
+                               "a deprecated version of FFMPEG.") % self.filename)
+            result = self.lastread
+        else:
+            result = np.frombuffer(s, dtype='uint8').reshape((h, w, self.depth))
+            self.lastread = result
+        return result
+
     def get_frame(self, t):
         """ Read a file video frame at time t.
 
@@ -91,22 +154,84 @@ class FFMPEG_VideoReader:
         This function tries to avoid fetching arbitrary frames
         whenever possible, by moving between adjacent frames.
         """
-        # Get frame number from time
-        pos = int(self.fps * t)
-        
+        with self.lock:
+            return self._get_frame(t)
+
+    def _get_frame(self, t):
+        """ ``get_frame``, called with the lock of the reader held. """
+        # Get frame number from time (frame ``pos`` is the one read by
+        # ``read_frame`` at position ``pos - 1``)
+        pos = int(self.fps * t + 0.00001) + 1
+
+        if not hasattr(self, 'lastread'):
+            # the reader was closed
+            self.initialize(self.frame_start_time(pos))
+            self.pos = pos - 1
         if pos == self.pos:
+            READER_STATS['cache_hits'] += 1
             return self.lastread
+        elif pos in self.reverse_buffer:
+            READER_STATS['cache_hits'] += 1
+            return self.reverse_buffer[pos]
+        elif pos < self.pos and self.pos - pos <= self.reverse_block:
+            return self.read_block_backwards(pos)
         else:
-            if (pos < self.pos) or (pos > self.pos + 100):
-                self.initialize(t)
+            start = time.perf_counter()
+            if self.proc is None or (pos < self.pos) or (pos > self.pos + 100):
+                self.initialize(self.frame_start_time(pos))
                 self.pos = pos
             else:
                 self.skip_frames(pos - self.pos - 1)
             
             result = self.read_frame()
             self.pos = pos
+            READER_STATS['decode_time'] += time.perf_counter() - start
+            READER_STATS['frames_decoded'] += 1
             return result
 
+    def frame_start_time(self, pos):
+        """ Time from which ffmpeg must read to return frame ``pos`` first:
+        the start of the frame, minus 1ms so that the timestamps of the
+        containers, which are often rounded to the millisecond, never make
+        ffmpeg skip it. """
+        start = self.frame_step * (pos - 1) / self.source_fps
+        return max(0, start - min(0.001, 0.25 / self.source_fps))
+
+    def read_block_backwards(self, pos):
+        """ Returns frame ``pos``, which is a little behind the current
+        position. Instead of seeking back for every frame of a clip
+        played backwards, the ``reverse_block`` frames up to ``pos`` are
+        decoded forward at once and kept in ``reverse_buffer``, from
+        which the next (previous) frames are served. The block holds at
+        most ``REVERSE_BLOCK_BYTES`` of frames. """
+        start = time.perf_counter()
+        first = max(1, pos - self.reverse_block + 1)
+        self.initialize(self.frame_start_time(first))
+        buffer = {}
+        for p in range(first, pos + 1):
+            buffer[p] = self.read_frame()
+        self.reverse_buffer = buffer
+        self.pos = pos
+        READER_STATS['decode_time'] += time.perf_counter() - start
+        READER_STATS['frames_decoded'] += len(buffer)
+        return buffer[pos]
+
+    def close_proc(self):
+        """ Terminates the ffmpeg process, if any. """
+        if self.proc:
+            FFMPEG_PROCESSES.release(self.proc)
+            self.proc = None
+
+    def close(self):
+        """ Terminates the ffmpeg process, if any, and frees the frames
+        kept in memory. A later ``get_frame`` starts a new process. """
+        self.reverse_buffer = {}
+        self.close_proc()
+        if hasattr(self, 'lastread'):
+            del self.lastread
+        # no frame is at position 0, so no frame is served from memory
+        self.pos = 0
+
     def __del__(self):
         self.close()
 
@@ -146,28 +271,21 @@ def ffmpeg_parse_infos(filename, print_infos=False, check_duration=True, fps_sou
 
     Returns a dictionnary with the fields:
     "video_found", "video_fps", "duration", "video_nframes",
-    "video_duration", "audio_found", "audio_fps"
+    "video_duration", "video_codec_name", "video_size", "audio_found",
+    "audio_fps"
 
     "video_duration" is slightly smaller than "duration" to avoid
     fetching the uncomplete frames at the end, which raises an error.
 
     """
     # Open the file in a pipe, read output
-    cmd = [get_setting("FFMPEG_BINARY"), "-i", filename]
-    if not check_duration:
-        cmd += ["-t", "00:00:00.1"]
-    cmd += ["-f", "null", "-"]
-
-    popen_params = {"bufsize": 10**5,
-                    "stdout": sp.PIPE,
-                    "stderr": sp.PIPE,
-                    "stdin": DEVNULL}
-
-    if os.name == "nt":
-        popen_params["creationflags"] = 0x08000000
+    # (the infos are written at the 'info' level)
+    cmd = (FFMPEG_Command(loglevel='info')
+           .add_input(filename)
+           .add_output("-", t=None if check_duration else "00:00:00.1",
+                       f="null"))
 
-    proc = sp.Popen(cmd, **popen_params)
-    (output, error) = proc.communicate()
+    returncode, output, error = FFMPEG_PROCESSES.run(cmd, bufsize=10**5)
     infos = error.decode('utf8')
 
     if print_infos:
@@ -182,6 +300,7 @@ def ffmpeg_parse_infos(filename, print_infos=False, check_duration=True, fps_sou
 
     result = dict()
     result['video_found'] = False
+    result['video_rotation'] = 0
     result['audio_found'] = False
     result['duration'] = None
     result['video_duration'] = None
@@ -194,11 +313,18 @@ def ffmpeg_parse_infos(filename, print_infos=False, check_duration=True, fps_sou
             if line.startswith('Duration:'):
                 match = re.findall("([0-9][0-9]:[0-9][0-9]:[0-9][0-9].[0-9][0-9])", line)[0]
                 result['duration'] = cvsecs(match)
-            elif line.startswith('Stream') and 'Video:' in line:
+            elif (line.startswith('Stream') and 'Video:' in line
+                  and not result['video_found']):
+                # only the first video stream (of the input file) counts
                 result['video_found'] = True
-                match = re.findall(" [0-9]*.* fps", line)
-                fps = float(match[0].split(' ')[1])
+                result['video_codec_name'] = re.findall("Video: ([^ ,]+)", line)[0]
+                match = re.findall(" ([0-9]+)x([0-9]+)[,\\s]", line)
+                result['video_size'] = [int(match[0][0]), int(match[0][1])]
+                match = re.findall(" ([0-9]+\\.?[0-9]*) fps", line)
+                fps = float(match[0])
                 result['video_fps'] = fps
+            elif line.startswith('rotate') and result['video_found']:
+                result['video_rotation'] = int(re.findall("[0-9]+", line)[0])
             elif line.startswith('Stream') and 'Audio:' in line:
                 result['audio_found'] = True
         except:
@@ -4,10 +4,16 @@ out of VideoClips
 """
 import os
 import subprocess as sp
+import threading
+import time
 import numpy as np
 from proglog import proglog
+from moviepy.Clip import Clip
 from moviepy.compat import DEVNULL, PY3
-from moviepy.config import get_setting
+from moviepy.profiler import profile_section
+from moviepy.video.io.ffmpeg_process import FFMPEG_PROCESSES, FFMPEG_Command
+from moviepy.video.io.proxy import use_proxies
+from moviepy.video.io.telemetry import ExportTelemetry
 
 class FFMPEG_VideoWriter:
     """ A class for FFMPEG-based video writing.
@@ -59,31 +65,63 @@ class FFMPEG_VideoWriter:
       Boolean. Set to ``True`` if there is a mask in the video to be
       encoded.
 
+    audio_fps
+      Optional: if provided, ffmpeg also reads raw audio (signed PCM at
+      this frame rate) from a second pipe, fed with ``stream_audio``, and
+      muxes it with the video in the same pass. Not available on Windows.
+
+    audio_nchannels, audio_nbytes
+      Number of channels and bytes per sample of the streamed audio.
+
+    audio_codec
+      Codec of the audio of the file, for the streamed audio or the
+      ``audiofile`` (which is copied unchanged by default).
+
+    audio_bitrate
+      Optional: bitrate of the audio, e.g. "128k".
+
     """
 
-    def __init__(self, filename, size, fps, codec='libx264', audiofile=None, preset='medium', bitrate=None, withmask=False, logfile=None, threads=None, ffmpeg_params=None):
+    def __init__(self, filename, size, fps, codec='libx264', audiofile=None, preset='medium', bitrate=None, withmask=False, logfile=None, threads=None, ffmpeg_params=None, audio_fps=None, audio_nchannels=2, audio_nbytes=2, audio_codec=None, audio_bitrate=None):
         if logfile is None:
             logfile = sp.PIPE
         self.filename = filename
+        self.logfile = logfile
         self.codec = codec
         self.ext = self.filename.split('.')[-1]
-        cmd = [get_setting('FFMPEG_BINARY'), '-y', '-loglevel', 'error' if logfile == sp.PIPE else 'info', '-f', 'rawvideo', '-vcodec', 'rawvideo', '-s', '%dx%d' % (size[0], size[1]), '-pix_fmt', 'rgba' if withmask else 'rgb24', '-r', '%.02f' % fps, '-an', '-i', '-']
+        cmd = (FFMPEG_Command(loglevel='error' if logfile == sp.PIPE else 'info',
+                              overwrite=True)
+               .add_input('-', f='rawvideo', vcodec='rawvideo',
+                          s='%dx%d' % (size[0], size[1]),
+                          pix_fmt='rgba' if withmask else 'rgb24',
+                          r='%.02f' % fps, an=True))
+        self.audio_fps = audio_fps
+        self.audio_nbytes = audio_nbytes
+        self.audio_pipe = None
+        self.audio_thread = None
+        self.audio_error = None
         if audiofile is not None:
-            cmd.extend(['-i', audiofile, '-acodec', 'copy'])
-        cmd.extend(['-vcodec', codec, '-preset', preset])
-        if ffmpeg_params is not None:
-            cmd.extend(ffmpeg_params)
-        if bitrate is not None:
-            cmd.extend(['-b', bitrate])
-        if threads is not None:
-            cmd.extend(['-threads', str(threads)])
+            cmd.add_input(audiofile)
+        elif audio_fps is not None:
+            audio_read_fd, audio_write_fd = os.pipe()
+            cmd.add_input('pipe:%d' % audio_read_fd, f='s%dle' % (8 * audio_nbytes),
+                          ar='%d' % audio_fps, ac='%d' % audio_nchannels)
+        output_options = {}
+        if audiofile is not None or audio_fps is not None:
+            output_options.update(acodec=audio_codec or 'copy', ab=audio_bitrate)
+        output_options.update(vcodec=codec, preset=preset, b=bitrate,
+                              threads=threads)
         if codec == 'libx264' and size[0] % 2 == 0 and (size[1] % 2 == 0):
-            cmd.extend(['-pix_fmt', 'yuv420p'])
-        cmd.extend([filename])
+            output_options['pix_fmt'] = 'yuv420p'
+        # (the ffmpeg_params come last, so they override these options)
+        cmd.add_output(filename, extra_args=ffmpeg_params, **output_options)
         popen_params = {'stdout': DEVNULL, 'stderr': logfile, 'stdin': sp.PIPE}
-        if os.name == 'nt':
-            popen_params['creationflags'] = 134217728
-        self.proc = sp.Popen(cmd, **popen_params)
+        if audiofile is None and audio_fps is not None:
+            popen_params['pass_fds'] = (audio_read_fd,)
+        self.proc = FFMPEG_PROCESSES.popen(cmd, **popen_params)
+        if 'pass_fds' in popen_params:
+            os.close(audio_read_fd)
+            self.audio_pipe = os.fdopen(audio_write_fd, 'wb')
 
     def write_frame(self, img_array):
         """ Writes one frame in the file."""
@@ -116,16 +154,73 @@ class FFMPEG_VideoWriter:
                           "or file extension you provided is not a video")
             raise IOError(error)
 
+    def stream_audio(self, audioclip, buffersize=None):
+        """ Starts feeding the audio pipe with the sound of ``audioclip``,
+        in a thread, so that ffmpeg reads the audio and the video frames
+        concurrently. The sound is computed by chunks of ``buffersize``
+        samples (one second by default: smaller chunks make the thread
+        compete more often with the rendering of the frames). """
+        if buffersize is None:
+            buffersize = int(self.audio_fps)
+
+        def feed():
+            try:
+                for chunk in audioclip.iter_chunks(chunksize=buffersize,
+                                                   quantize=True,
+                                                   nbytes=self.audio_nbytes,
+                                                   fps=self.audio_fps,
+                                                   logger=proglog.MuteProgressBarLogger(),
+                                                   reuse_buffers=True):
+                    self.audio_pipe.write(memoryview(np.ascontiguousarray(chunk)).cast('B'))
+            except Exception as err:
+                # e.g. a broken pipe if ffmpeg stopped, reported by ``close``
+                self.audio_error = err
+            finally:
+                try:
+                    self.audio_pipe.close()
+                except OSError:
+                    pass
+
+        self.audio_thread = threading.Thread(target=feed, daemon=True)
+        self.audio_thread.start()
+
+    def close(self):
+        """ Closes the pipes and waits for ffmpeg to finish the file. """
+        if self.proc:
+            self.proc.stdin.close()
+            if self.audio_thread is not None:
+                self.audio_thread.join()
+            elif self.audio_pipe is not None:
+                self.audio_pipe.close()
+            self.proc.wait()
+            FFMPEG_PROCESSES.release(self.proc)
+        self.proc = None
+        if self.audio_error is not None:
+            raise IOError("MoviePy error: the audio of %s could not be written:"
+                          " %s" % (self.filename, self.audio_error))
+
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
         self.close()
 
-def ffmpeg_write_video(clip, filename, fps, codec='libx264', bitrate=None, preset='medium', withmask=False, write_logfile=False, audiofile=None, verbose=True, threads=None, ffmpeg_params=None, logger='bar'):
+def ffmpeg_write_video(clip, filename, fps, codec='libx264', bitrate=None, preset='medium', withmask=False, write_logfile=False, audiofile=None, verbose=True, threads=None, ffmpeg_params=None, logger='bar', telemetry_file=None, telemetry_interval=1.0, stream_audio=False, audio_fps=44100, audio_nbytes=2, audio_codec=None, audio_bitrate=None):
     """ Write the clip to a videofile. See VideoClip.write_videofile for details
     on the parameters.
+
+    Throughput statistics are emitted every ``telemetry_interval`` seconds
+    as the ``export_stats`` state of the logger, and appended as JSON lines
+    to ``telemetry_file`` if provided (see ``moviepy.video.io.telemetry``).
+
+    With ``stream_audio=True``, the audio of the clip (if any) is computed
+    while the frames are written and streamed to ffmpeg through a second
+    pipe, so that the file is written in one pass, without a temporary
+    audio file (on Windows, where no pipe can be passed to ffmpeg, the
+    audio is first written to a temporary wav file). ``audio_codec``
+    defaults to 'libvorbis' for webm and ogv files, 'libmp3lame' otherwise.
     """
+    from moviepy.video.VideoClip import VideoClip
     logger = proglog.default_bar_logger(logger)
     if not isinstance(clip, VideoClip):
         raise ValueError("The clip must be a VideoClip")
@@ -140,26 +235,57 @@ def ffmpeg_write_video(clip, filename, fps, codec='libx264', bitrate=None, prese
     if ext not in ['mp4', 'ogv', 'webm', 'avi']:
         raise ValueError("The video extension must be mp4, ogv, webm or avi")
 
+    audio_params = {}
+    temp_audiofile = None
+    if stream_audio and clip.audio is not None:
+        if audio_codec is None:
+            audio_codec = 'libvorbis' if ext in ['webm', 'ogv'] else 'libmp3lame'
+        audio_params = dict(audio_codec=audio_codec, audio_bitrate=audio_bitrate)
+        if os.name == 'nt':
+            temp_audiofile = name + Clip._TEMP_FILES_PREFIX + 'wvf_snd.wav'
+            clip.audio.write_audiofile(temp_audiofile, audio_fps, audio_nbytes,
+                                       codec='pcm_s%dle' % (8 * audio_nbytes),
+                                       logger=logger)
+            audiofile = temp_audiofile
+        else:
+            audio_params.update(audio_fps=audio_fps, audio_nbytes=audio_nbytes,
+                                audio_nchannels=clip.audio.nchannels)
+
     # Create a writer
     writer = FFMPEG_VideoWriter(filename, clip.size, fps, codec=codec,
                                 preset=preset, bitrate=bitrate, withmask=withmask,
-                                logfile=write_logfile and open(filename + '.log', 'w'),
+                                logfile=open(filename + '.log', 'w') if write_logfile else None,
                                 audiofile=audiofile, threads=threads,
-                                ffmpeg_params=ffmpeg_params)
+                                ffmpeg_params=ffmpeg_params, **audio_params)
+    if writer.audio_pipe is not None:
+        writer.stream_audio(clip.audio)
 
     # Write frames to the writer
     nframes = int(clip.duration * fps)
-    for t,frame in clip.iter_frames(logger=logger, with_times=True, fps=fps, dtype="uint8"):
-        if withmask:
-            mask = 255 * clip.mask.get_frame(t)
-            if mask.dtype != "uint8":
-                mask = mask.astype("uint8")
-            frame = np.dstack([frame, mask])
-        
-        writer.write_frame(frame)
+    telemetry = ExportTelemetry(nframes, logger, filename=telemetry_file,
+                                interval=telemetry_interval)
+    tic = time.perf_counter()
+    # Exports are always rendered from the full-resolution sources
+    with use_proxies(False):
+        for t,frame in clip.iter_frames(logger=logger, with_times=True, fps=fps, dtype="uint8"):
+            if withmask:
+                mask = 255 * clip.mask.get_frame(t)
+                if mask.dtype != "uint8":
+                    mask = mask.astype("uint8")
+                frame = np.dstack([frame, mask])
+            
+            rendered = time.perf_counter()
+            with profile_section('FFMPEG_VideoWriter.write_frame'):
+                writer.write_frame(frame)
+            toc = time.perf_counter()
+            telemetry.add_frame(rendered - tic, toc - rendered)
+            tic = toc
 
     # Close the writer
     writer.close()
+    telemetry.emit()
+    if temp_audiofile is not None:
+        os.remove(temp_audiofile)
 
     # Write the log file if required
     if write_logfile:
@@ -177,30 +303,23 @@ def ffmpeg_write_image(filename, image, logfile=False):
 
     h, w = image.shape[:2]
     
-    cmd = [get_setting("FFMPEG_BINARY"), '-y',
-           '-f', 'rawvideo',
-           '-vcodec', 'rawvideo',
-           '-s', f'{w}x{h}',  # size of one frame
-           '-pix_fmt', 'rgb24' if image.shape[2] == 3 else 'rgba',
-           '-i', '-',  # The input comes from a pipe
-           '-an',  # Tells FFMPEG not to expect any audio
-           '-vcodec', 'png',
-           filename]
-
-    popen_params = {"stdout": DEVNULL,
-                    "stderr": DEVNULL if logfile else None,
-                    "stdin": sp.PIPE}
-
-    if os.name == "nt":
-        popen_params["creationflags"] = 0x08000000
-
-    proc = sp.Popen(cmd, **popen_params)
+    cmd = (FFMPEG_Command(overwrite=True)
+           .add_input('-', f='rawvideo', vcodec='rawvideo',
+                      s='%dx%d' % (w, h),  # size of one frame
+                      pix_fmt='rgb24' if image.shape[2] == 3 else 'rgba',
+                      an=True)  # no audio in the pipe
+           .add_output(filename, vcodec='png'))
+
+    proc = FFMPEG_PROCESSES.popen(cmd, stdout=DEVNULL,
+                                  stderr=DEVNULL if logfile else None,
+                                  stdin=sp.PIPE)
     proc.stdin.write(image.tobytes())
     proc.stdin.close()
     proc.wait()
+    FFMPEG_PROCESSES.release(proc)
 
     if proc.returncode:
-        err = "\n".join(["MoviePy running : %s" % cmd,
+        err = "\n".join(["MoviePy running : %s" % cmd.args(),
                          "Command returned with error %d" % proc.returncode,
                          "Refer to FFMPEG documentation for more information"])
         raise IOError(err)
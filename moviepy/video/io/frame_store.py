@@ -0,0 +1,159 @@
+"""
+All-intra frame stores: video files decoded once into memory-mappable
+files, from which any frame is read in constant time.
+
+Reading the frames of a long-GOP video (H.264...) in order is fast, but
+every backward or long forward seek restarts ffmpeg, which must decode
+from the previous keyframe. Tools which access frames in arbitrary order
+(``time_mirror``, ``FramesMatches.from_clip``, ``detect_scenes``,
+``manual_tracking``...) spend most of their time seeking. A frame store
+is the video decoded once into a file of frames of fixed size (or of
+individually zlib-compressed frames, with an index of their offsets),
+memory-mapped, so that reading frame ``i`` is a direct access::
+
+    >>> clip = VideoFileClip("long_video.mp4", frame_store=True)
+    >>> reversed_clip = clip.fx(vfx.time_mirror)
+
+A raw store takes ``width * height * 3`` bytes per frame (2.7MB for
+720p), a compressed one typically 3 to 10 times less but each read
+decompresses a frame. Use ``target_resolution`` to store smaller frames
+when the full resolution is not needed (for analysis tools).
+
+The store is written next to the video (or at the given path), with a
+``.json`` file of metadata. It is rebuilt if the video file changes, or
+if it was built with other options (``target_resolution``, ``compress``,
+``pix_fmt``).
+"""
+import json
+import os
+import subprocess as sp
+import zlib
+import numpy as np
+from moviepy.compat import DEVNULL
+from moviepy.video.io.ffmpeg_process import FFMPEG_PROCESSES, FFMPEG_Command
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+def frame_store_filename(filename, target_resolution=None, compress=False):
+    """ Default name of the frame store of a video file. """
+    name = os.path.splitext(filename)[0]
+    if target_resolution is not None:
+        name += '.%sx%s' % tuple(target_resolution)
+    return name + ('.zframes' if compress else '.frames')
+
+def _source_identity(filename):
+    stat = os.stat(filename)
+    return [os.path.abspath(filename), stat.st_size, stat.st_mtime_ns]
+
+def build_frame_store(filename, store_filename=None, target_resolution=None,
+                      pix_fmt='rgb24', compress=False, resize_algo='bicubic'):
+    """ Decodes the video ``filename`` into a frame store, unless an up
+    to date one already exists, and returns the name of the store.
+
+    Parameters
+    -----------
+
+    store_filename
+      Name of the store. By default, the name of the video with
+      extension ``.frames`` (``.zframes`` if compressed).
+
+    target_resolution
+      Set to (height, width) to store resized frames.
+
+    pix_fmt
+      'rgb24' or 'rgba'.
+
+    compress
+      If True, each frame is compressed with zlib (fast level).
+
+    """
+    if store_filename is None:
+        store_filename = frame_store_filename(filename, target_resolution, compress)
+    meta_filename = store_filename + '.json'
+    identity = _source_identity(filename)
+    # what the frames of the store depend on, besides the source
+    options = {'pix_fmt': pix_fmt, 'compress': bool(compress),
+               'target_resolution': (None if target_resolution is None
+                                     else list(target_resolution)),
+               'resize_algo': None if target_resolution is None else resize_algo}
+    if os.path.exists(meta_filename):
+        with open(meta_filename) as f:
+            meta = json.load(f)
+        if (meta['source'] == identity and os.path.exists(store_filename) and
+                all(meta.get(key) == value for key, value in options.items())):
+            return store_filename
+
+    infos = ffmpeg_parse_infos(filename)
+    w, h = infos['video_size']
+    size_options = {}
+    if target_resolution is not None:
+        h, w = target_resolution
+        size_options = {'s': '%dx%d' % (w, h), 'sws_flags': resize_algo}
+    depth = 4 if pix_fmt == 'rgba' else 3
+    cmd = (FFMPEG_Command()
+           .add_input(filename)
+           .add_output('-', f='image2pipe', pix_fmt=pix_fmt, vcodec='rawvideo',
+                       **size_options))
+    frame_bytes = w * h * depth
+    proc = FFMPEG_PROCESSES.popen(cmd, stdout=sp.PIPE, stderr=DEVNULL,
+                                  stdin=DEVNULL, bufsize=frame_bytes)
+    offsets = [0]
+    temp_filename = store_filename + '.part'
+    with open(temp_filename, 'wb') as f:
+        while True:
+            frame = proc.stdout.read(frame_bytes)
+            if len(frame) < frame_bytes:
+                break
+            if compress:
+                frame = zlib.compress(frame, 1)
+            f.write(frame)
+            offsets.append(offsets[-1] + len(frame))
+    proc.wait()
+    FFMPEG_PROCESSES.release(proc)
+    if len(offsets) == 1:
+        os.remove(temp_filename)
+        raise IOError("MoviePy error: no frame could be read from %s." % filename)
+    os.replace(temp_filename, store_filename)
+    meta = dict(options, source=identity, fps=infos['video_fps'], size=[w, h],
+                depth=depth, nframes=len(offsets) - 1,
+                duration=infos['video_duration'], infos=infos,
+                offsets=offsets if compress else None)
+    with open(meta_filename, 'w') as f:
+        json.dump(meta, f)
+    return store_filename
+
+class FrameStoreReader:
+    """ Reads the frames of a frame store, with the same interface as
+    ``FFMPEG_VideoReader``. """
+
+    def __init__(self, store_filename):
+        with open(store_filename + '.json') as f:
+            meta = json.load(f)
+        self.filename = meta['source'][0]
+        self.store_filename = store_filename
+        self.infos = meta['infos']
+        self.fps = meta['fps']
+        self.size = meta['size']
+        self.depth = meta['depth']
+        self.nframes = meta['nframes']
+        self.duration = meta['duration']
+        self.rotation = self.infos.get('video_rotation', 0)
+        w, h = self.size
+        self.offsets = meta['offsets']
+        if self.offsets is None:
+            self.frames = np.memmap(store_filename, dtype='uint8', mode='r',
+                                    shape=(self.nframes, h, w, self.depth))
+        else:
+            self.frames = np.memmap(store_filename, dtype='uint8', mode='r')
+
+    def get_frame(self, t):
+        """ Returns the frame at time ``t`` (a read-only array). """
+        i = min(max(0, int(self.fps * t + 1e-5)), self.nframes - 1)
+        if self.offsets is None:
+            return self.frames[i]
+        w, h = self.size
+        data = zlib.decompress(self.frames[self.offsets[i]:self.offsets[i + 1]])
+        frame = np.frombuffer(data, dtype='uint8').reshape((h, w, self.depth))
+        return frame
+
+    def close(self):
+        self.frames = None
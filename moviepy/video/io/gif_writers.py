@@ -6,6 +6,7 @@ from moviepy.compat import DEVNULL
 from moviepy.config import get_setting
 from moviepy.decorators import requires_duration, use_clip_fps_by_default
 from moviepy.tools import subprocess_call
+from moviepy.video.io.ffmpeg_process import FFMPEG_PROCESSES, FFMPEG_Command
 try:
     import imageio
     IMAGEIO_FOUND = True
@@ -55,12 +56,10 @@ def write_gif_with_tempfiles(clip, filename, fps=None, program='ImageMagick', op
                    '-fuzz', f'{fuzz}%',
                    filename]
         else:  # ffmpeg
-            cmd = [get_setting('FFMPEG_BINARY'), '-y',
-                   '-f', 'image2',
-                   '-framerate', str(fps),
-                   '-i', os.path.join(temp_dir, "frame%04d.png"),
-                   '-loop', str(loop),
-                   filename]
+            cmd = (FFMPEG_Command(overwrite=True)
+                   .add_input(os.path.join(temp_dir, "frame%04d.png"),
+                              f='image2', framerate=str(fps))
+                   .add_output(filename, loop=str(loop)))
 
         subprocess_call(cmd, logger=logger)
 
@@ -159,26 +158,21 @@ def write_gif(clip, filename, fps=None, program='ImageMagick', opt='OptimizeTran
                 subprocess_call(cmd, logger=logger)
     
     else:  # ffmpeg
-        cmd = [get_setting('FFMPEG_BINARY'), '-y',
-               '-f', 'rawvideo',
-               '-vcodec', 'rawvideo',
-               '-r', str(fps),
-               '-s', f'{clip.w}x{clip.h}',
-               '-pix_fmt', 'rgb24',
-               '-i', '-',
-               '-filter_complex', f'[0:v]split[x][z];[z]palettegen[y];[x][y]paletteuse',
-               '-r', str(fps),
-               '-f', 'gif',
-               '-loop', str(loop),
-               filename]
-        
-        proc = sp.Popen(cmd, stdin=sp.PIPE, stderr=sp.PIPE)
+        cmd = (FFMPEG_Command(overwrite=True)
+               .add_input('-', f='rawvideo', vcodec='rawvideo', r=str(fps),
+                          s=f'{clip.w}x{clip.h}', pix_fmt='rgb24')
+               .add_output(filename, r=str(fps), f='gif', loop=str(loop),
+                           filter_complex='[0:v]split[x][z];[z]palettegen[y];'
+                                          '[x][y]paletteuse'))
+
+        proc = FFMPEG_PROCESSES.popen(cmd, stdin=sp.PIPE, stderr=sp.PIPE)
         for frame in clip.iter_frames(fps=fps, logger=logger):
             proc.stdin.write(frame.tostring())
         proc.stdin.close()
-        proc.stderr.close()
-        if proc.wait():
-            raise IOError(proc.stderr.read().decode('utf8'))
+        error = proc.stderr.read()
+        proc.wait()
+        if FFMPEG_PROCESSES.release(proc):
+            raise IOError(error.decode('utf8'))
 
     logger(message='GIF ready')
 
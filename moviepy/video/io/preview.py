@@ -4,6 +4,7 @@ import numpy as np
 import pygame as pg
 from moviepy.decorators import convert_masks_to_RGB, requires_duration
 from moviepy.tools import cvsecs
+from moviepy.video.io.proxy import use_proxies
 pg.init()
 pg.display.set_caption('MoviePy')
 
@@ -109,7 +110,8 @@ def preview(clip, fps=15, audio=True, audio_fps=22050, audio_buffersize=3000, au
     t0 = time.time()
     playing = True
     while playing and (t := time.time() - t0) < clip.duration:
-        img = clip.get_frame(t)
+        with use_proxies():
+            img = clip.get_frame(t)
         imdisplay(img, screen)
         
         for event in pg.event.get():
@@ -0,0 +1,101 @@
+"""
+Proxy media: low-resolution, all-intra copies of video files, used
+instead of the sources to preview and iterate on heavy (4K, long-GOP)
+videos.
+
+A ``VideoFileClip`` created with ``proxy=True`` starts building a proxy
+of its file in a background ffmpeg process (unless it already exists).
+While proxies are enabled (during ``preview``, or in a
+``with use_proxies():`` block) and the proxy is ready, the frames of the
+clip are decoded from the proxy, which is much faster than decoding the
+source, and scaled back by ffmpeg to the size of the source. The clip
+keeps the size of the source, so the positions, crops and sizes used in
+the rest of the clip graph need no change. Exports with
+``ffmpeg_write_video`` always disable the proxies, so that the final
+file is rendered from the full-resolution sources.
+
+>>> clip = VideoFileClip("rush_4k.mp4", proxy=True)
+>>> edited = clip.subclip(10, 20).fx(vfx.crop, x1=1000, width=1920)
+>>> edited.preview()  # reads the proxy
+>>> edited.write_videofile("edit.mp4")  # reads the 4K source
+"""
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from moviepy.compat import DEVNULL
+from moviepy.video.io.ffmpeg_process import FFMPEG_PROCESSES, FFMPEG_Command
+
+PROXY_HEIGHT = 360
+
+# Whether the clips with a proxy read their frames from it.
+_PROXY_MODE = {'enabled': False}
+
+# Proxies being built, by filename: the threads waiting for ffmpeg.
+_BUILDING = {}
+
+def proxies_enabled():
+    """ Returns True if the clips with a proxy currently read it. """
+    return _PROXY_MODE['enabled']
+
+@contextmanager
+def use_proxies(enabled=True):
+    """ Context manager during which the clips with a proxy read their
+    frames from the proxy (or from the source if ``enabled=False``). """
+    previous = _PROXY_MODE['enabled']
+    _PROXY_MODE['enabled'] = enabled
+    try:
+        yield
+    finally:
+        _PROXY_MODE['enabled'] = previous
+
+def proxy_filename(filename, height=PROXY_HEIGHT, proxy_dir=None):
+    """ Returns the name of the proxy of ``filename``: next to the source
+    by default, or in ``proxy_dir``. The name contains a hash of the size
+    and modification time of the source (and of its path, in
+    ``proxy_dir``), so that a modified source gets a new proxy. """
+    stat = os.stat(filename)
+    version = '%d|%d' % (stat.st_size, stat.st_mtime_ns)
+    if proxy_dir is None:
+        name = hashlib.sha1(version.encode('utf8')).hexdigest()[:8]
+        return '%s.%s.proxy%d.mp4' % (os.path.splitext(filename)[0], name, height)
+    identity = '%s|%s' % (os.path.abspath(filename), version)
+    name = hashlib.sha1(identity.encode('utf8')).hexdigest()[:16]
+    return os.path.join(proxy_dir, '%s.proxy%d.mp4' % (name, height))
+
+def build_proxy(filename, height=PROXY_HEIGHT, proxy_dir=None, wait=False):
+    """ Starts building the proxy of ``filename`` (an all-intra H.264
+    file of the given height, without audio) in a background ffmpeg
+    process, if it doesn't exist yet. Returns the name of the proxy,
+    which only appears once complete. If ``wait`` is True, returns only
+    when the proxy is ready. """
+    target = proxy_filename(filename, height, proxy_dir)
+    if os.path.exists(target):
+        return target
+    if target not in _BUILDING:
+        if proxy_dir is not None:
+            os.makedirs(proxy_dir, exist_ok=True)
+        temp = target + '.part'
+        cmd = (FFMPEG_Command(overwrite=True)
+               .add_input(filename)
+               .add_output(temp, an=True, vf='scale=-2:%d' % height,
+                           vcodec='libx264', preset='ultrafast', g=1, crf=20,
+                           pix_fmt='yuv420p', f='mp4'))
+        proc = FFMPEG_PROCESSES.popen(cmd, stdout=DEVNULL, stderr=DEVNULL,
+                                      stdin=DEVNULL)
+
+        def finish():
+            proc.wait()
+            if FFMPEG_PROCESSES.release(proc) == 0:
+                os.replace(temp, target)
+            elif os.path.exists(temp):
+                os.remove(temp)
+            _BUILDING.pop(target, None)
+        thread = threading.Thread(target=finish, daemon=True)
+        _BUILDING[target] = thread
+        thread.start()
+    if wait:
+        thread = _BUILDING.get(target)
+        if thread is not None:
+            thread.join()
+    return target
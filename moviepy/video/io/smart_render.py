@@ -0,0 +1,266 @@
+"""
+Smart rendering: writing video files without re-encoding the parts of
+the clip which play a video file unchanged.
+
+Writing a clip with ``ffmpeg_write_video`` decodes and re-encodes all of
+its frames, even when the clip is only an edit (subclips, concatenations)
+of existing video files. ``smart_write_videofile`` finds the parts of the
+clip which play a video file unchanged and whose stream can be used as
+is in the output file: same codec and profile, pixel format, frame size,
+frame rate, time base and codec headers (``extradata``, which hold the
+level, for instance) as the stream written by the encoder, which is found
+by encoding one frame (see ``encoder_signature``). These parts are copied
+from the source file without re-encoding, like with ``ffmpeg -c copy``.
+Since a stream can only be cut at its keyframes, the frames between the
+start of such a part and the next keyframe of the source, and between the
+last keyframe and the end of the part, are rendered normally, like all
+the other parts of the clip. All the pieces start and end on frames of
+the output. The rendered and copied pieces are then joined with ffmpeg's
+concat demuxer.
+
+A clip plays a video file unchanged if it is a ``VideoFileClip`` (without
+mask), a subclip of such a clip, or a concatenation (with method 'chain')
+of such clips. Any other transformation of the frames (effects,
+compositions, resizing...) makes the clip rendered normally.
+"""
+import hashlib
+import math
+import os
+import re
+import shutil
+import tempfile
+import proglog
+from moviepy.tools import find_extension, subprocess_call
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+from moviepy.video.io.ffmpeg_tools import ffmpeg_keyframe_times
+from moviepy.video.io.ffmpeg_process import FFMPEG_PROCESSES, FFMPEG_Command
+from moviepy.video.io.ffmpeg_writer import ffmpeg_write_video
+
+def stream_signature(filename):
+    """ Returns what must be identical in two video streams for the one
+    to be copied in a file made of the other: the codec and its profile,
+    the pixel format, the frame size and the time base, as described by
+    ffmpeg, and a hash of the stream's header in a NUT file (without
+    metadata), which contains the codec's extradata. """
+    # (the description of the streams is written at the 'info' level)
+    cmd = (FFMPEG_Command(loglevel='info')
+           .add_input(filename)
+           .add_output("-", map="0:v:0", f="nut", fflags="+bitexact",
+                       map_metadata="-1",
+                       **{"c:v": "copy", "frames:v": "0",
+                          "map_metadata:s:v": "-1", "disposition:v": "0",
+                          "flags:v": "+bitexact"}))
+    returncode, header, error = FFMPEG_PROCESSES.run(cmd)
+    error = error.decode('utf8', 'replace')
+    if returncode:
+        raise IOError(error)
+    # the first description is the input stream's
+    description = re.search(r"Stream #0:\d+.*?: Video: (.*)", error).group(1)
+    fields, depth, start = [], 0, 0
+    for i, char in enumerate(description + ','):
+        depth += {'(': 1, ')': -1}.get(char, 0)
+        if char == ',' and depth == 0:
+            fields.append(description[start:i].strip())
+            start = i + 1
+    codec = re.sub(r" \([^()]*/ 0x[0-9a-f]+\)", "", fields[0])
+    size = next(f.split()[0] for f in fields[2:] if re.match(r"\d+x\d+", f))
+    time_base = re.search(r"([\d.]+k?) tbn", description)
+    return (codec, fields[1], size, time_base and time_base.group(1),
+            hashlib.md5(header).hexdigest())
+
+def encoder_signature(clip, fps, codec='libx264', ext=None, bitrate=None,
+                      preset='medium', ffmpeg_params=None):
+    """ Returns the ``stream_signature`` of the streams written for
+    ``clip`` by ``ffmpeg_write_video`` with these parameters, in a file
+    with extension ``ext`` (by default the extension of the codec), by
+    encoding its first frame. """
+    ext = find_extension(codec) if ext is None else ext.lstrip('.')
+    temp_dir = tempfile.mkdtemp()
+    try:
+        probe = os.path.join(temp_dir, 'probe.' + ext)
+        ffmpeg_write_video(clip.subclip(0, 0.5 / fps), probe, fps, codec=codec,
+                           bitrate=bitrate, preset=preset,
+                           ffmpeg_params=ffmpeg_params, logger=None)
+        return stream_signature(probe)
+    finally:
+        shutil.rmtree(temp_dir)
+
+def clip_sources(clip):
+    """ Returns the list of ``(t_start, t_end, source)`` describing the
+    timeline of ``clip``, where ``source`` is ``(filename, offset)`` if
+    the clip plays the video file ``filename`` from time ``offset``
+    between ``t_start`` and ``t_end``, else ``None``. """
+    timeline = getattr(clip.make_frame, 'timeline', None)
+    if timeline is not None:
+        tt, clips = timeline
+        result = []
+        for t, subclip in zip(tt, clips):
+            result += [(float(t + ta), float(t + tb), source)
+                       for ta, tb, source in clip_sources(subclip)]
+        return result
+    source = getattr(clip.make_frame, 'file_source', None)
+    return [(0, clip.duration, source)]
+
+def smart_render_plan(clip, fps, codec='libx264', signature=None):
+    """ Returns the list of the pieces to write for ``clip``, each piece
+    being either ``('render', t_start, t_end)`` for a part of the clip
+    which must be rendered, or ``('copy', filename, t_start, t_end)``
+    for a part of the stream of ``filename`` which can be copied as is.
+    All these times are times of frames: multiples of ``1/fps`` for the
+    rendered parts, times of keyframes of the source for the copies.
+
+    ``signature`` is the ``encoder_signature`` of the rendered parts,
+    by default with the default parameters of ``codec``. Only the source
+    files with this ``stream_signature`` can be copied.
+    """
+    signatures, keyframes = {}, {}
+    plan = []
+    for t_start, t_end, source in clip_sources(clip):
+        pieces = [('render', t_start, t_end)]
+        if source is not None:
+            filename, offset = source
+            if filename not in signatures:
+                infos = ffmpeg_parse_infos(filename)
+                if signature is None:
+                    signature = encoder_signature(clip, fps, codec)
+                signatures[filename] = (
+                    abs(infos['video_fps'] - fps) < 1e-3 and
+                    list(infos.get('video_size', [])) == list(clip.size) and
+                    stream_signature(filename) == signature)
+            if signatures[filename]:
+                if filename not in keyframes:
+                    keyframes[filename] = ffmpeg_keyframe_times(filename)
+                pieces = _split_at_keyframes(t_start, t_end, offset,
+                                             filename, keyframes[filename], fps)
+        for piece in pieces:
+            if piece[0] == 'render':
+                # starts and ends on frames of the output
+                piece = ('render', _frame_index(piece[1], fps) / fps,
+                         _frame_index(piece[2], fps) / fps)
+                if piece[2] - piece[1] < 0.5 / fps:
+                    continue
+                if plan and plan[-1][0] == 'render':
+                    piece = ('render', plan.pop()[1], piece[2])
+            plan.append(piece)
+    return plan
+
+def _frame_index(t, fps):
+    """ Returns the index of the first frame of the output at or after
+    time ``t``. """
+    return int(math.ceil(t * fps - 1e-5))
+
+def _split_at_keyframes(t_start, t_end, offset, filename, keyframes, fps):
+    """ Splits the part of the clip playing ``filename`` from ``offset``
+    between ``t_start`` and ``t_end`` into a rendered head, a copied
+    middle going from keyframe to keyframe, and a rendered tail.
+
+    The frame ``n`` of the output shows the frame ``n + shift`` of the
+    source (``VideoFileClip`` shows at time ``t`` the frame number
+    ``int(fps * t)``), so the copy of the source frames from keyframe
+    ``k`` starts at the frame ``k - shift`` of the output. """
+    shift = int(math.floor((offset - t_start) * fps + 1e-5))
+    n_start, n_end = _frame_index(t_start, fps), _frame_index(t_end, fps)
+    inside = [k for k in keyframes
+              if n_start <= int(round(k * fps)) - shift <= n_end]
+    if len(inside) < 2:
+        return [('render', t_start, t_end)]
+    k1, k2 = inside[0], inside[-1]
+    n1, n2 = (int(round(k * fps)) - shift for k in (k1, k2))
+    return [('render', n_start / fps, n1 / fps),
+            ('copy', filename, k1, k2),
+            ('render', n2 / fps, t_end)]
+
+def smart_write_videofile(clip, filename, fps=None, codec='libx264',
+                          bitrate=None, preset='medium', audio=True,
+                          audio_fps=44100, audio_codec=None, threads=None,
+                          ffmpeg_params=None, logger='bar'):
+    """ Writes the clip to a video file, copying the parts of the clip
+    which play a video file unchanged instead of re-encoding them. See
+    the module's docstring.
+
+    Parameters
+    -----------
+
+    filename
+      Name of the video file to write, with extension mp4, webm, ogv
+      or avi.
+
+    fps
+      Number of frames per second of the output. Defaults to ``clip.fps``.
+
+    codec
+      Codec used to encode the rendered parts of the clip. Only the
+      parts of the source files whose stream has the same ``signature``
+      as the rendered parts can be copied.
+
+    audio
+      Set to ``False`` to write the file without the clip's audio.
+
+    audio_fps, audio_codec
+      Frame rate and codec of the audio. The default codec is
+      'libvorbis' for webm and ogv files, 'libmp3lame' otherwise.
+
+    bitrate, preset, threads, ffmpeg_params, logger
+      Same as in ``ffmpeg_write_video``, for the rendered parts.
+
+    """
+    if fps is None:
+        fps = clip.fps
+    logger = proglog.default_bar_logger(logger)
+    name, ext = os.path.splitext(filename)
+    if audio_codec is None:
+        audio_codec = 'libvorbis' if ext[1:] in ['webm', 'ogv'] else 'libmp3lame'
+    temp_prefix = name + clip._TEMP_FILES_PREFIX
+    signature = encoder_signature(clip, fps, codec, ext, bitrate=bitrate,
+                                  preset=preset, ffmpeg_params=ffmpeg_params)
+    plan = smart_render_plan(clip, fps, codec, signature)
+    temp_files = []
+    try:
+        for i, piece in enumerate(plan):
+            piece_name = '%ssmart_%d%s' % (temp_prefix, i, ext)
+            temp_files.append(piece_name)
+            if piece[0] == 'render':
+                # ends half a frame early, to write exactly the frames
+                # from piece[1] to piece[2] (excluded)
+                subclip = clip.subclip(piece[1], piece[2] - 0.5 / fps)
+                ffmpeg_write_video(subclip, piece_name,
+                                   fps, codec=codec, bitrate=bitrate,
+                                   preset=preset, threads=threads,
+                                   ffmpeg_params=ffmpeg_params, logger=logger)
+            else:
+                logger(message='Moviepy - Copying %s from %.03f to %.03f'
+                       % piece[1:])
+                _, source, k1, k2 = piece
+                subprocess_call(FFMPEG_Command(overwrite=True)
+                                .add_input(source, ss="%.06f" % k1)
+                                .add_output(piece_name, map="0:v:0", an=True,
+                                            **{"frames:v": "%d" % round((k2 - k1) * fps),
+                                               "c:v": "copy"}),
+                                logger=None)
+        list_name = temp_prefix + 'smart_list.txt'
+        temp_files.append(list_name)
+        with open(list_name, 'w') as f:
+            for piece_name in temp_files[:-1]:
+                f.write("file '%s'\n" % os.path.abspath(piece_name).replace("'", "'\\''"))
+        cmd = (FFMPEG_Command(overwrite=True)
+               .add_input(list_name, f="concat", safe="0"))
+        output_options = {"c:v": "copy"}
+        if audio and clip.audio is not None:
+            audio_name = temp_prefix + 'smart_snd.wav'
+            temp_files.append(audio_name)
+            clip.audio.write_audiofile(audio_name, fps=audio_fps, logger=logger)
+            cmd.add_input(audio_name)
+            output_options["c:a"] = audio_codec
+            cmd.add_output(filename, extra_args=["-map", "0:v", "-map", "1:a"],
+                           **output_options)
+        else:
+            cmd.add_output(filename, **output_options)
+        logger(message='Moviepy - Joining %d pieces into %s'
+               % (len(plan), filename))
+        subprocess_call(cmd, logger=None)
+    finally:
+        for temp_file in temp_files:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+    logger(message='Moviepy - Done !')
+    return plan
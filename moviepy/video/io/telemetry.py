@@ -0,0 +1,124 @@
+"""
+Throughput telemetry of video exports.
+
+``ffmpeg_write_video`` records, for each exported frame, the time spent
+computing the frame and the time spent waiting for ffmpeg to accept it
+(the back-pressure of the encoder). Together with the decoding
+statistics of the video readers (which are reset at the start of each
+export, so exports run at the same time in several threads share them)
+and the memory usage of the process,
+these measures are regularly emitted as the ``export_stats`` state of
+the proglog logger of the export, and optionally appended as JSON lines
+to a log file:
+
+>>> ffmpeg_write_video(clip, "result.mp4", fps=24,
+...                    telemetry_file="export.jsonl")
+
+Each record has the fields:
+
+- ``frames``, ``total_frames``: frames written and to write.
+- ``fps``: frames written per second of wall time since the start.
+- ``render_time``: seconds spent computing the frames.
+- ``encode_wait_time``: seconds spent blocked writing frames to ffmpeg.
+- ``decode_time``: seconds spent reading frames from ffmpeg readers.
+- ``frames_decoded``: frames read from ffmpeg readers.
+- ``cache_hit_rate``: fraction of the requests to the readers served
+  without decoding (same frame as the previous request).
+- ``peak_rss``: peak resident memory of the process in bytes (None on
+  platforms without the ``resource`` module).
+- ``elapsed``, ``eta``: seconds since the start, and estimated seconds
+  remaining.
+"""
+import json
+import sys
+import time
+from moviepy.video.io.ffmpeg_reader import READER_STATS, reset_reader_stats
+try:
+    import resource
+    RESOURCE_FOUND = True
+except ImportError:
+    RESOURCE_FOUND = False
+
+def peak_rss():
+    """ Returns the peak resident memory of the process in bytes, or None
+    if it cannot be measured on this platform. """
+    if not RESOURCE_FOUND:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS gives bytes, the other platforms kilobytes
+    return rss if sys.platform == 'darwin' else 1024 * rss
+
+class ExportTelemetry:
+    """ Collects the throughput statistics of one export.
+
+    Parameters
+    -----------
+
+    total_frames
+      Number of frames of the export.
+
+    logger
+      The proglog logger of the export, whose ``export_stats`` state is
+      updated every ``interval`` seconds.
+
+    filename
+      If provided, a file to which the records are appended as JSON
+      lines every ``interval`` seconds, and at the end of the export.
+
+    interval
+      Minimal time in seconds between two records.
+
+    """
+
+    def __init__(self, total_frames, logger=None, filename=None, interval=1.0):
+        self.total_frames = total_frames
+        self.logger = logger
+        self.filename = filename
+        self.interval = interval
+        self.frames = 0
+        self.render_time = 0.0
+        self.encode_wait_time = 0.0
+        self.start_time = time.perf_counter()
+        self.last_emit = self.start_time
+        reset_reader_stats()
+
+    def add_frame(self, render_time, encode_wait_time):
+        """ Records one exported frame, and emits a record if the last one
+        is older than ``interval``. """
+        self.frames += 1
+        self.render_time += render_time
+        self.encode_wait_time += encode_wait_time
+        if time.perf_counter() - self.last_emit >= self.interval:
+            self.emit()
+
+    def stats(self):
+        """ Returns the current statistics, as a dict (see the module's
+        docstring for the fields). """
+        elapsed = time.perf_counter() - self.start_time
+        reader = dict(READER_STATS)
+        requests = reader['frames_decoded'] + reader['cache_hits']
+        fps = self.frames / elapsed if elapsed > 0 else None
+        remaining = max(0, self.total_frames - self.frames)
+        return {'frames': self.frames,
+                'total_frames': self.total_frames,
+                'fps': fps,
+                'render_time': self.render_time,
+                'encode_wait_time': self.encode_wait_time,
+                'decode_time': reader['decode_time'],
+                'frames_decoded': reader['frames_decoded'],
+                'cache_hit_rate': (reader['cache_hits'] / requests
+                                   if requests else None),
+                'peak_rss': peak_rss(),
+                'elapsed': elapsed,
+                'eta': remaining / fps if fps else None}
+
+    def emit(self):
+        """ Sends the current statistics to the logger and the log file. """
+        self.last_emit = time.perf_counter()
+        stats = self.stats()
+        if self.logger is not None:
+            self.logger(export_stats=stats)
+        if self.filename is not None:
+            with open(self.filename, 'a') as f:
+                f.write(json.dumps(stats) + '\n')
+        return stats
@@ -0,0 +1,332 @@
+"""
+Affine transformations of frames, drawn in one pass.
+
+Effects like ``rotate`` or ``margin``, and the positions of the clips in
+compositions, move the pixels of the frames: the point ``(x, y)`` of a
+frame goes to ``M.dot([x, y, 1])`` in the new frame, for a 3x3 matrix
+``M`` (products of ``translation``, ``scaling`` and ``rotation``). The
+coordinates are those of the corners of the pixels: the pixel of row
+``i`` and column ``j`` covers ``[j, j+1] x [i, i+1]``.
+
+Such effects are recorded as stages of an ``AffineWarp`` by
+``affine_fx``. When they are chained, the stages are fused: the frame of
+the last effect is computed from the original frame in one pass, by
+sampling the original frame (nearest pixel or bilinear interpolation)
+at the positions given by the inverse of the product of the matrices.
+The parts of the frame of each stage which are not covered by the
+previous frame show the background color of the stage.
+
+In a ``CompositeVideoClip`` even this frame is not computed: the
+original frame is drawn directly on the picture of the composition, at
+the position of the clip (see ``blit_clip``), which can be any
+(sub-pixel) position. Transformations which only move the frames by
+whole pixels (margins, integer positions) are copies of slices.
+"""
+import numpy as np
+
+from moviepy.video.tools.drawing import is_uniform
+from moviepy.video.tools.tiling import shared_frame
+
+def translation(x, y):
+    """ Matrix of the translation by ``(x, y)`` pixels. """
+    return np.array([[1, 0, x], [0, 1, y], [0, 0, 1]], dtype=float)
+
+def scaling(factor_x, factor_y=None):
+    """ Matrix of the scaling by ``factor_x`` horizontally and
+    ``factor_y`` (by default ``factor_x``) vertically. """
+    if factor_y is None:
+        factor_y = factor_x
+    return np.array([[factor_x, 0, 0], [0, factor_y, 0], [0, 0, 1]], dtype=float)
+
+def rotation(angle, unit='deg'):
+    """ Matrix of the rotation by ``angle`` counterclockwise (as seen on
+    the screen) around the point ``(0, 0)``. """
+    if unit == 'deg':
+        angle = np.radians(angle)
+    c, s = np.cos(angle), np.sin(angle)
+    return np.array([[c, s, 0], [-s, c, 0], [0, 0, 1]], dtype=float)
+
+def _offset(matrix):
+    """ Returns the ``(x, y)`` translation of the matrix, or None if it
+    is not a translation by whole pixels. """
+    if (matrix[:, :2] == np.eye(3)[:, :2]).all() and matrix[2, 2] == 1:
+        x, y = matrix[:2, 2]
+        if x == int(x) and y == int(y):
+            return int(x), int(y)
+    return None
+
+def _fill(region, values, alpha=1):
+    """ Blends ``values`` (a color or an array) with the opacity
+    ``alpha`` (a number or an array) on ``region``, in place. """
+    if np.ndim(alpha) == 0 and alpha == 1:
+        blended = values
+    else:
+        if np.ndim(alpha) and region.ndim == 3:
+            alpha = alpha[:, :, None]
+        blended = region + alpha * (np.asarray(values, dtype='float32') - region)
+    if region.dtype == 'uint8' and np.asarray(blended).dtype.kind == 'f':
+        blended = np.rint(blended)
+    region[...] = blended
+
+def _coordinates(inverse, xs, ys):
+    """ Positions, given by the inverse of the matrix of a picture, of
+    the centers ``(xs, ys)`` of the pixels of the canvas. """
+    (a, b, c), (d, e, f) = inverse[:2].astype('float32')
+    u = (a * xs)[None, :] + (b * ys + c)[:, None]
+    v = (d * xs)[None, :] + (e * ys + f)[:, None]
+    return u, v
+
+def _sample(picture, u, v, method):
+    """ Values of the picture at the positions ``(u, v)`` (flat arrays),
+    with the pixels of the borders repeated outside of the picture, as
+    an array of shape ``(n, nchannels)`` (or ``(n,)`` for masks). """
+    if is_uniform(picture):
+        return np.broadcast_to(picture[0, 0], u.shape + picture.shape[2:])
+    h, w = picture.shape[:2]
+    flat = picture.reshape((h * w,) + picture.shape[2:])
+    if method == 'nearest':
+        index = (np.clip(np.floor(v).astype('int32'), 0, h - 1) * w +
+                 np.clip(np.floor(u).astype('int32'), 0, w - 1))
+        return np.take(flat, index, axis=0)
+    u, v = u - 0.5, v - 0.5
+    iu, iv = np.floor(u), np.floor(v)
+    fu, fv = u - iu, v - iv
+    iu, iv = iu.astype('int32'), iv.astype('int32')
+    columns = [np.clip(iu, 0, w - 1), np.clip(iu + 1, 0, w - 1)]
+    rows = [np.clip(iv, 0, h - 1) * w, np.clip(iv + 1, 0, h - 1) * w]
+    result = None
+    for row, wv in zip(rows, [1 - fv, fv]):
+        for column, wu in zip(columns, [1 - fu, fu]):
+            weight = wu * wv
+            if picture.ndim == 3:
+                # one weight per value: faster than broadcasting
+                weight = np.repeat(weight, picture.shape[2]).reshape((-1, picture.shape[2]))
+            term = np.multiply(np.take(flat, row + column, axis=0), weight, out=weight)
+            result = term if result is None else np.add(result, term, out=result)
+    return result
+
+def warp_onto(canvas, picture, stages=(), mask=None, position=None, method='bilinear'):
+    """ Draws the picture transformed by the stages on the canvas (in
+    place), and returns the canvas.
+
+    Parameters
+    -----------
+
+    canvas
+      The picture to draw on, with as many channels as ``picture``.
+
+    stages
+      A list of ``(matrix, size, color, alpha)``: the first matrix moves
+      the picture into a frame of size ``size=(w, h)`` filled with
+      ``color`` with the opacity ``alpha``, the next matrix moves that
+      frame into the next one, etc. (see the module's docstring).
+
+    mask
+      The opacity of the pixels of the picture, if any.
+
+    position
+      Matrix moving the frame of the last stage (or the picture if there
+      are no stages) on the canvas.
+
+    method
+      Either ``'nearest'`` or ``'bilinear'``.
+
+    """
+    to_canvas = np.eye(3) if position is None else np.asarray(position, dtype=float)
+    levels = []
+    for matrix, size, color, alpha in reversed(stages):
+        levels.append((to_canvas, size, color, alpha))
+        to_canvas = to_canvas.dot(matrix)
+    if all(_offset(m) is not None for m in [to_canvas] + [l[0] for l in levels]):
+        return _warp_slices(canvas, picture, levels, to_canvas, mask)
+
+    # bounding box of the outermost frame on the canvas
+    if levels:
+        matrix, (w, h) = levels[0][:2]
+    else:
+        matrix, (h, w) = to_canvas, picture.shape[:2]
+    corners = matrix.dot([[0, w, 0, w], [0, 0, h, h], [1, 1, 1, 1]])
+    x1, y1 = [max(0, int(np.floor(c.min()))) for c in corners[:2]]
+    x2 = min(canvas.shape[1], int(np.ceil(corners[0].max())))
+    y2 = min(canvas.shape[0], int(np.ceil(corners[1].max())))
+    if x2 <= x1 or y2 <= y1:
+        return canvas
+    xs = np.arange(x1, x2, dtype='float32') + 0.5
+    ys = np.arange(y1, y2, dtype='float32') + 0.5
+    region = canvas[y1:y2, x1:x2]
+    nchannels = region.shape[2:]
+
+    # level of each pixel: k if it is in the k first frames from outside
+    level = np.zeros((y2 - y1) * (x2 - x1), dtype='uint8')
+    for k, (matrix, (w, h), color, alpha) in enumerate(levels):
+        u, v = [c.ravel() for c in _coordinates(np.linalg.inv(matrix), xs, ys)]
+        level += (u >= 0) & (u < w) & (v >= 0) & (v < h) & (level == k)
+    colors = np.array([np.zeros(nchannels)] + [np.broadcast_to(l[2], nchannels)
+                                               for l in levels], dtype='float32')
+    alphas = np.array([0] + [l[3] for l in levels], dtype='float32')
+
+    # the picture, with its borders antialiased by the bilinear method
+    u, v = [c.ravel() for c in _coordinates(np.linalg.inv(to_canvas), xs, ys)]
+    h, w = picture.shape[:2]
+    if method == 'nearest':
+        coverage = ((u >= 0) & (u < w) & (v >= 0) & (v < h)).astype('float32')
+    else:
+        coverage = (np.clip(np.minimum(u, w - u) + 0.5, 0, 1) *
+                    np.clip(np.minimum(v, h - v) + 0.5, 0, 1))
+    if levels:
+        coverage[level < len(levels)] = 0
+    values = _sample(picture, u, v, method)
+    opacity = 1 if mask is None else _sample(mask, u, v, method)
+
+    # the pixels not fully covered by the picture show the frames
+    partial = np.nonzero(coverage < 1)[0]
+    opaque = mask is None and (alphas[1:] == 1).all() and (level[partial] > 0).all()
+    if len(partial):
+        values = np.array(values, dtype='float32')
+        c, k = coverage[partial], level[partial]
+        # outside of all frames, the color is the picture's, made transparent
+        c_color = np.where(k > 0, c, 1)
+        if values.ndim == 2:
+            c_color = c_color[:, None]
+        values[partial] = colors[k] + c_color * (values[partial] - colors[k])
+        if not opaque:
+            opacity = np.array(np.broadcast_to(opacity, coverage.shape), dtype='float32')
+            opacity[partial] = alphas[k] + c * (opacity[partial] - alphas[k])
+    values = values.reshape(region.shape)
+    if opaque:
+        _fill(region, values)
+    else:
+        _fill(region, values, np.reshape(opacity, region.shape[:2]) if np.ndim(opacity) else opacity)
+    return canvas
+
+def _warp_slices(canvas, picture, levels, to_canvas, mask):
+    """ ``warp_onto`` for translations by whole pixels. """
+    x1, y1, x2, y2 = 0, 0, canvas.shape[1], canvas.shape[0]
+    for matrix, (w, h), color, alpha in levels + [(to_canvas, picture.shape[1::-1], None, None)]:
+        x, y = _offset(matrix)
+        x1, y1, x2, y2 = max(x1, x), max(y1, y), min(x2, x + w), min(y2, y + h)
+        if x2 <= x1 or y2 <= y1:
+            return canvas
+        if color is not None:
+            _fill(canvas[y1:y2, x1:x2], color, alpha)
+    crop = (slice(y1 - y, y2 - y), slice(x1 - x, x2 - x))
+    _fill(canvas[y1:y2, x1:x2], picture[crop], 1 if mask is None else mask[crop])
+    return canvas
+
+class AffineWarp:
+    """ The frames given by ``get_frame`` transformed by a list of stages
+    ``(matrix, size, color)``, where ``matrix`` and ``size`` are
+    functions of the time and of the size of the frame they transform.
+    See ``affine_fx``. """
+
+    def __init__(self, get_frame, stages, method='bilinear'):
+        self.get_frame = get_frame
+        self.stages = stages
+        self.method = method
+
+    def stages_at(self, t, picture):
+        """ The list of the ``(matrix, size, color)`` at time ``t``, for
+        the frame ``picture`` given by ``get_frame``. """
+        result = []
+        frame_size = picture.shape[1::-1]
+        for matrix, size, color in self.stages:
+            result.append((matrix(t, frame_size), size(t, frame_size), color))
+            frame_size = tuple(result[-1][1])
+        return result
+
+    def __call__(self, t):
+        return self.region(t)
+
+    def region(self, t, roi=None):
+        """ The region ``roi=(x1, y1, x2, y2)`` (by default the whole
+        frame) of the frame at time ``t``. Only its pixels are computed. """
+        picture = shared_frame(self.get_frame, t)
+        stages = [s + (1,) for s in self.stages_at(t, picture)]
+        x1, y1, x2, y2 = (0, 0) + tuple(stages[-1][1]) if roi is None else roi
+        canvas = np.empty((y2 - y1, x2 - x1) + picture.shape[2:], dtype=picture.dtype)
+        return warp_onto(canvas, picture, stages, position=translation(-x1, -y1),
+                         method=self.method)
+
+def affine_fx(clip, matrix, size=None, method='bilinear', bg_color=None):
+    """ Applies an affine transformation to the frames of a clip.
+
+    Returns a new clip whose frames of size ``size`` show the frames of
+    ``clip`` moved by ``matrix``, on a background of color ``bg_color``.
+    If ``clip`` is itself the result of ``affine_fx``, the
+    transformation is fused with the previous ones (see the module's
+    docstring).
+
+    Parameters
+    -----------
+
+    matrix
+      A 3x3 matrix (see ``translation``, ``scaling``, ``rotation``), or
+      a function ``(t, (w, h)) -> matrix`` of the time and of the size of
+      the frame of ``clip`` at that time.
+
+    size
+      The size ``(w, h)`` of the new frames, or a function
+      ``(t, (w, h)) -> (w, h)``. By default, the size of the clip.
+
+    method
+      Either ``'nearest'`` or ``'bilinear'``.
+
+    bg_color
+      Color of the parts of the new frames not covered by the frames of
+      the clip, by default black (0 for masks).
+
+    """
+    if size is None:
+        size = tuple(clip.size)
+    if bg_color is None:
+        bg_color = 0 if clip.ismask else (0, 0, 0)
+    stage = (matrix if callable(matrix) else (lambda t, frame_size: matrix),
+             size if callable(size) else (lambda t, frame_size: size), bg_color)
+    if clip.constant and not (callable(matrix) or callable(size)):
+        # ImageClip.fl_image transforms the picture once and for all.
+        return clip.fl_image(lambda pic: AffineWarp(lambda t: pic, [stage], method)(0))
+    previous = getattr(clip.make_frame, 'affine', None)
+    if previous is None:
+        warp = AffineWarp(clip.get_frame, [stage], method)
+    else:
+        warp = AffineWarp(previous.get_frame, previous.stages + [stage], method)
+    new_clip = clip.fl(lambda gf, t: warp(t))
+    new_clip.make_frame.affine = warp
+    new_clip.make_frame.region = warp.region
+    new_clip.size = tuple(stage[1](0, tuple(clip.size)))
+    if callable(size) or not clip.has_constant_size:
+        new_clip.has_constant_size = False
+    return new_clip
+
+def blit_clip(clip, picture, t, pos):
+    """ Draws the frame of ``clip`` at time ``t`` on ``picture`` at the
+    position ``pos`` (in place) if the clip is made with ``affine_fx`` or
+    if the position is not in whole pixels, and returns the picture.
+    Returns None for the other clips, which are blitted as usual (see
+    ``VideoClip.blit_on``). """
+    position = translation(*pos)
+    warp = getattr(clip.make_frame, 'affine', None)
+    if warp is None:
+        if _offset(position) is not None:
+            return None
+        mask = None if clip.mask is None else shared_frame(clip.mask.get_frame, t)
+        return warp_onto(picture, shared_frame(clip.get_frame, t), mask=mask,
+                         position=position)
+    frame = shared_frame(warp.get_frame, t)
+    stages = warp.stages_at(t, frame)
+    if clip.mask is None:
+        mask, alphas = None, [1] * len(stages)
+    else:
+        mask_warp = getattr(clip.mask.make_frame, 'affine', None)
+        if mask_warp is None:
+            return None
+        mask = shared_frame(mask_warp.get_frame, t)
+        mask_stages = mask_warp.stages_at(t, mask)
+        if len(mask_stages) != len(stages) or not all(
+                np.allclose(m1, m2) and tuple(s1) == tuple(s2)
+                for (m1, s1, c1), (m2, s2, c2) in zip(stages, mask_stages)):
+            return None
+        alphas = [s[2] for s in mask_stages]
+    stages = [s + (a,) for s, a in zip(stages, alphas)]
+    return warp_onto(picture, frame, stages, mask=mask,
+                     position=position, method=warp.method)
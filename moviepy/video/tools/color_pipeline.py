@@ -0,0 +1,167 @@
+"""
+Fused point-wise color transformations.
+
+Effects like ``colorx``, ``gamma_corr``, ``lum_contrast``,
+``invert_colors``, ``blackwhite``, ``fadein`` or ``fadeout`` transform
+each pixel value independently of the others. Instead of computing each
+of them on the whole frame (in floats), they are recorded as stages of a
+color pipeline by ``color_fx``. When such effects are chained, the stages
+are fused: the transformations of the 256 possible values of a channel
+are composed into a single lookup table, which is applied once to the
+uint8 frame. The values are clipped to 0-255 and rounded between the
+stages, as they would be by applying the effects one after the other,
+so that the fused effects give the same frames (``colorx(2)`` then
+``colorx(0.5)`` saturates the bright pixels). Color-mixing stages (3x3
+matrices, like in ``blackwhite``) split the pipeline in lookup tables
+applied before and after the matrix.
+
+The lookup tables of a pipeline are computed once, unless some stage
+depends on the time, in which case they are recomputed (which is cheap,
+compared to a frame) for each frame.
+"""
+import threading
+import numpy as np
+
+_VALUES = np.arange(256, dtype=float).reshape((256, 1))
+
+def color_fx(clip, func=None, matrix=None, time_dependent=False):
+    """ Applies a point-wise color transformation to a clip.
+
+    Returns a new clip, whose frames are the frames of ``clip``
+    transformed by either ``func`` or ``matrix``. If ``clip`` is itself
+    the result of ``color_fx``, the transformation is fused with the
+    previous ones instead of being applied to the previous result.
+
+    Parameters
+    -----------
+
+    func
+      A function ``(values, t) -> new_values`` which transforms pixel
+      values (in 0-255 for RGB clips, 0-1 for masks). ``values`` can be
+      an array of any shape whose last axis is the color channels (or of
+      size 1), and ``func`` must use numpy operations only. Returning
+      ``None`` means that the values are left unchanged at time ``t``.
+
+    matrix
+      A 3x3 array ``M`` such that a pixel ``[r, g, b]`` becomes
+      ``M.dot([r, g, b])``.
+
+    time_dependent
+      Set to ``True`` if ``func`` depends on ``t``.
+
+    """
+    stage = (func, None if matrix is None else np.array(matrix, dtype=float),
+             time_dependent)
+    if clip.constant and not time_dependent:
+        # ImageClip.fl_image transforms the picture once and for all.
+        return clip.fl_image(lambda pic: ColorPipeline(lambda t: pic, [stage])(0))
+    previous = getattr(clip.make_frame, 'color_pipeline', None)
+    if previous is None:
+        pipeline = ColorPipeline(clip.get_frame, [stage], clip.get_region)
+    else:
+        pipeline = ColorPipeline(previous.get_frame, previous.stages + [stage],
+                                 previous.get_region)
+    new_clip = clip.fl(lambda gf, t: pipeline(t))
+    new_clip.make_frame.color_pipeline = pipeline
+    if getattr(clip.make_frame, 'region', None) is not None:
+        new_clip.make_frame.region = pipeline.region
+    return new_clip
+
+class ColorPipeline:
+    """ A sequence of point-wise color stages applied to the frames
+    given by ``get_frame`` (and to their regions given by
+    ``get_region``). See ``color_fx``. """
+
+    def __init__(self, get_frame, stages, get_region=None):
+        self.get_frame = get_frame
+        self.get_region = get_region
+        self.stages = stages
+        self.time_dependent = any(s[2] for s in stages)
+        self.compiled = None
+        self.lock = threading.Lock()
+
+    def __call__(self, t):
+        return self.apply(self.get_frame(t), t)
+
+    def region(self, t, roi):
+        """ The region ``roi`` of the frame at time ``t``, computed from
+        the same region of the frame given by ``get_region``. """
+        return self.apply(self.get_region(t, roi), t)
+
+    def apply(self, frame, t):
+        """ Applies the stages to ``frame``, the frame (or a region of
+        the frame) at time ``t``. """
+        if frame.dtype != 'uint8':
+            return self.apply_float(frame, t)
+        if self.time_dependent:
+            compiled = self.compile(t)
+        else:
+            # the tiles of a frame are computed in several threads
+            with self.lock:
+                if self.compiled is None:
+                    self.compiled = self.compile(t)
+            compiled = self.compiled
+        for kind, data in compiled:
+            if kind == 'lut':
+                frame = apply_lut(frame, data)
+            else:
+                frame = apply_matrix(frame, data)
+        return frame
+
+    def compile(self, t):
+        """ Returns the list of the ``('lut', lut)`` and ``('matrix', M)``
+        operations to apply to uint8 frames at time ``t``, where all the
+        consecutive functions are fused into one lookup table. The values
+        are clipped and rounded after each function, like uint8 frames. """
+        operations = []
+        values = None
+        for func, matrix, time_dependent in self.stages:
+            if func is not None:
+                new_values = func(_VALUES if values is None else values, t)
+                if new_values is not None:
+                    values = np.round(np.clip(np.broadcast_to(
+                        new_values, (256, np.shape(new_values)[-1])), 0, 255))
+            else:
+                if values is not None:
+                    operations.append(('lut', _to_lut(values)))
+                    values = None
+                operations.append(('matrix', matrix))
+        if values is not None:
+            operations.append(('lut', _to_lut(values)))
+        return operations
+
+    def apply_float(self, frame, t):
+        """ Applies the stages one after the other, without lookup
+        tables, to frames which are not uint8 (masks for instance). """
+        for func, matrix, time_dependent in self.stages:
+            if func is not None:
+                new_frame = func(frame, t)
+                if new_frame is not None:
+                    frame = new_frame
+            else:
+                frame = np.dot(frame, matrix.T)
+        return frame
+
+def _to_lut(values):
+    """ Rounds transformed values into a (256, nchannels) uint8 table.
+    Tables identical for all channels are reduced to one column. """
+    lut = np.round(np.clip(values, 0, 255)).astype('uint8')
+    if (lut == lut[:, :1]).all():
+        lut = lut[:, :1]
+    return np.ascontiguousarray(lut)
+
+def apply_lut(frame, lut):
+    """ Returns the uint8 frame whose values are ``lut[value, channel]``,
+    for a lookup table with one column per channel or a single column
+    shared by all channels. """
+    if lut.shape[1] == 1:
+        return np.take(lut[:, 0], frame)
+    result = np.empty_like(frame)
+    for i in range(frame.shape[2]):
+        result[:, :, i] = np.take(lut[:, i], frame[:, :, i])
+    return result
+
+def apply_matrix(frame, matrix):
+    """ Mixes the color channels of a uint8 frame with a 3x3 matrix. """
+    result = np.dot(frame.astype('float32'), matrix.T.astype('float32'))
+    return np.round(np.clip(result, 0, 255)).astype('uint8')
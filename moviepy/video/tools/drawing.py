@@ -1,8 +1,25 @@
 """
 This module deals with making images (np arrays). It provides drawing
 methods that are difficult to do with the existing Python libraries.
+
+The gradients, splits and circles are computed from the coordinates of
+the columns and of the rows of the picture (1D arrays): linear
+gradients and splits are sums of a function of x and a function of y,
+and circles are only computed in the square around them. The distances
+to the pixels used by circles and circular gradients centered on a
+pixel are slices of a field cached per picture size
+(``distance_field``), so animating them (a growing circle, a vignette,
+a wipe...) only costs a few operations on arrays per frame. The
+pictures are float arrays of the ``FLOAT_DTYPE`` setting by default,
+and a region ``roi=(x1, y1, x2, y2)`` of them can be drawn alone.
 """
+from collections import OrderedDict
 import numpy as np
+from moviepy.config import get_setting
+
+# Distance fields, by (width, height, dtype), see ``distance_field``.
+DISTANCE_FIELDS = OrderedDict()
+DISTANCE_FIELDS_SIZE = 4
 
 def blit(im1, im2, pos=None, mask=None, ismask=False):
     """ Blit an image over another.
@@ -10,9 +27,19 @@ def blit(im1, im2, pos=None, mask=None, ismask=False):
     Blits ``im1`` on ``im2`` as position ``pos=(x,y)``, using the
     ``mask`` if provided. If ``im1`` and ``im2`` are mask pictures
     (2D float arrays) then ``ismask`` must be ``True``.
+
+    Masks which are uniform broadcast arrays (like the frames of a
+    ``ColorClip``) are recognised: a fully opaque mask is ignored and a
+    fully transparent mask leaves ``im2`` untouched.
     """
     if pos is None:
         pos = (0, 0)
+
+    if mask is not None and is_uniform(mask):
+        if mask.flat[0] == 1:
+            mask = None
+        elif mask.flat[0] == 0:
+            return im2
     
     h1, w1 = im1.shape[:2]
     h2, w2 = im2.shape[:2]
@@ -32,12 +59,80 @@ def blit(im1, im2, pos=None, mask=None, ismask=False):
         if mask is None:
             im2[y:y+h, x:x+w] = im1[:h, :w]
         else:
-            mask = np.dstack((mask, mask, mask)) if im1.ndim == 3 else mask
+            mask = mask[:, :, None] if im1.ndim == 3 else mask
             im2[y:y+h, x:x+w] = (1 - mask[:h, :w]) * im2[y:y+h, x:x+w] + mask[:h, :w] * im1[:h, :w]
 
     return im2
 
-def color_gradient(size, p1, p2=None, vector=None, r=None, col1=0, col2=1.0, shape='linear', offset=0):
+def is_uniform(im):
+    """ Returns True if ``im`` is a picture whose pixels are all one
+    same value broadcast in memory (``np.broadcast_to``), as in the
+    frames of ``ColorClip``. This check is free, unlike ``im.min()``. """
+    return im.size > 0 and all(s == 0 for s in im.strides[:2])
+
+def distance_field(size, dtype=None):
+    """ Returns the array of the distances of the pixels of a picture
+    of shape ``(2*h-1, 2*w-1)`` to its center ``(w-1, h-1)``, for
+    pictures of size ``size=(w, h)``: the distances from the pixel
+    ``(cx, cy)`` of such a picture are the slice
+    ``field[h-1-cy:2*h-1-cy, w-1-cx:2*w-1-cx]``.
+
+    The last fields computed are kept (``DISTANCE_FIELDS_SIZE`` of
+    them). They are read-only.
+    """
+    w, h = size
+    dtype = np.dtype(get_setting('FLOAT_DTYPE') if dtype is None else dtype)
+    key = (w, h, dtype)
+    if key in DISTANCE_FIELDS:
+        DISTANCE_FIELDS.move_to_end(key)
+        return DISTANCE_FIELDS[key]
+    xs = np.arange(1 - w, w, dtype=dtype) ** 2
+    ys = np.arange(1 - h, h, dtype=dtype) ** 2
+    field = np.sqrt(ys[:, None] + xs[None, :])
+    field.flags.writeable = False
+    DISTANCE_FIELDS[key] = field
+    while len(DISTANCE_FIELDS) > DISTANCE_FIELDS_SIZE:
+        DISTANCE_FIELDS.popitem(last=False)
+    return field
+
+def _roi(size, roi):
+    """ Returns the region ``(x1, y1, x2, y2)`` of the picture drawn. """
+    w, h = size
+    return (0, 0, int(w), int(h)) if roi is None else tuple(int(v) for v in roi)
+
+def _distances(size, center, x1, y1, x2, y2, dtype):
+    """ Distances from ``center`` to the pixels of the region, a slice
+    of the distance field if ``center`` is a pixel of the picture. """
+    w, h = size
+    cx, cy = center
+    if (float(cx).is_integer() and float(cy).is_integer() and
+            0 <= cx < w and 0 <= cy < h):
+        cx, cy = int(cx), int(cy)
+        return distance_field(size, dtype)[y1 - cy + h - 1:y2 - cy + h - 1,
+                                           x1 - cx + w - 1:x2 - cx + w - 1]
+    xs = (np.arange(x1, x2, dtype=dtype) - cx) ** 2
+    ys = (np.arange(y1, y2, dtype=dtype) - cy) ** 2
+    return np.sqrt(ys[:, None] + xs[None, :])
+
+def _colorize(t, col1, col2, shape, dtype):
+    """ Returns the picture of the given shape whose pixels have the
+    color ``col1 * (1 - t) + col2 * t`` (``t`` is broadcast). """
+    if isinstance(col1, (int, float)) and isinstance(col2, (int, float)):
+        img = np.empty(shape[:2], dtype=dtype)
+        np.multiply(t, col2 - col1, out=img, casting='unsafe')
+        img += col1
+        return img
+    col1 = np.asarray(col1, dtype=dtype)
+    col2 = np.asarray(col2, dtype=dtype)
+    img = np.empty(shape[:2] + (len(col1),), dtype=dtype)
+    # (channel by channel, faster than broadcasting along the last axis)
+    for i in range(len(col1)):
+        channel = np.multiply(t, col2[i] - col1[i], dtype=dtype)
+        channel += col1[i]
+        img[..., i] = channel
+    return img
+
+def color_gradient(size, p1, p2=None, vector=None, r=None, col1=0, col2=1.0, shape='linear', offset=0, dtype=None, roi=None):
     """Draw a linear, bilinear, or radial gradient.
     
     The result is a picture of size ``size``, whose color varies
@@ -85,13 +180,21 @@ def color_gradient(size, p1, p2=None, vector=None, r=None, col1=0, col2=1.0, sha
         If the offset is 0.9 in a radial gradient, the gradient will
         occur in the region located between 90% and 100% of the radius,
         this creates a blurry disc of radius d(p1,p2).  
+
+    dtype
+        Float type of the picture, by default the ``FLOAT_DTYPE``
+        setting.
+
+    roi
+        Region ``(x1, y1, x2, y2)`` of the picture to draw, if only a
+        part of it is needed.
     
     Returns
     --------
     
     image
-        An Numpy array of dimensions (W,H,ncolors) of type float
-        representing the image of the gradient.
+        An Numpy array of dimensions (H,W,ncolors) of type float
+        representing the image of the gradient (of the ``roi``).
         
     
     Examples
@@ -101,46 +204,48 @@ def color_gradient(size, p1, p2=None, vector=None, r=None, col1=0, col2=1.0, sha
     
     """
     w, h = size
+    dtype = np.dtype(get_setting('FLOAT_DTYPE') if dtype is None else dtype)
+    x1, y1, x2, y2 = _roi(size, roi)
+    xs = np.arange(x1, x2, dtype=dtype)
+    ys = np.arange(y1, y2, dtype=dtype)
     
     if vector is not None:
         p2 = (p1[0] + vector[0], p1[1] + vector[1])
     
     if shape == 'linear':
-        X, Y = np.meshgrid(np.arange(w), np.arange(h))
         if p2 is None:
             p2 = (w-1, h-1)
         
         vector = (p2[0] - p1[0], p2[1] - p1[1])
         norm = np.sqrt(vector[0]**2 + vector[1]**2)
         
-        t = ((X - p1[0])*vector[0] + (Y - p1[1])*vector[1]) / (norm**2)
-        t = np.clip((t - offset) / (1 - offset), 0, 1)
+        # t is the sum of a function of x and of a function of y
+        scale = 1.0 / (norm**2 * (1 - offset))
+        tx = (xs - p1[0]) * (vector[0] * scale) - offset / (1 - offset)
+        ty = (ys - p1[1]) * (vector[1] * scale)
+        t = ty[:, None] + tx[None, :]
         
     elif shape == 'bilinear':
-        X, Y = np.meshgrid(np.arange(w), np.arange(h))
-        tx = np.abs(X - p1[0]) / w
-        ty = np.abs(Y - p1[1]) / h
-        t = np.maximum(tx, ty)
-        t = np.clip((t - offset) / (1 - offset), 0, 1)
+        tx = np.abs(xs - p1[0]) / w
+        ty = np.abs(ys - p1[1]) / h
+        t = np.maximum(ty[:, None], tx[None, :])
+        t -= offset
+        t /= 1 - offset
         
     elif shape == 'circular':
-        X, Y = np.meshgrid(np.arange(w), np.arange(h))
         if r is None:
             r = np.sqrt((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2)
-        t = np.sqrt((X - p1[0])**2 + (Y - p1[1])**2) / r
-        t = np.clip((t - offset) / (1 - offset), 0, 1)
+        t = np.multiply(_distances(size, p1, x1, y1, x2, y2, dtype),
+                        1.0 / (r * (1 - offset)), dtype=dtype)
+        t -= offset / (1 - offset)
     
     else:
         raise ValueError("shape must be 'linear', 'bilinear', or 'circular'")
 
-    if isinstance(col1, (int, float)) and isinstance(col2, (int, float)):
-        return col1 * (1-t) + col2 * t
-    else:
-        col1 = np.array(col1)
-        col2 = np.array(col2)
-        return np.dstack([col1[i] * (1-t) + col2[i] * t for i in range(len(col1))])
+    np.clip(t, 0, 1, out=t)
+    return _colorize(t, col1, col2, t.shape, dtype)
 
-def color_split(size, x=None, y=None, p1=None, p2=None, vector=None, col1=0, col2=1.0, grad_width=0):
+def color_split(size, x=None, y=None, p1=None, p2=None, vector=None, col1=0, col2=1.0, grad_width=0, dtype=None, roi=None):
     """Make an image splitted in 2 colored regions.
     
     Returns an array of size ``size`` divided in two regions called 1 and
@@ -172,6 +277,9 @@ def color_split(size, x=None, y=None, p1=None, p2=None, vector=None, col1=0, col
         If not zero, the split is not sharp, but gradual over a region of
         width ``gradient_width`` (in pixels). This is preferable in many
         situations (for instance for antialiasing). 
+
+    dtype, roi
+        See ``color_gradient``.
      
     
     Examples
@@ -187,32 +295,20 @@ def color_split(size, x=None, y=None, p1=None, p2=None, vector=None, col1=0, col
             
     """
     w, h = size
-    shape = (h, w) if isinstance(col1, (int, float)) else (h, w, len(col1))
-    img = np.zeros(shape)
+    dtype = np.dtype(get_setting('FLOAT_DTYPE') if dtype is None else dtype)
+    x1, y1, x2, y2 = _roi(size, roi)
     
-    if x is not None:
+    if x is not None or y is not None:
+        # t only varies along one axis
+        split, length = (x, w) if x is not None else (y, h)
+        t = np.zeros(length, dtype=dtype)
         if grad_width == 0:
-            img[:, :x] = col1
-            img[:, x:] = col2
+            t[split:] = 1
         else:
-            img[:, :x-grad_width//2] = col1
-            img[:, x+grad_width//2:] = col2
+            t[split+grad_width//2:] = 1
             if grad_width > 0:
-                grad = np.linspace(0, 1, grad_width)
-                for i in range(grad_width):
-                    img[:, x-grad_width//2+i] = col1 * (1-grad[i]) + col2 * grad[i]
-    
-    elif y is not None:
-        if grad_width == 0:
-            img[:y, :] = col1
-            img[y:, :] = col2
-        else:
-            img[:y-grad_width//2, :] = col1
-            img[y+grad_width//2:, :] = col2
-            if grad_width > 0:
-                grad = np.linspace(0, 1, grad_width)
-                for i in range(grad_width):
-                    img[y-grad_width//2+i, :] = col1 * (1-grad[i]) + col2 * grad[i]
+                t[split - grad_width//2 + np.arange(grad_width)] = np.linspace(0, 1, grad_width)
+        t = t[None, x1:x2] if x is not None else t[y1:y2, None]
     
     elif p1 and (p2 or vector):
         if vector:
@@ -221,58 +317,52 @@ def color_split(size, x=None, y=None, p1=None, p2=None, vector=None, col1=0, col
         normal = np.array([-(p2[1] - p1[1]), p2[0] - p1[0]])
         normal = normal / np.linalg.norm(normal)
         
-        X, Y = np.meshgrid(np.arange(w), np.arange(h))
-        pos = np.dstack([X, Y])
-        dist = np.dot(pos - p1, normal)
-        
+        # signed distance to the line, shifted by half the gradient
+        dx = (np.arange(x1, x2, dtype=dtype) - p1[0]) * normal[0]
+        dy = (np.arange(y1, y2, dtype=dtype) - p1[1]) * normal[1]
         if grad_width == 0:
-            img[dist <= 0] = col1
-            img[dist > 0] = col2
+            t = (dy[:, None] + dx[None, :]) > 0
         else:
-            img[dist <= -grad_width/2] = col1
-            img[dist > grad_width/2] = col2
-            mask = (dist > -grad_width/2) & (dist <= grad_width/2)
-            grad = (dist[mask] + grad_width/2) / grad_width
-            if isinstance(col1, (int, float)):
-                img[mask] = col1 * (1-grad) + col2 * grad
-            else:
-                for i in range(len(col1)):
-                    img[mask, i] = col1[i] * (1-grad) + col2[i] * grad
+            t = dy[:, None] + (dx + grad_width / 2)[None, :]
+            t /= grad_width
+            np.clip(t, 0, 1, out=t)
     
     else:
         raise ValueError("You must provide either x, y, or p1 and (p2 or vector)")
     
-    return img
+    return _colorize(t, col1, col2, (y2 - y1, x2 - x1), dtype)
 
-def circle(screensize, center, radius, col1=1.0, col2=0, blur=1):
+def circle(screensize, center, radius, col1=1.0, col2=0, blur=1, dtype=None, roi=None):
     """ Draw an image with a circle.
     
     Draws a circle of color ``col1``, on a background of color ``col2``,
     on a screen of size ``screensize`` at the position ``center=(x,y)``,
     with a radius ``radius`` but slightly blurred on the border by ``blur``
-    pixels
+    pixels. See ``color_gradient`` for ``dtype`` and ``roi``.
     """
-    w, h = screensize
-    shape = (h, w) if isinstance(col1, (int, float)) else (h, w, len(col1))
-    img = np.full(shape, col2)
-    
-    Y, X = np.ogrid[:h, :w]
-    dist_from_center = np.sqrt((X - center[0])**2 + (Y-center[1])**2)
+    dtype = np.dtype(get_setting('FLOAT_DTYPE') if dtype is None else dtype)
+    x1, y1, x2, y2 = _roi(screensize, roi)
+    shape = (y2 - y1, x2 - x1) if isinstance(col1, (int, float)) else (y2 - y1, x2 - x1, len(col1))
+    img = np.empty(shape, dtype=dtype)
+    img[...] = col2
+    
+    # only the square around the circle and its border is drawn
+    reach = radius + blur
+    bx1 = max(x1, int(np.floor(center[0] - reach)))
+    bx2 = min(x2, int(np.ceil(center[0] + reach)) + 1)
+    by1 = max(y1, int(np.floor(center[1] - reach)))
+    by2 = min(y2, int(np.ceil(center[1] + reach)) + 1)
+    if bx2 <= bx1 or by2 <= by1:
+        return img
+    dist_from_center = _distances(screensize, center, bx1, by1, bx2, by2, dtype)
     
     if blur == 0:
-        mask = dist_from_center <= radius
-        img[mask] = col1
+        t = dist_from_center <= radius
     else:
-        inner_circle = dist_from_center <= (radius - blur)
-        img[inner_circle] = col1
-        
-        blur_zone = (dist_from_center > (radius - blur)) & (dist_from_center < (radius + blur))
-        blur_factor = (radius + blur - dist_from_center[blur_zone]) / (2 * blur)
-        
-        if isinstance(col1, (int, float)):
-            img[blur_zone] = col1 * blur_factor + col2 * (1 - blur_factor)
-        else:
-            for i in range(len(col1)):
-                img[blur_zone, i] = col1[i] * blur_factor + col2[i] * (1 - blur_factor)
+        # 1 in the circle, 0 out of the blurred border
+        t = np.multiply(dist_from_center, -1.0 / (2 * blur), dtype=dtype)
+        t += (radius + blur) / (2 * blur)
+        np.clip(t, 0, 1, out=t)
     
+    img[by1 - y1:by2 - y1, bx1 - x1:bx2 - x1] = _colorize(t, col2, col1, t.shape, dtype)
     return img
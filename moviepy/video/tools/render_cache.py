@@ -0,0 +1,238 @@
+"""
+Content-addressed cache of rendered frames, for incremental re-renders.
+
+Editing workflows often export the same timeline many times, with small
+changes (the text of a title, the position of an overlay). A
+``RenderCache`` stores the frames computed during an export on disk, and
+reuses them in the next exports for the clips which did not change.
+
+Each cached clip gets a key, a hash of everything its frames depend on:
+the identity of the source files (path, size, modification time) and
+the functions and parameters of the transformations (``fx``, ``fl``,
+``subclip``...) which made the clip, found by hashing the code, the
+default arguments and the closure variables of its ``make_frame``. The
+frames are stored as ``.npy`` files named after this key and the time
+of the frame, and loaded memory-mapped (read-only) when reused.
+
+In a composition, each layer is cached separately, with a key which
+does not depend on its position or start time: moving an overlay or
+replacing a title only recomputes the frames of the changed layers and
+the blits of the composition.
+
+>>> cache = RenderCache("render_cache")
+>>> cached_clip = cache.cached(final_clip)
+>>> cached_clip.write_videofile("result.mp4")
+>>> # ...change a title, rebuild final_clip, export again:
+>>> cache.cached(final_clip).write_videofile("result.mp4")
+
+The key of a clip only covers the code of the functions of its own
+graph, not the code of the functions they call by name: clear the cache
+after modifying such functions.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from functools import partial
+from types import BuiltinFunctionType, CodeType, FunctionType, MethodType
+import numpy as np
+from moviepy.Clip import Clip
+from moviepy.video.io.proxy import proxies_enabled
+
+# Attributes of the clips (and of the objects of their graph, like caches
+# and locks) which have no effect on the frames of the clip.
+IGNORED_ATTRIBUTES = {'audio', 'memoized_t', 'memoized_frame', 'memoize_frame',
+                      'reader', 'textclips', 'lastread', 'compiled', 'lock'}
+
+class UncacheableError(Exception):
+    """ Raised when a clip depends on an object which cannot be hashed
+    reliably. Such clips are rendered normally, without the cache. """
+    pass
+
+def file_identity(filename):
+    """ Returns a tuple identifying the current content of a file. """
+    stat = os.stat(filename)
+    return (os.path.abspath(filename), stat.st_size, stat.st_mtime_ns)
+
+class _Hasher:
+    """ Computes a stable hash of a graph of Python objects, following
+    functions closures, clips attributes, containers and arrays. """
+
+    def __init__(self):
+        self.sha = hashlib.sha1()
+        self.visiting = []
+
+    def update(self, *tokens):
+        for token in tokens:
+            self.sha.update(repr(token).encode('utf8'))
+
+    def add(self, obj):
+        if obj is None or isinstance(obj, (bool, int, float, complex, str, bytes)):
+            self.update(type(obj).__name__, obj)
+        elif isinstance(obj, (np.integer, np.floating, np.bool_)):
+            self.update(type(obj).__name__, obj.item())
+        elif isinstance(obj, np.ndarray):
+            self.update('array', obj.shape, obj.dtype.str)
+            self.sha.update(np.ascontiguousarray(obj).tobytes())
+        elif isinstance(obj, (list, tuple)):
+            self.update(type(obj).__name__, len(obj))
+            for item in obj:
+                self.add(item)
+        elif isinstance(obj, dict):
+            self.update('dict', len(obj))
+            for key in sorted(obj, key=repr):
+                self.add(key)
+                self.add(obj[key])
+        elif isinstance(obj, CodeType):
+            self.update('code', obj.co_name, obj.co_names, obj.co_varnames)
+            self.sha.update(obj.co_code)
+            self.add(obj.co_consts)
+        elif isinstance(obj, FunctionType):
+            self.update('function', obj.__module__, obj.__qualname__)
+            self.add(obj.__code__)
+            self.add(obj.__defaults__)
+            self.add(obj.__kwdefaults__)
+            self.add([cell.cell_contents for cell in (obj.__closure__ or [])])
+        elif isinstance(obj, MethodType):
+            self.update('method')
+            self.add(obj.__func__)
+            self.add(obj.__self__)
+        elif isinstance(obj, partial):
+            self.update('partial')
+            self.add([obj.func, obj.args, obj.keywords])
+        elif isinstance(obj, (BuiltinFunctionType, np.ufunc, type)):
+            self.update('builtin', getattr(obj, '__module__', None),
+                        getattr(obj, '__qualname__', obj.__name__))
+        elif any(obj is o for o in self.visiting):
+            # e.g. a clip whose make_frame uses the clip itself
+            self.update('cycle', [o is obj for o in self.visiting].index(True))
+        elif isinstance(obj, Clip):
+            self.visiting.append(obj)
+            self.update('clip', type(obj).__name__)
+            if getattr(obj, 'reader', None) is not None and hasattr(obj, 'filename'):
+                self.update(file_identity(obj.filename), obj.size)
+            self.add({key: value for key, value in obj.__dict__.items()
+                      if key not in IGNORED_ATTRIBUTES})
+            self.visiting.pop()
+        elif hasattr(obj, '__dict__') and type(obj).__module__.startswith('moviepy'):
+            self.visiting.append(obj)
+            self.update('object', type(obj).__qualname__)
+            self.add({key: value for key, value in obj.__dict__.items()
+                      if key not in IGNORED_ATTRIBUTES})
+            self.visiting.pop()
+        else:
+            raise UncacheableError("Cannot hash %r" % (obj,))
+
+    def hexdigest(self):
+        return self.sha.hexdigest()
+
+def frame_key(clip):
+    """ Returns the key of the frames of ``clip``: a hash of everything
+    its ``make_frame`` depends on, or None if the clip cannot be cached.
+    Attributes like the position or the start of the clip, which do not
+    change its frames, are not part of the key. """
+    hasher = _Hasher()
+    # Only the clips whose frames are those of a file (a VideoFileClip or
+    # its subclips, see ``make_frame.file_source``) are keyed by the file:
+    # the copies of a VideoFileClip made by fl, fl_image... have its
+    # reader too, but other frames.
+    file_source = getattr(clip.make_frame, 'file_source', None)
+    try:
+        if file_source is not None:
+            filename, offset = file_source
+            hasher.update('file', type(clip).__name__, file_identity(filename), offset,
+                          getattr(clip, 'size', None), clip.ismask)
+        else:
+            hasher.update(clip.ismask)
+            hasher.add(clip.make_frame)
+    except (UncacheableError, OSError):
+        return None
+    return hasher.hexdigest()
+
+class RenderCache:
+    """ On-disk cache of the frames of clips. See the module's docstring.
+
+    Parameters
+    -----------
+
+    directory
+      Folder where the frames are stored (created if needed).
+
+    compress
+      If True, the frames are stored zlib-compressed (``.npz``), which
+      takes less disk space but prevents memory-mapping them.
+
+    """
+
+    def __init__(self, directory, compress=False):
+        self.directory = directory
+        self.compress = compress
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def frame_path(self, key, t):
+        """ Path of the file of the frame at time ``t`` of the clip with
+        key ``key``. """
+        ext = '.npz' if self.compress else '.npy'
+        return os.path.join(self.directory, key[:2], key,
+                            '%d%s' % (int(round(1e6 * t)), ext))
+
+    def load(self, path):
+        if self.compress:
+            with np.load(path) as data:
+                return data['frame']
+        return np.load(path, mmap_mode='r')
+
+    def save(self, path, frame):
+        """ Writes the frame atomically, so that concurrent renders never
+        read incomplete files. """
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            if self.compress:
+                np.savez_compressed(f, frame=frame)
+            else:
+                np.save(f, frame)
+        os.replace(temp_path, path)
+
+    def cached_make_frame(self, make_frame, key):
+        """ Returns a version of ``make_frame`` which reads the frames from
+        the cache when they are present, and stores them otherwise. """
+
+        def cached(t):
+            if proxies_enabled():
+                # frames read from proxies must not pollute the cache
+                return make_frame(t)
+            path = self.frame_path(key, t)
+            if os.path.exists(path):
+                self.hits += 1
+                return self.load(path)
+            self.misses += 1
+            frame = np.asarray(make_frame(t))
+            self.save(path, frame)
+            return frame
+        return cached
+
+    def cached(self, clip):
+        """ Returns a copy of ``clip`` whose frames (and the frames of its
+        mask) are read from the cache when possible. The layers of
+        compositions are cached separately. """
+        new_clip = clip.copy()
+        key = frame_key(clip)
+        if hasattr(clip, 'compose_frame'):
+            new_clip.clips = [self.cached(c) for c in clip.clips]
+            if not clip.created_bg:
+                new_clip.bg = self.cached(clip.bg)
+            new_clip.make_frame = new_clip.compose_frame
+        if key is not None:
+            new_clip.make_frame = self.cached_make_frame(new_clip.make_frame, key)
+        if getattr(clip, 'mask', None) is not None:
+            new_clip.mask = self.cached(clip.mask)
+        return new_clip
+
+    def clear(self):
+        """ Deletes all the frames of the cache. """
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
@@ -0,0 +1,224 @@
+"""
+Resampling of pictures, used by ``resize``.
+
+Pictures are resized one axis after the other: each pixel of the new
+picture is a weighted sum of a few pixels of the same column (then row)
+of the picture. The positions and the weights of these pixels only
+depend on the sizes and on the method: they are computed once for each
+``(source size, new size, method)`` as the matrices of blocks of new
+pixels, and cached (``resampling_matrices``), so resizing by a
+time-varying factor (zooms) only computes the weights of new sizes.
+Each block of the new picture is then one matrix product (BLAS).
+
+Methods:
+
+- ``'nearest'``: the nearest pixel (an integer upscale repeats pixels).
+- ``'bilinear'``, ``'bicubic'``, ``'lanczos'``: interpolation with a
+  filter which is widened when the picture is reduced, so that all the
+  pixels contribute (antialiasing).
+- ``'area'``: each new pixel is the average of the pixels it covers,
+  best for large reductions.
+
+The pictures can have any number of channels (RGB frames, masks). The
+result is computed in float32, then rounded for uint8 pictures, and has
+the type of the picture.
+"""
+from collections import OrderedDict
+import threading
+import numpy as np
+
+# Weight matrices of the blocks of pixels, by (source size, new size, method)
+RESAMPLING_MATRICES = OrderedDict()
+RESAMPLING_MATRICES_SIZE = 64
+# The cache is shared by the threads rendering tiles
+_MATRICES_LOCK = threading.Lock()
+
+# Number of new pixels of a line computed by each matrix product
+BLOCK_SIZE = 32
+
+def _triangle(x):
+    return np.maximum(0, 1 - np.abs(x))
+
+def _cubic(x, a=-0.5):
+    x = np.abs(x)
+    return np.where(x < 1, ((a + 2) * x - (a + 3)) * x * x + 1,
+                    np.where(x < 2, ((a * x - 5 * a) * x + 8 * a) * x - 4 * a, 0))
+
+def _lanczos(x):
+    return np.where(np.abs(x) < 3, np.sinc(x) * np.sinc(x / 3), 0)
+
+# method -> (radius of the filter, filter)
+FILTERS = {'bilinear': (1, _triangle), 'bicubic': (2, _cubic), 'lanczos': (3, _lanczos)}
+
+def resampling_weights(src, dst, method):
+    """ Returns the arrays ``(indices, weights)`` of shape ``(dst, n)``:
+    the pixel ``i`` of a line of ``dst`` pixels resampled from a line of
+    ``src`` pixels is ``sum_k weights[i, k] * line[indices[i, k]]``. """
+    scale = src / dst
+    if method == 'nearest':
+        indices = np.floor((np.arange(dst) + 0.5) * scale).astype(int)[:, None]
+        weights = np.ones((dst, 1))
+    elif method == 'area':
+        # length of [j, j+1] covered by [i*scale, (i+1)*scale]
+        starts = np.arange(dst) * scale
+        indices = np.floor(starts).astype(int)[:, None] + np.arange(int(np.ceil(scale)) + 1)
+        weights = (np.minimum(indices + 1, starts[:, None] + scale) -
+                   np.maximum(indices, starts[:, None]))
+        weights = np.maximum(weights, 0) / scale
+    elif method in FILTERS:
+        radius, kernel = FILTERS[method]
+        stretch = max(scale, 1.0)
+        support = radius * stretch
+        centers = (np.arange(dst) + 0.5) * scale
+        first = np.floor(centers - support - 0.5).astype(int) + 1
+        indices = first[:, None] + np.arange(int(np.ceil(2 * support)) + 1)
+        weights = kernel((indices + 0.5 - centers[:, None]) / stretch)
+    else:
+        raise ValueError("Unknown resampling method: %s (use one of 'nearest', "
+                         "'bilinear', 'bicubic', 'lanczos', 'area')." % method)
+    # the pixels out of the line do not count
+    weights = np.where((indices >= 0) & (indices < src), weights, 0)
+    weights /= weights.sum(axis=1, keepdims=True)
+    return np.clip(indices, 0, src - 1), weights
+
+def resampling_matrices(src, dst, method):
+    """ Returns the weights of ``resampling_weights`` as a list of
+    ``(start, end, first, matrix)``: the pixels ``start`` to ``end`` of
+    the new line are ``matrix`` (float32) times the pixels ``first`` to
+    ``first + matrix.shape[1]`` of the line. The last results are kept
+    (``RESAMPLING_MATRICES_SIZE`` of them). """
+    key = (src, dst, method)
+    with _MATRICES_LOCK:
+        if key in RESAMPLING_MATRICES:
+            RESAMPLING_MATRICES.move_to_end(key)
+            return RESAMPLING_MATRICES[key]
+    indices, weights = resampling_weights(src, dst, method)
+    blocks = []
+    for start in range(0, dst, BLOCK_SIZE):
+        end = min(start + BLOCK_SIZE, dst)
+        rows, taps = np.nonzero(weights[start:end])
+        ind = indices[start:end][rows, taps]
+        first = ind.min()
+        matrix = np.zeros((end - start, ind.max() + 1 - first), dtype='float32')
+        np.add.at(matrix, (rows, ind - first), weights[start:end][rows, taps])
+        blocks.append((start, end, first, matrix))
+    with _MATRICES_LOCK:
+        RESAMPLING_MATRICES[key] = blocks
+        while len(RESAMPLING_MATRICES) > RESAMPLING_MATRICES_SIZE:
+            RESAMPLING_MATRICES.popitem(last=False)
+    return blocks
+
+def _blocks(src, dst, method, start, end):
+    """ The blocks of ``resampling_matrices`` giving the pixels ``start``
+    to ``end`` of the new line, reduced to these pixels and to the
+    pixels of the line they use. """
+    for block_start, block_end, first, matrix in resampling_matrices(src, dst, method):
+        if block_end <= start or block_start >= end:
+            continue
+        if block_start < start or block_end > end:
+            a, b = max(start, block_start), min(end, block_end)
+            matrix = matrix[a - block_start:b - block_start]
+            used = np.flatnonzero(matrix.any(axis=0))
+            first, matrix = first + used[0], matrix[:, used[0]:used[-1] + 1]
+            block_start, block_end = a, b
+        yield block_start, block_end, first, matrix
+
+def _source_range(src, dst, method, start, end):
+    """ The pixels ``(first, last)`` of a line of ``src`` pixels used by
+    the pixels ``start`` to ``end`` of the line resampled to ``dst``. """
+    if src == dst:
+        return start, end
+    if method == 'nearest':
+        indices = resampling_weights(src, dst, method)[0][start:end, 0]
+        return indices.min(), indices.max() + 1
+    blocks = list(_blocks(src, dst, method, start, end))
+    return (min(first for _, _, first, _ in blocks),
+            max(first + matrix.shape[1] for _, _, first, matrix in blocks))
+
+def _methods(size, newsize, method):
+    """ The methods used along the axes 0 and 1, see ``resample``. """
+    (w, h), (new_w, new_h) = size, newsize
+    return [method or ('area' if src >= 2 * dst else 'bilinear')
+            for src, dst in [(h, new_h), (w, new_w)]]
+
+def _resample_axis(picture, src, dst, method, axis, start, end, origin):
+    """ Resamples along ``axis`` the picture, which holds the pixels
+    ``origin`` to ``origin + picture.shape[axis]`` of lines of ``src``
+    pixels, into the pixels ``start`` to ``end`` of lines of ``dst``
+    pixels. """
+    if src == dst:
+        index = [slice(None)] * picture.ndim
+        index[axis] = slice(start - origin, end - origin)
+        return picture[tuple(index)]
+    if method == 'nearest':
+        if dst % src == 0 and (start, end, origin) == (0, dst, 0):
+            return np.repeat(picture, dst // src, axis=axis)
+        indices, weights = resampling_weights(src, dst, method)
+        return np.take(picture, indices[start:end, 0] - origin, axis=axis)
+    shape = picture.shape[:axis] + (end - start,) + picture.shape[axis + 1:]
+    lines = picture.reshape((-1, picture.shape[axis], int(np.prod(shape[axis + 1:], dtype=int))))
+    result = np.empty((lines.shape[0], end - start, lines.shape[2]), dtype='float32')
+    for block_start, block_end, first, matrix in _blocks(src, dst, method, start, end):
+        block = lines[:, first - origin:first - origin + matrix.shape[1]].astype('float32', copy=False)
+        rows = slice(block_start - start, block_end - start)
+        if lines.shape[0] == 1:
+            # first axis: one product for the whole width of the picture
+            np.dot(matrix, block[0], out=result[0, rows])
+        else:
+            for channel in range(lines.shape[2]):
+                result[:, rows, channel] = np.dot(block[:, :, channel], matrix.T)
+    return result.reshape(shape)
+
+def source_region(size, newsize, roi, method=None):
+    """ Returns the region ``(x1, y1, x2, y2)`` of a picture of size
+    ``size`` needed to compute the region ``roi`` of the picture resized
+    to ``newsize`` (see ``resample_region``). """
+    methods = _methods(size, newsize, method)
+    x1, x2 = _source_range(size[0], newsize[0], methods[1], roi[0], roi[2])
+    y1, y2 = _source_range(size[1], newsize[1], methods[0], roi[1], roi[3])
+    return int(x1), int(y1), int(x2), int(y2)
+
+def resample(picture, newsize, method=None):
+    """ Returns the picture resized to ``newsize=(width, height)``.
+
+    Parameters
+    -----------
+
+    picture
+      An array of shape ``(h, w)`` or ``(h, w, nchannels)``.
+
+    method
+      One of ``'nearest'``, ``'bilinear'``, ``'bicubic'``,
+      ``'lanczos'``, ``'area'`` (see the module's docstring). By
+      default ``'area'`` along the axes reduced by a factor 2 or more,
+      else ``'bilinear'``.
+
+    """
+    h, w = picture.shape[:2]
+    new_w, new_h = int(newsize[0]), int(newsize[1])
+    return resample_region(picture, (0, 0), (w, h), (new_w, new_h),
+                           (0, 0, new_w, new_h), method)
+
+def resample_region(picture, origin, size, newsize, roi, method=None):
+    """ Returns the region ``roi=(x1, y1, x2, y2)`` of a picture of size
+    ``size`` resized to ``newsize``, computed from ``picture``: the part
+    of the picture whose top-left corner is at ``origin``, which must
+    contain its ``source_region``. See ``resample`` for ``method``. """
+    new_w, new_h = int(newsize[0]), int(newsize[1])
+    methods = _methods(size, (new_w, new_h), method)
+    x1, y1, x2, y2 = roi
+    h, w = picture.shape[:2]
+    # the axis whose resampling gives the smallest picture goes first
+    axes = [0, 1] if (y2 - y1) * w <= h * (x2 - x1) else [1, 0]
+    arguments = [(size[1], new_h, y1, y2, origin[1]), (size[0], new_w, x1, x2, origin[0])]
+    result = picture
+    for axis in axes:
+        src, dst, start, end, first = arguments[axis]
+        result = _resample_axis(result, src, dst, methods[axis], axis, start, end, first)
+    if picture.dtype == 'uint8' and result.dtype != 'uint8':
+        result = np.rint(result, out=result)
+        if not set(methods) <= {'nearest', 'bilinear', 'area'}:
+            # the other filters have negative lobes
+            result = np.clip(result, 0, 255, out=result)
+        result = result.astype('uint8')
+    return result.astype(picture.dtype, copy=False)
@@ -0,0 +1,128 @@
+"""
+Retiming of clips, used by ``speedx`` and ``accel_decel``.
+
+``retime(clip, time_func, duration)`` plays at time ``t`` the frame of
+``clip`` at time ``time_func(t)``, like ``clip.fl_time(time_func)``,
+but knowing the frame grid of the source:
+
+- The source frames needed by the frames of the new clip (at the frame
+  rate of the clip) are computed once for the whole clip, from which it
+  is decided how the frames are read.
+- When the clip reads a video file and all these frames are multiples
+  of some ``k > 1`` (e.g. ``speedx(clip, 2)``, ``speedx(clip, 3)``), they
+  are read from a second reader which makes ffmpeg output only one
+  frame out of ``k``: the other frames are decoded but never converted
+  to RGB nor sent through the pipe.
+- With ``blend=True`` (meant for slow-downs), each frame is a weighted
+  average of the two source frames around ``time_func(t)``. The last
+  two source frames are kept, so that the source is only read forward
+  when ``time_func`` increases.
+"""
+import math
+import numpy as np
+from moviepy.video.io.ffmpeg_reader import FFMPEG_VideoReader
+from moviepy.video.io.proxy import proxies_enabled
+from moviepy.video.VideoClip import VideoClip
+
+def frame_schedule(time_func, duration, fps):
+    """ Returns the array of the source times ``time_func(t)`` for the
+    frames ``t = 0, 1/fps, 2/fps...`` of a clip of the given duration.
+    ``time_func`` is applied to the whole array of times if it accepts
+    arrays, else to each time. """
+    tt = np.arange(int(duration * fps + 1e-5)) / fps
+    try:
+        source_tt = np.asarray(time_func(tt), dtype=float)
+    except Exception:
+        source_tt = None
+    if source_tt is None or source_tt.shape != tt.shape:
+        source_tt = np.array([time_func(t) for t in tt], dtype=float)
+    return source_tt
+
+def _frame_indices(source_tt, fps, offset=0):
+    """ Indices of the source frames read at times ``source_tt``, for a
+    source of frame rate ``fps`` starting at frame time ``offset``. """
+    return (fps * (np.asarray(source_tt) + offset) + 0.00001).astype(int)
+
+def _decimated_reader(clip, step):
+    """ A reader of the file of ``clip`` which outputs only one frame
+    out of ``step``. """
+    reader = clip.reader
+    return FFMPEG_VideoReader(reader.filename, pix_fmt=reader.pix_fmt,
+                              target_resolution=(reader.size[1], reader.size[0]),
+                              resize_algo=reader.resize_algo, frame_step=step,
+                              infos=reader.infos)
+
+def retime(clip, time_func, duration, blend=False):
+    """ Returns a clip of the given duration playing at time ``t`` the
+    frame of ``clip`` at time ``time_func(t)``. See the module's docstring.
+
+    Parameters
+    -----------
+
+    time_func
+      Function ``t -> source time``, ideally accepting arrays of times.
+
+    duration
+      Duration of the new clip.
+
+    blend
+      If True, the frames are blended between the two source frames
+      around ``time_func(t)``. Requires ``clip.fps``.
+
+    """
+    if not isinstance(clip, VideoClip):
+        # audio clips are functions of continuous time
+        return clip.fl_time(time_func).set_duration(duration)
+
+    fps = getattr(clip, 'fps', None)
+    if blend and fps is None:
+        raise ValueError("Blending frames requires the clip to have an fps.")
+    file_source = getattr(clip.make_frame, 'file_source', None)
+    state = {'step': 1, 'frames': {}}
+
+    if (file_source is not None and fps is not None and not blend and
+            isinstance(getattr(clip, 'reader', None), FFMPEG_VideoReader)):
+        source_tt = frame_schedule(time_func, duration, fps)
+        indices = _frame_indices(source_tt, fps, file_source[1])
+        if len(indices) > 1 and indices.min() >= 0:
+            state['step'] = max(1, int(np.gcd.reduce(indices)))
+            state['offset'] = file_source[1]
+
+    def source_frame(gf, i):
+        """ Source frame ``i``, the last two being kept. """
+        frames = state['frames']
+        if i not in frames:
+            if len(frames) >= 2:
+                del frames[min(frames)]
+            frames[i] = gf(i / fps)
+        return frames[i]
+
+    def make_frame(gf, t):
+        source_t = time_func(t)
+        if blend:
+            position = fps * source_t
+            i = int(math.floor(position + 0.00001))
+            weight = position - i
+            frame = source_frame(gf, i)
+            if weight < 0.001 or (clip.duration is not None and
+                                  (i + 1) / fps >= clip.duration):
+                return frame
+            next_frame = source_frame(gf, i + 1)
+            result = np.multiply(frame, 1 - weight, dtype='float32')
+            result += np.multiply(next_frame, weight, dtype='float32')
+            if frame.dtype == 'uint8':
+                result = np.rint(result, out=result).astype('uint8')
+            return result
+        if state['step'] > 1 and not proxies_enabled():
+            i = int(fps * (source_t + state['offset']) + 0.00001)
+            if i % state['step'] == 0:
+                if 'reader' not in state:
+                    state['reader'] = _decimated_reader(clip, state['step'])
+                return state['reader'].get_frame(i / fps)
+        return gf(source_t)
+
+    new_clip = clip.fl(make_frame, keep_duration=True)
+    new_clip.make_frame.profile_of = time_func
+    new_clip.duration = duration
+    new_clip.end = None if duration is None else new_clip.start + duration
+    return new_clip
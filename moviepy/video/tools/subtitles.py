@@ -1,5 +1,9 @@
 """ Experimental module for subtitles support. """
+import os
 import re
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from moviepy.tools import cvsecs
 from moviepy.video.VideoClip import TextClip, VideoClip
@@ -17,6 +21,17 @@ class SubtitlesClip(VideoClip):
     subtitles
       Either the name of a file, or a list
 
+    make_textclip
+      A function ``txt -> TextClip`` used to render the subtitles.
+
+    encoding
+      Encoding of the subtitles file, if ``subtitles`` is a file name.
+
+    cache_size
+      Maximal number of rendered textclips kept in memory. The least
+      recently used ones are dropped first. Default (None) keeps them
+      all. See also ``SubtitlesClip.prerender``.
+
     Examples
     =========
     
@@ -30,44 +45,85 @@ class SubtitlesClip(VideoClip):
     
     """
 
-    def __init__(self, subtitles, make_textclip=None):
+    def __init__(self, subtitles, make_textclip=None, encoding=None, cache_size=None):
         VideoClip.__init__(self, has_constant_size=False)
         if isinstance(subtitles, str):
-            subtitles = file_to_subtitles(subtitles)
+            subtitles = file_to_subtitles(subtitles, encoding=encoding)
         self.subtitles = subtitles
-        self.textclips = dict()
+        self.textclips = OrderedDict()
+        self.cache_size = cache_size
         if make_textclip is None:
             make_textclip = lambda txt: TextClip(txt, font='Georgia-Bold', fontsize=24, color='white', stroke_color='black', stroke_width=0.5)
         self.make_textclip = make_textclip
         self.start = 0
         self.duration = max([tb for (ta, tb), txt in self.subtitles])
         self.end = self.duration
-
-        def add_textclip_if_none(t):
-            """ Will generate a textclip if it hasn't been generated asked
-            to generate it yet. If there is no subtitle to show at t, return
-            false. """
-            sub = [((ta, tb), txt) for (ta, tb), txt in self.textclips.keys() if ta <= t < tb]
-            if not sub:
-                sub = [((ta, tb), txt) for (ta, tb), txt in self.subtitles if ta <= t < tb]
-                if not sub:
-                    return False
-            sub = sub[0]
-            if sub not in self.textclips.keys():
-                self.textclips[sub] = self.make_textclip(sub[1])
-            return sub
+        self._index_times, self._index_subs = _build_subtitles_index(self.subtitles)
+        self._last_lookup = (None, None)
 
         def make_frame(t):
-            sub = add_textclip_if_none(t)
+            sub = self.add_textclip_if_none(t)
             return self.textclips[sub].get_frame(t) if sub else np.array([[[0, 0, 0]]])
 
         def make_mask_frame(t):
-            sub = add_textclip_if_none(t)
+            sub = self.add_textclip_if_none(t)
             return self.textclips[sub].mask.get_frame(t) if sub else np.array([[0]])
         self.make_frame = make_frame
         hasmask = bool(self.make_textclip('T').mask)
         self.mask = VideoClip(make_mask_frame, ismask=True) if hasmask else None
 
+    def find_subtitle(self, t):
+        """ Returns the subtitle ``((ta, tb), txt)`` shown at time ``t``,
+        or ``None`` if there is no subtitle to show at ``t``.
+
+        The lookup is a binary search in an index of the subtitles
+        computed once at creation, and the last result is remembered so
+        that the frame and the mask of a same time only search once. """
+        last_t, last_sub = self._last_lookup
+        if t == last_t:
+            return last_sub
+        i = bisect_right(self._index_times, t) - 1
+        sub = self._index_subs[i] if i >= 0 else None
+        self._last_lookup = (t, sub)
+        return sub
+
+    def add_textclip_if_none(self, t):
+        """ Will generate a textclip if it hasn't been generated asked
+        to generate it yet. If there is no subtitle to show at t, return
+        false. """
+        sub = self.find_subtitle(t)
+        if sub is None:
+            return False
+        if sub in self.textclips:
+            self.textclips.move_to_end(sub)
+        else:
+            self.textclips[sub] = self.make_textclip(sub[1])
+            if self.cache_size is not None:
+                while len(self.textclips) > self.cache_size:
+                    self.textclips.popitem(last=False)
+        return sub
+
+    def prerender(self, threads=None):
+        """ Generates the textclips of all the subtitles in advance.
+
+        The textclips are generated in a pool of ``threads`` threads (by
+        default, as many as ``concurrent.futures`` decides), which is
+        much faster than generating them one by one during the export
+        when ``make_textclip`` spends its time in an external program
+        like ImageMagick. As all the textclips are kept in memory, this
+        removes the ``cache_size`` limit of the clip.
+
+        Returns the clip itself, so that it can be chained.
+        """
+        self.cache_size = None
+        subs = [sub for sub in OrderedDict.fromkeys(self._index_subs)
+                if sub is not None and sub not in self.textclips]
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            textclips = executor.map(lambda sub: self.make_textclip(sub[1]), subs)
+            for sub, textclip in zip(subs, textclips):
+                self.textclips[sub] = textclip
+        return self
+
     def in_subclip(self, t_start=None, t_end=None):
         """ Returns a sequence of [(t1,t2), txt] covering all the given subclip
         from t_start to t_end. The first and last times will be cropped so as
@@ -101,38 +157,78 @@ class SubtitlesClip(VideoClip):
             return '%s - %s\n%s' % (fta, ftb, txt)
         return '\n\n'.join((to_srt(s) for s in self.subtitles))
 
-def file_to_subtitles(filename):
-    """ Converts a srt file into subtitles.
+def _build_subtitles_index(subtitles):
+    """ Flattens (possibly overlapping) subtitles into consecutive
+    segments. Returns the sorted start times of the segments and the
+    subtitle ``((ta, tb), txt)`` shown during each segment (``None`` for
+    gaps). When several subtitles overlap, the one coming first in the
+    list is shown, as it always was. """
+    subtitles = [((ta, tb), txt) for (ta, tb), txt in subtitles]
+    times = sorted(set(t for (ta, tb), txt in subtitles for t in (ta, tb)))
+    ranks = {t: i for i, t in enumerate(times)}
+    segments = [None] * len(times)
+    for (ta, tb), txt in reversed(subtitles):
+        segments[ranks[ta]:ranks[tb]] = [((ta, tb), txt)] * (ranks[tb] - ranks[ta])
+    return times, segments
+
+def file_to_subtitles(filename, encoding=None):
+    """ Converts a subtitles file into subtitles.
 
     The returned list is of the form ``[((ta,tb),'some text'),...]``
     and can be fed to SubtitlesClip.
 
-    Only works for '.srt' format for the moment.
+    Supported formats are SubRip ('.srt'), WebVTT ('.vtt') and
+    SubStation Alpha ('.ass', '.ssa'), guessed from the file extension.
+    The file is parsed line by line, so big files are never fully
+    loaded in memory.
     """
-    def time_to_seconds(time):
-        hours, minutes, seconds = time.split(':')
-        seconds, milliseconds = seconds.split(',')
-        return int(hours) * 3600 + int(minutes) * 60 + int(seconds) + int(milliseconds) / 1000
-
-    subtitles = []
-    current_sub = None
-    with open(filename, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if line.isdigit():
-                if current_sub:
-                    subtitles.append(current_sub)
-                current_sub = None
-            elif '-->' in line:
-                start, end = line.split('-->')
-                start = time_to_seconds(start.strip())
-                end = time_to_seconds(end.strip())
-                current_sub = ((start, end), '')
-            elif line:
-                if current_sub:
-                    current_sub = (current_sub[0], current_sub[1] + line + '\n')
-
-    if current_sub:
-        subtitles.append(current_sub)
-
-    return subtitles
+    return list(iter_subtitles(filename, encoding=encoding))
+
+def iter_subtitles(filename, encoding=None):
+    """ Iterator over the ``((ta,tb),'some text')`` subtitles of a file.
+    See ``file_to_subtitles`` for the supported formats. """
+    ext = os.path.splitext(filename)[1].lower()
+    parser = {'.ass': _parse_ass, '.ssa': _parse_ass}.get(ext, _parse_srt_vtt)
+    with open(filename, 'r', encoding=encoding or 'utf-8-sig') as f:
+        for sub in parser(f):
+            yield sub
+
+def _parse_srt_vtt(lines):
+    """ Parses SubRip and WebVTT cues. Both are made of blocks separated
+    by blank lines, with a ``start --> end`` line followed by the text
+    (WebVTT headers, notes and cue settings are ignored). """
+    current_times = None
+    current_text = ""
+    for line in lines:
+        times = re.findall("([0-9]*:?[0-9]+:[0-9]+[,.][0-9]+)", line)
+        if '-->' in line and len(times) >= 2:
+            current_times = [cvsecs(t) for t in times[:2]]
+        elif line.strip() == '':
+            if current_times is not None:
+                yield (current_times, current_text.strip('\n'))
+            current_times, current_text = None, ""
+        elif current_times is not None:
+            current_text += line
+    if current_times is not None:
+        yield (current_times, current_text.strip('\n'))
+
+def _parse_ass(lines):
+    """ Parses the ``Dialogue`` lines of the ``[Events]`` section of a
+    SubStation Alpha file. Style override tags like ``{\\i1}`` are
+    removed and ``\\N`` line breaks converted. """
+    fields = None
+    in_events = False
+    for line in lines:
+        line = line.strip()
+        if line.startswith('['):
+            in_events = line.lower() == '[events]'
+        elif not in_events:
+            continue
+        elif line.startswith('Format:'):
+            fields = [f.strip().lower() for f in line[7:].split(',')]
+        elif line.startswith('Dialogue:') and fields is not None:
+            values = line[9:].strip().split(',', len(fields) - 1)
+            values = dict(zip(fields, values))
+            text = re.sub(r"{[^}]*}", "", values['text'])
+            text = text.replace('\\N', '\n').replace('\\n', '\n')
+            yield ([cvsecs(values['start']), cvsecs(values['end'])], text)
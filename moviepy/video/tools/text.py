@@ -0,0 +1,243 @@
+"""
+In-process rendering of texts into pictures, with Pillow/FreeType.
+
+Rendering texts with ImageMagick means one subprocess and one temporary
+file per text. For clips showing many different texts (subtitles,
+credits, animated captions) it is much faster to render them in-process:
+the glyphs are rasterized once per (font, size, stroke) and the texts are
+composed from these cached glyph bitmaps. This is what ``TextClip`` does
+by default (``renderer='pillow'``).
+
+Note that the glyphs are placed one after the other using their advance
+widths, so kerning pairs are not applied.
+"""
+import warnings
+import numpy as np
+from moviepy.video.VideoClip import VideoClip
+try:
+    from PIL import Image, ImageColor, ImageDraw, ImageFont
+    PIL_FOUND = True
+except ImportError:
+    PIL_FOUND = False
+
+_RENDERERS = {}
+
+def get_text_renderer(font=None, fontsize=24, stroke_width=0):
+    """ Returns the (shared) ``PillowTextRenderer`` for the given font,
+    font size and stroke width, so that all the clips using the same
+    font share the same glyph cache. """
+    key = (font, fontsize, stroke_width)
+    if key not in _RENDERERS:
+        _RENDERERS[key] = PillowTextRenderer(font, fontsize, stroke_width)
+    return _RENDERERS[key]
+
+class PillowTextRenderer:
+    """ Renders texts with Pillow, caching the glyph bitmaps.
+
+    Parameters
+    -----------
+
+    font
+      Path to a TrueType/OpenType font file, or a font name that
+      FreeType can find. If None, Pillow's default font is used.
+
+    fontsize
+      Font size in pixels.
+
+    stroke_width
+      Width of the stroke around the letters, in pixels.
+
+    """
+
+    def __init__(self, font=None, fontsize=24, stroke_width=0):
+        if not PIL_FOUND:
+            raise ImportError("Rendering texts in-process requires Pillow.")
+        self.font = font
+        self.fontsize = fontsize
+        self.stroke_width = int(round(stroke_width))
+        if font is None:
+            try:
+                self.pil_font = ImageFont.load_default(fontsize)
+            except TypeError:  # Pillow < 10.1 has no scalable default font
+                self.pil_font = ImageFont.load_default()
+        else:
+            self.pil_font = ImageFont.truetype(font, fontsize)
+        ascent, descent = self.pil_font.getmetrics()
+        self.line_height = ascent + descent + 2 * self.stroke_width
+        self.glyphs = dict()
+
+    def glyph(self, char):
+        """ Returns ``(fill, outline, offset, advance)`` for a character,
+        where ``fill`` and ``outline`` are float arrays in [0, 1] (the
+        outline covers the letter and its stroke), ``offset=(x, y)`` is
+        the position of the bitmaps relative to the pen position and
+        ``advance`` is the horizontal move of the pen. """
+        if char not in self.glyphs:
+            sw = self.stroke_width
+            x1, y1, x2, y2 = self.pil_font.getbbox(char, stroke_width=sw)
+            size = (max(1, x2 - x1), max(1, y2 - y1))
+            pictures = []
+            for stroke in (0, sw):
+                im = Image.new('L', size, 0)
+                ImageDraw.Draw(im).text((-x1, -y1), char, font=self.pil_font,
+                                        fill=255, stroke_width=stroke,
+                                        stroke_fill=255)
+                pictures.append(np.array(im, dtype='float32') / 255)
+            advance = self.pil_font.getlength(char)
+            self.glyphs[char] = (pictures[0], pictures[1], (x1 + sw, y1 + sw),
+                                 advance)
+        return self.glyphs[char]
+
+    def text_width(self, line):
+        """ Returns the width in pixels of a line of text. """
+        return int(sum(self.glyph(char)[3] for char in line)) + 2 * self.stroke_width
+
+    def wrap(self, txt, width):
+        """ Returns the text with new lines inserted between words so that
+        its lines fit (if possible) in ``width`` pixels. """
+        lines = []
+        for paragraph in txt.split('\n'):
+            line = None
+            for word in paragraph.split(' '):
+                if line is not None and self.text_width(line + ' ' + word) <= width:
+                    line += ' ' + word
+                else:
+                    if line is not None:
+                        lines.append(line)
+                    line = word
+            lines.append(line)
+        return '\n'.join(lines)
+
+    def render_masks(self, txt, align='center', interline=4):
+        """ Returns the ``(fill, outline)`` masks of a (possibly multiline)
+        text, as two HxW float arrays in [0, 1]. """
+        lines = txt.split('\n')
+        widths = []
+        for line in lines:
+            x, right = 0, 0
+            for char in line:
+                fill, outline, (ox, oy), advance = self.glyph(char)
+                right = max(right, int(x) + ox + outline.shape[1])
+                x += advance
+            widths.append(max(right, int(x) + 2 * self.stroke_width))
+        w = max(1, max(widths))
+        h = len(lines) * self.line_height + (len(lines) - 1) * interline
+        fill_mask = np.zeros((h, w), dtype='float32')
+        outline_mask = np.zeros((h, w), dtype='float32')
+        for i, (line, line_w) in enumerate(zip(lines, widths)):
+            if align in ('center', 'Center'):
+                x = (w - line_w) // 2
+            elif align in ('East', 'right'):
+                x = w - line_w
+            else:
+                x = 0
+            y = i * (self.line_height + interline)
+            for char in line:
+                fill, outline, (ox, oy), advance = self.glyph(char)
+                x1, y1 = int(x) + ox, y + oy
+                gh, gw = outline.shape
+                region = (slice(max(0, y1), y1 + gh), slice(max(0, x1), x1 + gw))
+                crop = (slice(max(0, -y1), None), slice(max(0, -x1), None))
+                np.maximum(outline_mask[region], outline[crop],
+                           out=outline_mask[region])
+                np.maximum(fill_mask[region], fill[crop], out=fill_mask[region])
+                x += advance
+        return fill_mask, outline_mask
+
+    def render(self, txt, color='black', stroke_color=None, bg_color=None,
+               align='center', interline=4):
+        """ Renders a text. Returns ``(picture, mask)`` where ``picture`` is
+        a HxWx3 uint8 RGB array and ``mask`` a HxW float array. If
+        ``bg_color`` is provided the picture is drawn over a background
+        of that color and the mask is fully opaque. The lines of the
+        text are aligned with ``align``, one of 'center', 'West' (left)
+        or 'East' (right). """
+        fill, outline = self.render_masks(txt, align=align, interline=interline)
+        if stroke_color is None or not self.stroke_width:
+            stroke_color, outline = color, fill
+        color, stroke_color = _to_rgb(color), _to_rgb(stroke_color)
+        fill3 = fill[:, :, None]
+        picture = fill3 * color + (1 - fill3) * stroke_color
+        mask = outline
+        if bg_color is not None:
+            mask3 = mask[:, :, None]
+            picture = mask3 * picture + (1 - mask3) * _to_rgb(bg_color)
+            mask = np.ones(mask.shape, dtype='float32')
+        return picture.round().astype('uint8'), mask
+
+def _to_rgb(color):
+    """ Converts a color name, hex string or (R,G,B) to a float array. """
+    if isinstance(color, str):
+        color = ImageColor.getrgb(color)[:3]
+    return np.array(color, dtype='float32')
+
+def render_text_picture(txt, size=None, method='label', font=None, fontsize=24,
+                        color='black', stroke_color=None, stroke_width=0,
+                        bg_color=None, align='center', interline=4):
+    """ Renders a text in-process into a HxWx4 uint8 RGBA picture, with
+    the options of ``TextClip``: the picture is made of ``size`` (whose
+    width or height can be None to fit the text) and the text is placed
+    in it according to ``align`` ('center', 'North', 'SouthEast', ...).
+    With ``method='caption'`` the text is wrapped to the width of
+    ``size``. Like ImageMagick, uses the default font (with a warning)
+    if ``font`` cannot be found. """
+    stroke_width = stroke_width if stroke_color is not None else 0
+    try:
+        renderer = get_text_renderer(font, fontsize, stroke_width)
+    except OSError:
+        warnings.warn("MoviePy: font %r not found by Pillow, using the default "
+                      "font instead." % font)
+        renderer = get_text_renderer(None, fontsize, stroke_width)
+    if method == 'caption':
+        if size is None or size[0] is None:
+            raise ValueError("size must be specified with method='caption'")
+        txt = renderer.wrap(txt, size[0])
+    elif method != 'label':
+        raise ValueError("method must be 'label' or 'caption'")
+    align = align or 'center'
+    lines_align = ('East' if 'East' in align or align == 'right' else
+                   'West' if 'West' in align or align == 'left' else 'center')
+    picture, mask = renderer.render(txt, color=color, stroke_color=stroke_color,
+                                    align=lines_align, interline=interline)
+    h, w = mask.shape
+    if size is not None:
+        W = w if size[0] is None else size[0]
+        H = h if size[1] is None else size[1]
+        x = (0 if lines_align == 'West' else W - w if lines_align == 'East'
+             else (W - w) // 2)
+        y = 0 if 'North' in align else H - h if 'South' in align else (H - h) // 2
+        canvas = np.zeros((H, W, 4), dtype='float32')
+        # the part of the text inside the picture
+        x1, y1 = max(0, -x), max(0, -y)
+        x2, y2 = min(w, W - x), min(h, H - y)
+        if x2 > x1 and y2 > y1:
+            canvas[y1 + y:y2 + y, x1 + x:x2 + x, :3] = picture[y1:y2, x1:x2]
+            canvas[y1 + y:y2 + y, x1 + x:x2 + x, 3] = mask[y1:y2, x1:x2]
+        picture, mask = canvas[:, :, :3], canvas[:, :, 3]
+    if bg_color is not None:
+        mask3 = mask[:, :, None]
+        picture = mask3 * picture + (1 - mask3) * _to_rgb(bg_color)
+        mask = np.ones(mask.shape, dtype='float32')
+    return np.dstack([picture.round(), (255 * mask).round()]).astype('uint8')
+
+def pillow_textclip(txt, font=None, fontsize=24, color='black',
+                    stroke_color=None, stroke_width=0, bg_color=None,
+                    align='center', interline=4, duration=None):
+    """ Returns a still clip (with a mask) showing the text ``txt``,
+    rendered in-process. This is a fast alternative to ``TextClip``
+    for clips made of many different texts, for instance in
+    ``SubtitlesClip``: ::
+
+        >>> generator = lambda txt: pillow_textclip(txt, 'DejaVuSans.ttf',
+        ...                                         fontsize=24, color='white')
+        >>> sub = SubtitlesClip("subtitles.srt", generator)
+
+    See ``PillowTextRenderer`` for the parameters.
+    """
+    renderer = get_text_renderer(font, fontsize, stroke_width)
+    picture, mask = renderer.render(txt, color=color, stroke_color=stroke_color,
+                                    bg_color=bg_color, align=align,
+                                    interline=interline)
+    clip = VideoClip(lambda t: picture, duration=duration)
+    clip.mask = VideoClip(lambda t: mask, ismask=True, duration=duration)
+    return clip
@@ -0,0 +1,141 @@
+"""
+Rendering of the frames of large clips by tiles, in parallel.
+
+A region ``roi=(x1, y1, x2, y2)`` of a frame is given by
+``VideoClip.get_region``. The clips which can compute a region alone
+(crops, resizes, rotations, margins, color effects, compositions like
+``clips_array``...) only compute its pixels: a composition only asks
+each of its clips for the part visible in the region, which these clips
+compute in the same way (see ``VideoClip.blit_on``). The other clips
+compute their frame, which is sliced: while the tiles of a frame are
+computed, this frame is computed once, by the first tile which needs it,
+and shared by the other tiles (see ``shared_frame``). So the
+``make_frame`` of such a clip is never called by several threads at once.
+
+A ``TileRenderer`` computes the frames of a clip as tiles (by default,
+bands of ``TILE_HEIGHT`` rows) in a pool of threads, into one array. The
+tiles of a frame of a video wall are thus computed on several cores:
+numpy and the resampling products release the GIL, and the ffmpeg
+readers of the files, shared by the tiles, read one frame at a time.
+
+>>> wall = clips_array([[c1, c2, c3, c4], [c5, c6, c7, c8]])
+>>> with TileRenderer(wall, threads=4) as renderer:
+...     tiled = VideoClip(renderer.get_frame, duration=wall.duration)
+...     tiled.write_videofile("wall.mp4", fps=25)
+"""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import numpy as np
+
+# Default height of the tiles, which are bands of rows of the frames
+TILE_HEIGHT = 256
+
+# The frames shared by the tiles computed by the current thread
+_tiles = threading.local()
+
+def shared_frame(get_frame, t):
+    """ Returns ``get_frame(t)``, for instance ``clip.get_frame(t)``.
+
+    While a ``TileRenderer`` computes the tiles of a frame, the result is
+    computed once, by the first tile which needs it, and is shared by
+    the other tiles. It must not be modified. """
+    frames = getattr(_tiles, 'frames', None)
+    if frames is None:
+        return get_frame(t)
+    return frames.get(get_frame, t)
+
+class _SharedFrames:
+    """ The frames computed by the tiles of one frame, see
+    ``shared_frame``. """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def get(self, get_frame, t):
+        with self.lock:
+            entry = self.entries.get((get_frame, t))
+            if entry is None:
+                entry = self.entries[(get_frame, t)] = [threading.Lock(), None]
+        with entry[0]:
+            if entry[1] is None:
+                entry[1] = get_frame(t)
+        return entry[1]
+
+class TileRenderer:
+    """ Computes the frames of a clip by tiles in a pool of threads. See
+    the module's docstring.
+
+    Parameters
+    -----------
+
+    clip
+      A video clip.
+
+    tile_size
+      The size ``(w, h)`` of the tiles. ``None`` for ``w`` (or ``h``)
+      means the whole width (or height) of the frames. By default, bands
+      of ``TILE_HEIGHT`` rows.
+
+    threads
+      Number of threads, by default as many as ``concurrent.futures``
+      decides.
+
+    """
+
+    def __init__(self, clip, tile_size=None, threads=None):
+        self.clip = clip
+        self.tile_size = (None, TILE_HEIGHT) if tile_size is None else tile_size
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+
+    def tiles(self, roi=None):
+        """ Returns the list of the regions ``(x1, y1, x2, y2)`` of the
+        tiles of the region ``roi`` (by default the whole frames). """
+        x1, y1, x2, y2 = (0, 0) + tuple(self.clip.size) if roi is None else roi
+        tile_w, tile_h = self.tile_size
+        tile_w, tile_h = tile_w or x2 - x1, tile_h or y2 - y1
+        return [(x, y, min(x + tile_w, x2), min(y + tile_h, y2))
+                for y in range(y1, y2, tile_h) for x in range(x1, x2, tile_w)]
+
+    def get_frame(self, t, roi=None, out=None):
+        """ Returns the region ``roi`` (by default the whole frame) of
+        the frame at time ``t``, computed in ``out`` if provided. """
+        if (not self.clip.has_constant_size or
+                getattr(self.clip.make_frame, 'region', None) is None):
+            # the frame is computed once and sliced
+            frame = self.clip.get_frame(t)
+            frame = frame if roi is None else frame[roi[1]:roi[3], roi[0]:roi[2]]
+            if out is None:
+                return frame
+            out[...] = frame
+            return out
+        tiles = self.tiles(roi)
+        frames = _SharedFrames()
+        futures = [self.executor.submit(self._render_tile, frames, t, tile)
+                   for tile in tiles]
+        x0, y0 = tiles[0][:2]
+        x_end, y_end = tiles[-1][2:]
+        for (x1, y1, x2, y2), future in zip(tiles, futures):
+            tile = future.result()
+            if out is None:
+                out = np.empty((y_end - y0, x_end - x0) + tile.shape[2:], dtype=tile.dtype)
+            out[y1 - y0:y2 - y0, x1 - x0:x2 - x0] = tile
+        return out
+
+    def _render_tile(self, frames, t, tile):
+        """ Computes a tile, in a thread of the pool. """
+        _tiles.frames = frames
+        try:
+            return self.clip.get_region(t, tile)
+        finally:
+            _tiles.frames = None
+
+    def close(self):
+        """ Stops the threads. """
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
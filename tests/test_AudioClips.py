@@ -3,12 +3,17 @@
 import os
 import sys
 
+import numpy as np
 import pytest
 from numpy import pi, sin
 
-from moviepy.audio.AudioClip import (AudioClip, CompositeAudioClip,
-                                     concatenate_audioclips)
+from moviepy.audio.AudioClip import (AudioArrayClip, AudioClip,
+                                     CompositeAudioClip, concatenate_audioclips)
+from moviepy.audio.fx.audio_loop import audio_loop
+from moviepy.audio.fx.volumex import volumex
 from moviepy.audio.io.AudioFileClip import AudioFileClip
+from moviepy.audio.tools.retime import retime_audio
+from moviepy.video.fx.speedx import speedx
 
 from .test_helper import TMP_DIR
 
@@ -47,6 +52,19 @@ def test_audioclip_concat():
     concat_clip.write_audiofile(os.path.join(TMP_DIR, "concat_audioclip.mp3"))
 
 
+def test_audioclip_concat_many():
+    clips = [AudioClip(lambda t, i=i: [i + 0 * t, -i + 0 * t], duration=0.01,
+                       fps=1000) for i in range(500)]
+    concat_clip = concatenate_audioclips(clips)
+    tt = np.arange(0, 5, 0.001) + 0.0005
+    sound = concat_clip.get_frame(tt)
+    assert sound.shape == (5000, 2)
+    assert (sound[:, 0] == (tt * 100).astype(int)).all()
+    assert (concat_clip.get_frame(tt[::-1]) == sound[::-1]).all()
+    assert concat_clip.get_frame(0.0255)[0] == 2
+    assert (concat_clip.get_frame(10) == 0).all()
+
+
 @skip_if_windows
 def test_audioclip_with_file_concat():
     make_frame_440 = lambda t: [sin(440 * 2 * pi * t)]
@@ -74,5 +92,89 @@ def test_audiofileclip_concat():
     concat.write_audiofile(os.path.join(TMP_DIR, "concat_audio_file.mp3"))
 
 
+def test_composite_audio_chunks():
+    sound = np.random.RandomState(0).uniform(-0.5, 0.5, (22050, 2)).astype('float32')
+    clip = AudioArrayClip(sound, fps=22050)
+    composite = CompositeAudioClip([clip, clip.set_start(0.5)])
+    composite.fps = 22050
+    expected = np.zeros((33075, 2))
+    expected[:22050] += sound
+    expected[11025:] += sound
+    chunks = [chunk.copy() for chunk in
+              composite.iter_chunks(chunksize=5000, quantize=True, logger=None,
+                                    reuse_buffers=True)]
+    assert all(chunk.dtype == 'int16' for chunk in chunks)
+    quantized = np.concatenate(chunks)
+    assert np.abs(quantized - np.clip(expected, -0.99, 0.99) * 2 ** 15).max() <= 1
+
+
+def test_audio_speedx():
+    make_frame = lambda t: [sin(440 * 2 * pi * t)]
+    clip = AudioClip(make_frame, duration=2, fps=22050)
+    fast = speedx(clip, 2)
+    assert fast.duration == 1
+    sound = np.concatenate(list(fast.iter_chunks(logger=None)))
+    tt = np.arange(len(sound)) / 22050.0
+    assert np.abs(sound[100:-100, 0] - sin(880 * 2 * pi * tt[100:-100])).max() < 1e-3
+    # random access gives the same samples
+    assert np.allclose(fast.get_frame(tt[5000:5100]), sound[5000:5100])
+
+    # the filtered resampler removes what would alias
+    make_frame = lambda t: [sin(440 * 2 * pi * t) + sin(8000 * 2 * pi * t)]
+    clip = AudioClip(make_frame, duration=2, fps=22050)
+    sound = np.concatenate(list(retime_audio(clip, 2, filtered=True).iter_chunks(logger=None)))
+    assert np.abs(sound[100:-100, 0] - sin(880 * 2 * pi * tt[100:-100])).max() < 1e-3
+
+    stretched = speedx(clip, 1.5, preserve_pitch=True)
+    sound = np.concatenate(list(stretched.iter_chunks(logger=None)))
+    assert len(sound) == int(22050 * 2 / 1.5)
+    spectrum = np.abs(np.fft.rfft(sound[:, 0]))
+    assert abs(np.argmax(spectrum) * 22050.0 / len(sound) - 440) < 2
+
+
+def test_audio_get_samples():
+    sound = np.random.RandomState(0).uniform(-0.5, 0.5, (22050, 2))
+    clip = AudioArrayClip(sound, fps=22050)
+    assert (clip.get_samples(-100, 200)[:100] == 0).all()
+    mix = concatenate_audioclips([clip, CompositeAudioClip([clip, clip.set_start(0.3)])])
+    with AudioFileClip("media/crunching.mp3") as audio:
+        for c, start, fps in [(mix, 21000, 22050), (mix, 33000, 22050),
+                              (volumex(clip.subclip(0.2), 0.5), 100, 22050),
+                              (audio, 44100, 44100)]:
+            samples = c.get_samples(start, 3000, fps)
+            frames = c.get_frame(np.arange(start, start + 3000) / fps)
+            assert samples.shape == (3000, 2)
+            assert np.abs(samples - frames).max() < 1e-6
+        chunks = np.concatenate(list(audio.iter_chunks(chunksize=1000, logger=None)))
+        assert np.abs(chunks - audio.to_soundarray()[:len(chunks)]).max() == 0
+
+def test_composite_audio_threads():
+    with AudioFileClip("media/crunching.mp3") as audio:
+        mix = CompositeAudioClip([volumex(audio, 0.5),
+                                  audio_loop(audio.subclip(1, 2), duration=5).set_start(2),
+                                  audio.subclip(6).set_start(0.01)])
+        serial = np.concatenate([c.copy() for c in
+                                 mix.iter_chunks(chunksize=3000, fps=44100, logger=None)])
+        threaded = np.concatenate([c.copy() for c in
+                                   mix.iter_chunks(chunksize=3000, fps=44100, logger=None,
+                                                   reuse_buffers=True, threads=3)])
+        assert (serial == threaded).all()
+
+
+def test_composite_audio_threads_fl_time():
+    # stems reading the file through get_frame
+    with AudioFileClip("media/crunching.mp3") as audio:
+        stems = [audio.fl_time(lambda t, s=s: t + s, keep_duration=True)
+                 .set_duration(3).set_start(0.5 * s) for s in range(3)]
+        mix = CompositeAudioClip(stems)
+        serial = np.concatenate([c.copy() for c in
+                                 mix.iter_chunks(chunksize=3000, fps=44100, logger=None)])
+        for i in range(3):
+            threaded = np.concatenate([c.copy() for c in
+                                       mix.iter_chunks(chunksize=3000, fps=44100,
+                                                       logger=None, threads=3)])
+            assert (serial == threaded).all()
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -4,6 +4,7 @@ import pytest
 
 from moviepy.utils import close_all_clips
 from moviepy.video.fx.blink import blink
+from moviepy.video.tools.text import get_text_renderer, pillow_textclip
 from moviepy.video.VideoClip import TextClip
 
 from .test_helper import FONT
@@ -35,5 +36,34 @@ def test_if_textclip_crashes_in_label_mode():
     TextClip(txt='foo', method='label', font=FONT).close()
 
 
+def test_pillow_textclip():
+    clip = pillow_textclip('foo\nbar', color='white', stroke_color='black',
+                           stroke_width=1, duration=2)
+    frame = clip.get_frame(1)
+    mask = clip.mask.get_frame(1)
+    assert frame.dtype == 'uint8'
+    assert frame.shape[:2] == mask.shape
+    assert 0 < mask.mean() < 1
+
+    renderer = get_text_renderer(None, 24, 1)
+    assert set(renderer.glyphs) == set('foobar')
+    pillow_textclip('boo', color='white', stroke_color='black', stroke_width=1)
+    assert set(renderer.glyphs) == set('foobar')
+
+
+def test_textclip_pillow_renderer(monkeypatch):
+    import moviepy.config
+    monkeypatch.setattr(moviepy.config, 'IMAGEMAGICK_BINARY', 'unavailable')
+    clip = TextClip('hello world', color='white', stroke_color='black')
+    assert clip.mask is not None and 0 < clip.mask.get_frame(0).mean() < 1
+    clip = TextClip('hello world', size=(60, 100), method='caption',
+                    color='white', bg_color='black', align='North')
+    assert clip.size == (60, 100)
+    assert (clip.get_frame(0)[-20:] == 0).all()
+    assert clip.get_frame(0)[:clip.get_frame(0).shape[0] // 2].any()
+    with pytest.raises(ValueError):
+        TextClip('hello', renderer='gimp')
+
+
 if __name__ == '__main__':
     pytest.main()
@@ -1,13 +1,17 @@
 import os
 import sys
 
+import numpy as np
 import pytest
 from numpy import pi, sin
 
 from moviepy.audio.AudioClip import AudioClip
 from moviepy.audio.io.AudioFileClip import AudioFileClip
+from moviepy.config import change_settings
+from moviepy.profiler import RenderProfiler
 from moviepy.utils import close_all_clips
 from moviepy.video.fx.speedx import speedx
+from moviepy.video.io.ffmpeg_writer import ffmpeg_write_video
 from moviepy.video.io.VideoFileClip import VideoFileClip
 from moviepy.video.VideoClip import ColorClip, VideoClip
 
@@ -125,6 +129,21 @@ def test_setaudio_with_audiofile():
     close_all_clips(locals())
 
 
+def test_stream_audio():
+    clip = ColorClip(size=(100, 60), color=(255, 0, 0), duration=1)
+    audio = AudioClip(lambda t: [sin(440 * 2 * pi * t), sin(660 * 2 * pi * t)],
+                      duration=1)
+    audio.fps = 44100
+    clip = clip.set_audio(audio)
+    location = os.path.join(TMP_DIR, "stream_audio.mp4")
+    ffmpeg_write_video(clip, location, fps=24, stream_audio=True)
+    video = VideoFileClip(location)
+    assert video.audio is not None
+    assert abs(video.audio.duration - 1) < 0.1
+    assert video.audio.nchannels == 2
+    close_all_clips(locals())
+
+
 def test_setopacity():
     clip = VideoFileClip("media/big_buck_bunny_432_433.webm").subclip(0.2, 0.6)
     clip = clip.set_opacity(0.5)
@@ -151,5 +170,57 @@ def test_withoutaudio():
     close_all_clips(locals())
 
 
+def test_constant_clips():
+    clip = ColorClip((100, 50), color=(255, 0, 0), duration=1)
+    assert clip.constant
+    frame = clip.get_frame(0)
+    assert frame.shape == (50, 100, 3)
+    assert frame is clip.get_frame(0.5)
+    assert not frame.flags.writeable
+
+    assert clip.fl_image(lambda pic: 255 - pic).constant
+    assert not clip.fl(lambda gf, t: gf(t)).constant
+
+    small = ColorClip((10, 10), color=(0, 255, 0), duration=1)
+    composite = small.on_color(size=(100, 50), color=(255, 0, 0), pos=(5, 5))
+    composite_frame = composite.get_frame(0)
+    assert (composite_frame[7, 7] == [0, 255, 0]).all()
+    assert (composite_frame[0, 0] == [255, 0, 0]).all()
+    assert (composite.bg.get_frame(0)[7, 7] == [255, 0, 0]).all()
+    close_all_clips(locals())
+
+
+def test_mask_dtype_setting():
+    clip = ColorClip((10, 10), color=(255, 0, 0), duration=1)
+    assert clip.to_mask().get_frame(0).dtype == 'float32'
+    assert clip.add_mask().mask.get_frame(0).dtype == 'float32'
+
+    change_settings({'FLOAT_DTYPE': 'float64'})
+    try:
+        assert clip.to_mask().get_frame(0).dtype == 'float64'
+    finally:
+        change_settings({'FLOAT_DTYPE': 'float32'})
+
+
+def test_render_profiler():
+    clip = VideoClip(lambda t: np.zeros((10, 10, 3), dtype='uint8'), duration=1)
+    clip = clip.subclip(0.5).fl_image(lambda pic: pic + 1)
+    with RenderProfiler() as profiler:
+        for t in [0, 0.1, 0.2]:
+            clip.get_frame(t)
+    stacks = profiler.to_stacks().splitlines()
+    assert [line.rsplit(' ', 1)[0] for line in stacks] == [
+        'render', 'render;test_render_profiler',
+        'render;test_render_profiler;Clip.subclip',
+        'render;test_render_profiler;Clip.subclip;VideoClip']
+    node = profiler.root.children['test_render_profiler']
+    assert node.calls == 3
+    assert node.nbytes == 3 * 300
+    assert node.total_time >= node.self_time
+    assert '"calls": 3' in profiler.to_json()
+    clip.get_frame(0)
+    assert node.calls == 3
+
+
 if __name__ == "__main__":
     pytest.main()
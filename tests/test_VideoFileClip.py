@@ -1,12 +1,25 @@
 # -*- coding: utf-8 -*-
 """Video file clip tests meant to be run with pytest."""
 import os
+import re
+import shutil
+import subprocess as sp
 import sys
 
+import numpy as np
 import pytest
 
+from moviepy.config import get_setting
 from moviepy.utils import close_all_clips
+from moviepy.video.io import ffmpeg_reader
+from moviepy.video.compositing.concatenate import concatenate_videoclips
 from moviepy.video.compositing.CompositeVideoClip import clips_array
+from moviepy.video.fx.time_mirror import time_mirror
+from moviepy.video.fx.time_symmetrize import time_symmetrize
+from moviepy.video.io.ffmpeg_reader import FFMPEG_VideoReader
+from moviepy.video.io.frame_store import FrameStoreReader, build_frame_store
+from moviepy.video.io.proxy import build_proxy, proxy_filename, use_proxies
+from moviepy.video.io.smart_render import smart_render_plan, smart_write_videofile
 from moviepy.video.io.VideoFileClip import VideoFileClip
 from moviepy.video.VideoClip import ColorClip
 
@@ -61,5 +74,144 @@ def test_shallow_copy():
     video.audio.make_frame(15)
 
 
+def test_smart_render():
+    """Parts of the source played unchanged are copied between keyframes."""
+    video = VideoFileClip('media/big_buck_bunny_0_30.webm')
+    clip = concatenate_videoclips([video.subclip(5, 12), video.subclip(20, 23)])
+    plan = smart_render_plan(clip, fps=24, codec='libvpx')
+    assert [piece[0] for piece in plan] == ['render', 'copy', 'render', 'copy', 'render']
+    # the pieces are made of whole frames, 240 in all (the source has
+    # a time base of 1ms)
+    nframes = 0
+    for piece in plan:
+        frames = (piece[3] - piece[2] if piece[0] == 'copy' else piece[2] - piece[1]) * 24
+        assert abs(frames - round(frames)) < 0.05
+        nframes += round(frames)
+    assert nframes == 240
+    assert plan[0][1] == 0 and plan[-1][2] == 10
+    # the source streams are not written by the encoder of another codec
+    assert smart_render_plan(clip, fps=24, codec='libx264') == [('render', 0, 10)]
+
+    filename = os.path.join(TMP_DIR, "smart.webm")
+    smart_write_videofile(clip, filename, codec='libvpx', audio=False)
+    cmd = [get_setting("FFMPEG_BINARY"), "-i", filename, "-map", "0:v",
+           "-f", "null", "-"]
+    error = sp.run(cmd, stderr=sp.PIPE).stderr.decode('utf8')
+    assert int(re.findall(r"frame=\s*(\d+)", error)[-1]) == 240
+    result = VideoFileClip(filename)
+    assert abs(result.duration - 10) < 0.05
+    # the copied frames are the frames of the source
+    t = plan[1][2] - 5 + 1
+    assert (result.get_frame(t) == video.get_frame(5 + t)).all()
+    close_all_clips(locals())
+
+
+def test_proxy():
+    proxy_dir = os.path.join(TMP_DIR, "proxies")
+    filename = 'media/big_buck_bunny_432_433.webm'
+    build_proxy(filename, height=90, proxy_dir=proxy_dir, wait=True)
+    video = VideoFileClip(filename, proxy=90, proxy_dir=proxy_dir)
+    assert os.path.exists(video.proxy_filename)
+    frame = video.get_frame(0.5)
+    assert video.current_reader() is video.reader
+    with use_proxies():
+        proxy_frame = video.get_frame(0.5)
+        assert video.current_reader() is video.proxy_reader
+    assert proxy_frame.shape == frame.shape
+    assert abs(proxy_frame.mean() - frame.mean()) < 10
+    close_all_clips(locals())
+
+    # a modified source gets a new proxy, next to it or in proxy_dir
+    source = os.path.join(TMP_DIR, "proxy_source.webm")
+    shutil.copy(filename, source)
+    names = [proxy_filename(source), proxy_filename(source, proxy_dir=proxy_dir)]
+    os.utime(source, (0, os.stat(source).st_mtime + 10))
+    new_names = [proxy_filename(source), proxy_filename(source, proxy_dir=proxy_dir)]
+    assert all(name != new_name for name, new_name in zip(names, new_names))
+
+
+def test_frame_store():
+    filename = 'media/big_buck_bunny_432_433.webm'
+    store = os.path.join(TMP_DIR, "bbb.frames")
+    video = VideoFileClip(filename)
+    stored = VideoFileClip(filename, frame_store=store)
+    assert stored.reader.store_filename == store
+    assert stored.size == video.size
+    assert stored.fps == video.fps
+    for t in [0.1, 0.5, 0.9]:
+        assert (stored.get_frame(t) == video.get_frame(t)).all()
+    # a store built with other options is rebuilt
+    small = VideoFileClip(filename, frame_store=store, target_resolution=(90, 160))
+    assert list(small.size) == [160, 90]
+    assert small.get_frame(0.5).shape == (90, 160, 3)
+    build_frame_store(filename, store, compress=True)
+    assert FrameStoreReader(store).offsets is not None
+    close_all_clips(locals())
+
+
+def test_read_backwards(monkeypatch):
+    filename = 'media/big_buck_bunny_432_433.webm'
+    video = VideoFileClip(filename)
+    times = [0.9 - i / video.fps for i in range(15)]
+    forward = [video.get_frame(t).copy() for t in times[::-1]][::-1]
+    reader = VideoFileClip(filename).reader
+    backward = [reader.get_frame(t) for t in times]
+    # the frames after the first one were decoded by a single block
+    positions = [int(reader.fps * t + 0.00001) + 1 for t in times[1:]]
+    assert all(pos in reader.reverse_buffer for pos in positions)
+    for frame1, frame2 in zip(forward, backward):
+        assert (frame1 == frame2).all()
+    # the blocks hold at most REVERSE_BLOCK_BYTES of frames
+    w, h = video.size
+    monkeypatch.setattr(ffmpeg_reader, 'REVERSE_BLOCK_BYTES', 5 * w * h * 3)
+    assert FFMPEG_VideoReader(filename, reverse_block=100).reverse_block == 5
+    close_all_clips(locals())
+
+
+def test_write_time_mirror():
+    """A reversed clip is written with the frames of a forward read."""
+    filename = 'media/big_buck_bunny_432_433.webm'
+    clip = VideoFileClip(filename).subclip(0.2, 0.8)
+    mirrored = time_mirror(clip)
+    assert mirrored.duration == clip.duration
+    mirrored_file = os.path.join(TMP_DIR, "time_mirror.avi")
+    mirrored.write_videofile(mirrored_file, codec='png', audio=False)
+    # the frames were read backwards by blocks
+    assert mirrored.reader.reverse_buffer
+    times = np.arange(0, clip.duration, 1.0 / clip.fps)
+    forward = VideoFileClip(filename).subclip(0.2, 0.8)
+    expected = [forward.get_frame(clip.duration - t).copy()
+                for t in times[::-1]][::-1]
+    written = VideoFileClip(mirrored_file)
+    for t, frame in zip(times, expected):
+        assert (written.get_frame(t) == frame).all()
+    symmetrized = time_symmetrize(clip)
+    assert symmetrized.duration == 2 * clip.duration
+    assert (symmetrized.get_frame(clip.duration + times[3]) == expected[3]).all()
+    close_all_clips(locals())
+
+
+def test_read_after_close():
+    reader = FFMPEG_VideoReader('media/big_buck_bunny_432_433.webm')
+    frames = [reader.get_frame(t).copy() for t in [0.5, 0.45]]
+    reader.close()
+    assert (reader.get_frame(0.45) == frames[1]).all()
+    reader.close()
+    assert (reader.get_frame(0.5) == frames[0]).all()
+    reader.close()
+
+
+def test_seek():
+    """A seek reads the frame which would be read by decoding forward."""
+    filename = 'media/big_buck_bunny_0_30.webm'
+    for t in [5.8, 12.5, 20.0]:
+        forward = FFMPEG_VideoReader(filename)
+        forward.get_frame(t - 50 / forward.fps)
+        seek = FFMPEG_VideoReader(filename)
+        assert (seek.get_frame(t) == forward.get_frame(t)).all()
+        forward.close()
+        seek.close()
+
+
 if __name__ == '__main__':
     pytest.main()
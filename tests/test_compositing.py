@@ -3,10 +3,15 @@
 import sys
 from os.path import join
 
+import numpy as np
 import pytest
 
 from moviepy.editor import *
 from moviepy.utils import close_all_clips
+from moviepy.video.fx.crop import crop
+from moviepy.video.fx.resize import resize
+from moviepy.video.fx.rotate import rotate
+from moviepy.video.tools.tiling import TileRenderer
 
 from .test_helper import TMP_DIR
 
@@ -40,3 +45,92 @@ def test_clips_array_duration():
     video = clips_array([[red, green, blue]]).set_duration(5)
     video.write_videofile(join(TMP_DIR, "test_clips_array.mp4"))
     close_all_clips(locals())
+
+
+def test_concatenate_compose_boundaries():
+    # 200 clips of 0.1s with various sizes, each one starting 0.04s
+    # before the end of the previous one
+    clips = [ColorClip((10 + i % 3, 10), (i, 0, 0), duration=0.1)
+             for i in range(200)]
+    video = concatenate_videoclips(clips, method='compose', padding=-0.04)
+    assert video.playing_clips(-1) == []
+    assert video.playing_clips(video.clips[-1].end) == []
+    for i in range(1, 200):
+        start, end = video.clips[i].start, video.clips[i - 1].end
+        for t in (start, end, np.nextafter(start, 0), np.nextafter(end, 0)):
+            assert video.playing_clips(t) == [c for c in video.clips
+                                              if c.start <= t < c.end]
+        assert video.get_frame(start)[5, 5, 0] == i
+        assert video.get_frame(np.nextafter(start, 0))[5, 5, 0] == i - 1
+        assert video.get_frame(end)[5, 5, 0] == i
+        assert video.mask.get_frame(start)[5, 5] == 1
+    assert video.get_frame(video.duration - 0.01)[5, 5, 0] == 199
+
+
+def test_regions_and_tiles():
+    pictures = [np.random.RandomState(i).randint(0, 256, (30, 40, 3)).astype('uint8')
+                for i in range(4)]
+    computed = []
+
+    def source(i):
+        def make_frame(t):
+            computed.append(i)
+            return pictures[i]
+        return VideoClip(make_frame, duration=1)
+
+    wall = clips_array([[resize(source(0), 1.5), crop(source(1), x1=5, y2=25)],
+                        [rotate(source(2), 20), source(3)]])
+    frame = wall.get_frame(0)
+    region = wall.get_region(0, (7, 9, 70, 50))
+    assert np.abs(region.astype(int) - frame[9:50, 7:70]).max() <= 1
+    # the clips computing regions are only computed if visible in the
+    # region (the size of the other clips may not be that of their frames)
+    del computed[:]
+    wall.get_region(0, (0, 0, 20, 20))
+    assert sorted(computed) == [0, 3]
+
+    with TileRenderer(wall, tile_size=(32, 16), threads=2) as renderer:
+        del computed[:]
+        assert np.abs(renderer.get_frame(0).astype(int) - frame).max() <= 1
+        # the frames of the clips are computed once, not once per tile
+        assert sorted(computed) == [0, 1, 2, 3]
+
+    # clips partly out of the composition are cropped
+    shifted = CompositeVideoClip([source(3).set_position((-10, -5))], size=(40, 30),
+                                 bg_color=(0, 0, 0))
+    assert (shifted.get_frame(0)[:25, :30] == pictures[3][5:, 10:]).all()
+
+    # clips whose frames are not of the size of the clip
+    cropped = crop(source(0), x1=0, x2=15).set_position((-20, 0))
+    composition = CompositeVideoClip([cropped], size=(40, 30), bg_color=(0, 0, 0))
+    assert (composition.get_frame(0) == 0).all()
+    widened = source(0).fl_image(lambda pic: np.hstack([pic, pic]))
+    composition = CompositeVideoClip([widened.set_position((-50, 0))], size=(40, 30),
+                                     bg_color=(0, 0, 0))
+    assert (composition.get_frame(0)[:, :30] == pictures[0][:, 10:]).all()
+
+
+def test_transitions():
+    from moviepy.video.compositing.transitions import (crossfadein, crossfadeout,
+                                                       slide_in, slide_out)
+
+    picture = np.random.RandomState(0).randint(0, 256, (20, 30, 3)).astype('uint8')
+    clip = ImageClip(picture, duration=2)
+    bg = ColorClip((30, 20), (0, 0, 0), duration=2)
+
+    faded = CompositeVideoClip([bg, crossfadein(clip, 1)])
+    assert (faded.get_frame(0) == 0).all()
+    assert np.abs(faded.get_frame(0.5).astype(int) - picture // 2).max() <= 1
+    assert (faded.get_frame(1.5) == picture).all()
+    assert crossfadein(clip, 1).mask.get_frame(0.5).dtype == np.float32
+    assert crossfadeout(clip, 1).mask.get_frame(1.5).dtype == np.float32
+
+    slided = CompositeVideoClip([bg, slide_in(clip, 1, 'left')])
+    assert (slided.get_frame(0.5)[:, :15] == picture[:, 15:]).all()
+    assert (slided.get_frame(0.5)[:, 15:] == 0).all()
+    assert (slided.get_frame(1.5) == picture).all()
+
+    slided = CompositeVideoClip([bg, slide_out(clip, 1, 'bottom')])
+    assert (slided.get_frame(0.5) == picture).all()
+    assert (slided.get_frame(1.5)[10:] == picture[:10]).all()
+    assert (slided.get_frame(1.5)[:10] == 0).all()
@@ -4,7 +4,12 @@ import sys
 
 import pytest
 
-from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+from moviepy.video.io.ffmpeg_process import (FFMPEG_Command,
+                                             FFMPEG_ProcessManager)
+from moviepy.video.io.ffmpeg_reader import FFMPEG_VideoReader, ffmpeg_parse_infos
+import moviepy.video.io.ffmpeg_reader as ffmpeg_reader
+import moviepy.audio.io.readers as readers
+from moviepy.audio.io.readers import FFMPEG_AudioReader
 
 
 def test_ffmpeg_parse_infos():
@@ -28,5 +33,53 @@ def test_ffmpeg_parse_infos_for_i926():
     d = ffmpeg_parse_infos("tests/resource/sintel_with_15_chapters.mp4")
     assert d['audio_found']
 
+def test_ffmpeg_command():
+    cmd = (FFMPEG_Command(overwrite=True, binary='ffmpeg')
+           .add_input('-', f='rawvideo', s='10x10', an=True, vn=False)
+           .add_output('out.mp4', vcodec='libx264', pix_fmt=None))
+    assert cmd.args() == ['ffmpeg', '-loglevel', 'error', '-y', '-f', 'rawvideo',
+                          '-s', '10x10', '-an', '-i', '-', '-vcodec', 'libx264',
+                          'out.mp4']
+
+def test_ffmpeg_process_manager(monkeypatch):
+    manager = FFMPEG_ProcessManager(max_processes=2)
+    monkeypatch.setattr(ffmpeg_reader, 'FFMPEG_PROCESSES', manager)
+    filename = "media/big_buck_bunny_432_433.webm"
+    readers = [FFMPEG_VideoReader(filename) for i in range(3)]
+    # opening the third reader stopped the process of the first one
+    assert readers[0].proc is None
+    assert manager.running() == 2
+    frame = readers[0].get_frame(0.5)
+    assert readers[0].proc is not None
+    assert readers[1].proc is None
+    assert (frame == readers[2].get_frame(0.5)).all()
+    for reader in readers:
+        reader.close()
+    stats = manager.stats()
+    assert stats['running'] == 0
+    assert stats['evictions'] == 2
+    assert stats['launches'] == 7  # 3 parse_infos, 3 readers, 1 restart
+    assert stats['peak_running'] == 2
+
+def test_audio_reader_eviction(monkeypatch):
+    manager = FFMPEG_ProcessManager(max_processes=1)
+    monkeypatch.setattr(readers, 'FFMPEG_PROCESSES', manager)
+    monkeypatch.setattr(ffmpeg_reader, 'FFMPEG_PROCESSES', manager)
+    filename = "media/crunching.mp3"
+    reader = FFMPEG_AudioReader(filename, buffersize=2000)
+    other = FFMPEG_AudioReader(filename, buffersize=2000)
+    expected = other.read_samples(0, 3000)
+    # the process of the first reader was stopped by the second one
+    assert reader.proc is None
+    assert (reader.read_samples(0, 3000) == expected).all()
+    assert other.proc is None
+    # reading the next samples restarts the process where it was
+    following = reader.read_samples(3000, 1000)
+    other.close_proc()
+    assert (following == other.read_samples(3000, 1000)).all()
+    reader.close_proc()
+    other.close_proc()
+    assert manager.stats()['running'] == 0
+
 if __name__ == '__main__':
    pytest.main()
@@ -1,10 +1,13 @@
 import os
 import sys
 
+import numpy as np
 import pytest
 
+from moviepy.audio.AudioClip import AudioClip
 from moviepy.audio.fx.audio_normalize import audio_normalize
 from moviepy.audio.io.AudioFileClip import AudioFileClip
+from moviepy.audio.tools.loudness import measure_audio
 from moviepy.utils import close_all_clips
 from moviepy.video.fx.blackwhite import blackwhite
 # from moviepy.video.fx.blink import blink
@@ -25,6 +28,9 @@ from moviepy.video.fx.speedx import speedx
 from moviepy.video.fx.time_mirror import time_mirror
 from moviepy.video.fx.time_symmetrize import time_symmetrize
 from moviepy.video.io.VideoFileClip import VideoFileClip
+from moviepy.video.tools.affine import blit_clip
+from moviepy.video.tools.resampling import resample
+from moviepy.video.VideoClip import ColorClip, ImageClip, VideoClip
 
 from .test_helper import TMP_DIR
 
@@ -95,6 +101,30 @@ def test_invert_colors():
     close_all_clips(locals())
 
 
+def test_color_effects_are_fused():
+    frame = np.arange(256 * 3, dtype='uint8').reshape((16, 16, 3))
+    clip = VideoClip(lambda t: frame, duration=2)
+    clip1 = fadein(invert_colors(colorx(clip, 2)), 1)
+    assert len(clip1.make_frame.color_pipeline.stages) == 3
+
+    expected = 255 - np.minimum(255, 2.0 * frame)
+    assert (clip1.get_frame(1.5) == expected).all()
+    assert (clip1.get_frame(0.5) == np.round(0.5 * expected)).all()
+
+    gray = blackwhite(clip1).get_frame(1.5)
+    assert gray.shape == frame.shape
+
+    # the values saturate between the fused effects, like between effects
+    # applied one after the other
+    saturated = colorx(clip, 2).get_frame(0)
+    assert (colorx(colorx(clip, 2), 0.5).get_frame(0) == np.round(0.5 * saturated)).all()
+    assert (gray[:, :, 0] == gray[:, :, 2]).all()
+
+    red = invert_colors(ColorClip((4, 4), color=(255, 0, 0)))
+    assert red.constant
+    assert (red.get_frame(0)[0, 0] == [0, 255, 255]).all()
+
+
 def test_loop():
     # these do not work..  what am I doing wrong??
     return
@@ -194,6 +224,28 @@ def test_resize():
     #clip4.write_videofile(os.path.join(TMP_DIR, "resize4.webm"))
 
 
+def test_resize_methods():
+    picture = np.random.RandomState(0).randint(0, 256, (40, 60, 3)).astype('uint8')
+    # reduction by 2: average of the blocks of 2x2 pixels
+    half = resample(picture, (30, 20))
+    blocks = picture.reshape((20, 2, 30, 2, 3)).mean(axis=(1, 3))
+    assert np.abs(half - blocks).max() <= 0.5
+    double = resample(picture, (120, 80), 'nearest')
+    assert (double == picture.repeat(2, axis=0).repeat(2, axis=1)).all()
+    flat = np.full((40, 60), 0.25)
+    for method in ['nearest', 'bilinear', 'bicubic', 'lanczos', 'area']:
+        resized = resample(picture, (97, 13), method)
+        assert resized.shape == (13, 97, 3) and resized.dtype == 'uint8'
+        assert np.allclose(resample(flat, (83, 17), method), 0.25)
+
+    clip = VideoClip(lambda t: picture, duration=1)
+    clip.mask = ImageClip(flat, ismask=True)
+    zoom = resize(clip, lambda t: 1 + t, method='bicubic')
+    assert zoom.get_frame(0.5).shape == (60, 90, 3)
+    assert zoom.mask.get_frame(0.5).shape == (60, 90)
+    assert (zoom.get_frame(0.5) == resample(picture, (90, 60), 'bicubic')).all()
+
+
 def test_rotate():
     clip = get_test_video()
 
@@ -215,6 +267,30 @@ def test_rotate():
     close_all_clips(locals())
 
 
+def test_rotate_and_margin_are_fused():
+    picture = np.random.RandomState(0).randint(0, 256, (30, 40, 3)).astype('uint8')
+    clip = VideoClip(lambda t: picture, duration=1)
+    # a rotation by 90 degrees computed by the bilinear warp is exact
+    turned = rotate(clip, lambda t: 90)
+    assert (turned.get_frame(0) == np.rot90(picture)).all()
+
+    framed = margin(rotate(clip, 30), mar=3, color=(255, 0, 0))
+    assert len(framed.make_frame.affine.stages) == 2
+    assert framed.size == (56, 52)
+    frame = framed.get_frame(0)
+    assert frame.shape == (52, 56, 3) and (frame[0] == [255, 0, 0]).all()
+    unfused = margin(ImageClip(rotate(clip, 30).get_frame(0)), mar=3, color=(255, 0, 0))
+    assert np.abs(frame.astype(int) - unfused.get_frame(0)).max() <= 1
+
+    # drawn directly on a picture, at a position in whole or not pixels
+    canvas = np.zeros((60, 70, 3), dtype='uint8')
+    direct = blit_clip(framed, canvas.copy(), 0, (5, 6))
+    assert np.abs(direct[6:58, 5:61].astype(int) - frame).max() <= 1
+    shifted = blit_clip(clip, canvas.copy(), 0, (2.5, 0))
+    assert np.abs(shifted[:30, 3:42].astype(int) -
+                  (picture[:, :-1] / 2 + picture[:, 1:] / 2)).max() <= 1
+
+
 def test_scroll():
     pass
 
@@ -236,6 +312,20 @@ def test_speedx():
     close_all_clips(locals())
 
 
+def test_speedx_from_file():
+    video = VideoFileClip("media/big_buck_bunny_432_433.webm")
+    for factor in [2, 3, 0.5]:
+        fast = speedx(video, factor)
+        reference = video.fl_time(lambda t: factor * t).set_duration(fast.duration)
+        for t in [0, 0.1, 0.25, 0.4]:
+            assert (fast.get_frame(t) == reference.get_frame(t)).all()
+    blended = speedx(video, 0.25, blend=True)
+    frame = blended.get_frame(1.5 / video.fps)
+    assert frame.dtype == 'uint8'
+    assert frame.shape == video.get_frame(0).shape
+    close_all_clips(locals())
+
+
 def test_supersample():
     pass
 
@@ -264,5 +354,16 @@ def test_normalize():
     close_all_clips(locals())
 
 
+def test_normalize_loudness():
+    # EBU R128 reference: a 1kHz sine at -23dBFS on both channels
+    amplitude = 10 ** (-23 / 20.0)
+    make_frame = lambda t: amplitude * np.array([np.sin(2 * np.pi * 1000 * t)] * 2).T
+    clip = AudioClip(make_frame, duration=5, fps=48000)
+    assert abs(measure_audio(clip, loudness=True)['loudness'] + 23) < 0.1
+    louder = audio_normalize(clip, loudness=-16)
+    assert abs(measure_audio(louder, loudness=True)['loudness'] + 16) < 0.1
+    assert abs(audio_normalize(clip).max_volume() - 1) < 1e-6
+
+
 if __name__ == '__main__':
     pytest.main()
@@ -1,15 +1,19 @@
 import os
 import sys
 
+import numpy as np
+import proglog
 import pytest
 
 import moviepy.video.tools.cuts as cuts
 from moviepy.utils import close_all_clips
 from moviepy.video.compositing.CompositeVideoClip import CompositeVideoClip
 from moviepy.video.compositing.concatenate import concatenate_videoclips
+from moviepy.video.io.ffmpeg_reader import READER_STATS
+from moviepy.video.io.telemetry import ExportTelemetry
 from moviepy.video.io.VideoFileClip import VideoFileClip
 from moviepy.video.tools.subtitles import SubtitlesClip, file_to_subtitles
-from moviepy.video.VideoClip import ColorClip, TextClip
+from moviepy.video.VideoClip import ColorClip, ImageClip, TextClip
 
 from .test_helper import FONT, TMP_DIR
 
@@ -54,5 +58,62 @@ def test_file_to_subtitles():
 
     assert data == file_to_subtitles("media/subtitles1.srt")
 
+
+def test_file_to_subtitles_vtt_and_ass():
+    data = [([1.0, 4.0], 'Hello\nworld'), ([5.5, 7.0], 'Bye!')]
+
+    vtt_file = os.path.join(TMP_DIR, "subtitles1.vtt")
+    with open(vtt_file, "w") as f:
+        f.write("WEBVTT\n\n1\n00:01.000 --> 00:04.000 align:start\n"
+                "Hello\nworld\n\n00:00:05.500 --> 00:00:07.000\nBye!\n")
+    assert data == file_to_subtitles(vtt_file)
+
+    ass_file = os.path.join(TMP_DIR, "subtitles1.ass")
+    with open(ass_file, "w") as f:
+        f.write("[Events]\nFormat: Layer, Start, End, Style, Text\n"
+                "Dialogue: 0,0:00:01.00,0:00:04.00,Default,{\\i1}Hello\\Nworld\n"
+                "Dialogue: 0,0:00:05.50,0:00:07.00,Default,Bye!\n")
+    assert data == file_to_subtitles(ass_file)
+
+
+def test_subtitles_lookup_and_cache():
+    data = [([0.0, 4.0], 'Red!'), ([2.0, 6.0], 'Overlap'),
+            ([10.0, 14.0], 'Green!')]
+    generator = lambda txt: ImageClip(np.zeros((10, 10, 3), dtype='uint8'))
+    subtitles = SubtitlesClip(data, generator, cache_size=1)
+
+    assert subtitles.find_subtitle(3) == ((0.0, 4.0), 'Red!')
+    assert subtitles.find_subtitle(5) == ((2.0, 6.0), 'Overlap')
+    assert subtitles.find_subtitle(8) is None
+    assert subtitles.find_subtitle(14) is None
+
+    subtitles.get_frame(1)
+    subtitles.get_frame(11)
+    assert list(subtitles.textclips) == [((10.0, 14.0), 'Green!')]
+
+    subtitles.prerender(threads=2)
+    assert len(subtitles.textclips) == 3
+
+
+def test_export_telemetry():
+    logger = proglog.ProgressLogger()
+    filename = os.path.join(TMP_DIR, "telemetry.jsonl")
+    if os.path.exists(filename):
+        os.remove(filename)
+    # the decoding statistics of a previous export are not counted
+    READER_STATS['frames_decoded'] += 5
+    telemetry = ExportTelemetry(10, logger, filename=filename, interval=0)
+    for i in range(4):
+        telemetry.add_frame(0.01, 0.002)
+    stats = logger.state['export_stats']
+    assert stats['frames'] == 4
+    assert stats['render_time'] == pytest.approx(0.04)
+    assert stats['encode_wait_time'] == pytest.approx(0.008)
+    assert stats['eta'] > 0
+    assert stats['frames_decoded'] == 0
+    with open(filename) as f:
+        assert len(f.readlines()) == 4
+
+
 if __name__ == '__main__':
     pytest.main()
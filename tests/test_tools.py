@@ -5,6 +5,7 @@ import sys
 import pytest
 
 import moviepy.tools as tools
+from moviepy.video.io.ffmpeg_process import FFMPEG_PROCESSES, FFMPEG_Command
 
 
 @pytest.mark.parametrize('given, expected', [
@@ -62,5 +63,16 @@ def test_sys_write_flush():
     assert file == b""
 
 
+def test_subprocess_call():
+    """Test that subprocess_call runs ffmpeg commands through FFMPEG_PROCESSES."""
+    launches = FFMPEG_PROCESSES.stats()['launches']
+    tools.subprocess_call(FFMPEG_Command().add_input("media/big_buck_bunny_432_433.webm")
+                          .add_output("-", f="null", t="0.1"), logger=None)
+    assert FFMPEG_PROCESSES.stats()['launches'] == launches + 1
+    with pytest.raises(IOError):
+        tools.subprocess_call(FFMPEG_Command().add_input("media/no_such_file.mp4")
+                              .add_output("-", f="null"), logger=None)
+
+
 if __name__ == '__main__':
    pytest.main()
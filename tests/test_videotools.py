@@ -3,7 +3,15 @@
 import os
 import sys
 
+import numpy as np
+
+from moviepy.video.compositing.CompositeVideoClip import CompositeVideoClip
 from moviepy.video.tools.credits import credits1
+from moviepy.video.tools.drawing import circle, color_gradient, color_split
+from moviepy.video.fx.colorx import colorx
+from moviepy.video.io.VideoFileClip import VideoFileClip
+from moviepy.video.tools.render_cache import RenderCache, frame_key
+from moviepy.video.VideoClip import ColorClip
 
 from .test_helper import TMP_DIR, FONT
 
@@ -35,3 +43,64 @@ def test_credits():
     image = image.set_duration(3)
     image.write_videofile(vid_location, fps=24)
     assert os.path.isfile(vid_location)
+
+
+def test_render_cache():
+    cache = RenderCache(os.path.join(TMP_DIR, "render_cache"))
+    cache.clear()
+    background = ColorClip((20, 10), color=(10, 20, 30), duration=1)
+    background = background.fl(lambda gf, t: gf(t) + 1)
+
+    def make_video(title_color, title_pos):
+        title = ColorClip((5, 5), color=title_color, duration=1)
+        title = title.fl(lambda gf, t: gf(t) // 2)
+        return CompositeVideoClip([background, title.set_position(title_pos)])
+
+    frame = cache.cached(make_video((250, 0, 0), (0, 0))).get_frame(0.5)
+    assert (cache.hits, cache.misses) == (0, 3)
+    assert frame[0, 0].tolist() == [125, 0, 0]
+    # Same timeline: the composition is read from the cache
+    assert (cache.cached(make_video((250, 0, 0), (0, 0))).get_frame(0.5) == frame).all()
+    assert (cache.hits, cache.misses) == (1, 3)
+    # Moved title: only the composition is recomputed
+    video = make_video((250, 0, 0), (5, 5))
+    assert (cache.cached(video).get_frame(0.5) == video.get_frame(0.5)).all()
+    assert (cache.hits, cache.misses) == (3, 4)
+    # New title: the background layer is reused
+    cache.cached(make_video((0, 250, 0), (5, 5))).get_frame(0.5)
+    assert (cache.hits, cache.misses) == (4, 6)
+
+
+def test_render_cache_derived_clips():
+    clip = VideoFileClip("media/big_buck_bunny_432_433.webm")
+    derived = [clip.subclip(0.2), colorx(clip, 2), clip.fl_image(lambda pic: pic[::-1])]
+    keys = [frame_key(c) for c in [clip] + derived]
+    assert None not in keys and len(set(keys)) == 4
+    # the key of a subclip only depends on the file and the offset
+    assert frame_key(clip.subclip(0.2).set_position((5, 5))) == keys[1]
+    assert frame_key(clip.subclip(0, 0.5)) == keys[0]
+
+    cache = RenderCache(os.path.join(TMP_DIR, "render_cache"))
+    cache.clear()
+    for c in [clip] + derived:
+        assert (cache.cached(c).get_frame(0.3) == c.get_frame(0.3)).all()
+    clip.close()
+
+
+def test_drawing():
+    size = (64, 48)
+    # circles centered on a pixel use the cached distance field
+    for center in [(20, 30), (20.5, 30.25)]:
+        mask = circle(size, center, 10, blur=2)
+        assert mask.dtype == 'float32'
+        Y, X = np.ogrid[:48, :64]
+        dist = np.sqrt((X - center[0]) ** 2 + (Y - center[1]) ** 2)
+        expected = np.clip((12 - dist) / 4, 0, 1)
+        assert np.abs(mask - expected).max() < 1e-5
+        assert (circle(size, center, 10, blur=2, roi=(8, 16, 40, 48)) == mask[16:, 8:40]).all()
+    gradient = color_gradient(size, p1=(0, 0), p2=(0, 47), col1=[255, 0, 0], col2=[0, 0, 255])
+    assert gradient.shape == (48, 64, 3)
+    assert gradient[0, 5].tolist() == [255, 0, 0] and gradient[47, 5].tolist() == [0, 0, 255]
+    split = color_split(size, x=32, grad_width=8, roi=(0, 0, 40, 2))
+    assert split.shape == (2, 40)
+    assert split[0, 27] == 0 and split[0, 36] == 1 and 0 < split[0, 32] < 1